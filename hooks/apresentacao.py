@@ -0,0 +1,63 @@
+# ---------------------------------------------------------
+# arquivo: hooks/apresentacao.py
+# ---------------------------------------------------------
+"""
+Exibição de tabelas com valores monetários mantendo os tipos numéricos.
+
+Em vez de converter valores em texto ("R$ 1.234,56") com `.apply` ou
+`Styler.format`, as colunas seguem numéricas até o navegador e a
+formatação fica no `column_config` do Streamlit (`format="localized"`,
+com "R$" na dica da coluna). A tabela é enviada em Arrow, compacta, e
+continua ordenável. O Styler fica restrito a tabelas-resumo pequenas.
+"""
+import pandas as pd
+import streamlit as st
+
+from hooks.dinheiro import somar_reais
+
+
+def coluna_moeda(rotulo: str | None = None, **kwargs):
+    """NumberColumn para valores em reais (formato localizado do navegador)."""
+    return st.column_config.NumberColumn(rotulo, format="localized", help=kwargs.pop("help", "R$"), **kwargs)
+
+
+def coluna_percentual(rotulo: str | None = None, **kwargs):
+    return st.column_config.NumberColumn(rotulo, format="%.2f%%", **kwargs)
+
+
+def config_colunas(
+    colunas_moeda=(),
+    colunas_percentual=(),
+    rotulos: dict | None = None,
+    **extras,
+) -> dict:
+    """column_config com as colunas de moeda e de percentual (e `rotulos` opcionais)."""
+    rotulos = rotulos or {}
+    config = {c: coluna_moeda(rotulos.get(c)) for c in colunas_moeda}
+    config.update({c: coluna_percentual(rotulos.get(c)) for c in colunas_percentual})
+    config.update(extras)
+    return config
+
+
+def exibir_tabela(
+    df: pd.DataFrame,
+    colunas_moeda=(),
+    colunas_percentual=(),
+    rotulos: dict | None = None,
+    column_config: dict | None = None,
+    **kwargs,
+):
+    """
+    `st.dataframe` com as colunas monetárias e percentuais formatadas pelo
+    column_config. Demais argumentos seguem para `st.dataframe`.
+    """
+    config = config_colunas(colunas_moeda, colunas_percentual, rotulos, **(column_config or {}))
+    kwargs.setdefault("use_container_width", True)
+    kwargs.setdefault("hide_index", True)
+    return st.dataframe(df, column_config=config, **kwargs)
+
+
+def linha_total(df: pd.DataFrame, coluna_rotulo: str, colunas_soma, rotulo: str = "Total Geral") -> pd.DataFrame:
+    """`df` com uma linha final de totais (numéricos) das `colunas_soma`."""
+    total = {coluna_rotulo: rotulo, **{c: somar_reais(df[c]) for c in colunas_soma}}
+    return pd.concat([df.astype({coluna_rotulo: object}), pd.DataFrame([total])], ignore_index=True)
@@ -0,0 +1,76 @@
+# ---------------------------------------------------------
+# arquivo: hooks/arquivo_relatorios.py
+# ---------------------------------------------------------
+"""
+Arquivo de seções do extrato em PDF já renderizadas, por versão.
+
+Ao salvar uma regra, a página de cadastro enfileira `arquivar_versao`
+(job em segundo plano): o card e a seção são gravados no cache de
+fragmentos e a seção é convertida em PDF uma única vez, em
+`database/arquivo_relatorios/<id_iniciativa>/<versao>_<dependencias>.pdf`.
+O extrato da Visualização usa esses arquivos e só passa pelo xhtml2pdf
+as seções ainda não arquivadas (e o sumário).
+"""
+import glob
+import os
+import sqlite3
+
+from hooks.relatorio_pdf import documento_html, renderizar_secao_pdf
+from hooks.render_iniciativas import CacheFragmentos, FORMATO_PDF
+
+DB_PATH = "database/app_data.db"
+ARQUIVO_DIR = "database/arquivo_relatorios"
+
+
+def caminho_arquivado(id_iniciativa, versao, versao_dependencias: str, diretorio: str = ARQUIVO_DIR) -> str:
+    return os.path.join(diretorio, str(int(id_iniciativa)), f"{int(versao)}_{versao_dependencias}.pdf")
+
+
+def pdf_arquivado(cache: CacheFragmentos, row, diretorio: str = ARQUIVO_DIR) -> bytes | None:
+    """PDF arquivado da seção desta versão da regra, se existir."""
+    caminho = caminho_arquivado(row['id_iniciativa'], row['id'], cache.versao_dependencias, diretorio)
+    try:
+        with open(caminho, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def arquivar_versao(id_regra: int, db_path: str = DB_PATH, diretorio: str = ARQUIVO_DIR, progresso=None) -> None:
+    """
+    Gera card e seção (cache de fragmentos) e o PDF da seção de uma regra,
+    removendo os PDFs de versões anteriores da mesma iniciativa.
+    Compatível com GerenciadorJobs.submeter (retorna None: nada a baixar).
+    """
+    if progresso:
+        progresso(tabelas_concluidas=0, total_tabelas=2, mensagem="Renderizando card e seção")
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        cache = CacheFragmentos(conn)
+        row = cache.aquecer(id_regra)
+        if row is None:
+            return None
+        fragmento = cache.obter(row, FORMATO_PDF)
+        caminho = caminho_arquivado(row['id_iniciativa'], row['id'], cache.versao_dependencias, diretorio)
+    finally:
+        conn.close()
+
+    if progresso:
+        progresso(tabelas_concluidas=1, mensagem="Convertendo seção em PDF")
+    pdf = renderizar_secao_pdf(documento_html(fragmento))
+
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    caminho_tmp = caminho + ".tmp"
+    with open(caminho_tmp, "wb") as f:
+        f.write(pdf)
+    os.replace(caminho_tmp, caminho)
+
+    # só versões anteriores: um job atrasado não apaga a seção mais nova
+    for antigo in glob.glob(os.path.join(os.path.dirname(caminho), "*.pdf")):
+        versao_antiga = os.path.basename(antigo).split("_", 1)[0]
+        if antigo != caminho and versao_antiga.isdigit() and int(versao_antiga) <= int(row['id']):
+            os.remove(antigo)
+
+    if progresso:
+        progresso(tabelas_concluidas=2, mensagem="Seção arquivada")
+    return None
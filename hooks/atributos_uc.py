@@ -0,0 +1,79 @@
+# ---------------------------------------------------------
+# arquivo: hooks/atributos_uc.py
+# ---------------------------------------------------------
+"""
+Atributos geográficos da UC (GR, bioma, UF, categoria) desnormalizados em
+`tf_distribuicao_elegiveis`.
+
+A carga (init_db) já grava as colunas a partir de `td_unidades`;
+`garantir_atributos_uc` as cria e preenche em bancos antigos (a primeira
+carga vai para o log de alterações como RECARGA) e mantém um índice por
+atributo, para que os filtros geográficos sejam um único predicado sobre
+a própria tabela de distribuição, sem consultar `td_unidades` nem fazer
+merge no pandas.
+"""
+import sqlite3
+
+import pandas as pd
+
+from hooks.exportacao_delta import garantir_log_alteracoes, registrar_recarga
+
+ATRIBUTOS_UC = ("gr", "bioma", "uf", "categoria_uc")
+
+
+def anexar_atributos_uc(df: pd.DataFrame, conn: sqlite3.Connection, coluna_cnuc: str = "CNUC") -> pd.DataFrame:
+    """Acrescenta (ou substitui) as colunas de ATRIBUTOS_UC em `df`, pelo CNUC."""
+    unidades = pd.read_sql_query(
+        f"SELECT cnuc, {', '.join(ATRIBUTOS_UC)} FROM td_unidades", conn
+    ).drop_duplicates("cnuc")
+    df = df.drop(columns=[c for c in ATRIBUTOS_UC if c in df.columns])
+    return df.merge(unidades, left_on=coluna_cnuc, right_on="cnuc", how="left").drop(columns="cnuc")
+
+
+def criar_indices_atributos_uc(conn: sqlite3.Connection) -> None:
+    for atributo in ATRIBUTOS_UC:
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_distribuicao_elegiveis_{atributo} "
+            f"ON tf_distribuicao_elegiveis ({atributo})"
+        )
+
+
+def sincronizar_atributos_uc(conn: sqlite3.Connection) -> int:
+    """
+    Copia os atributos de td_unidades para as linhas cujo valor difere
+    (só essas passam pelos triggers do log). Retorna o nº de linhas alteradas.
+    Não faz commit.
+    """
+    atribuicoes = ", ".join(
+        f"{a} = (SELECT u.{a} FROM td_unidades u WHERE u.cnuc = tf_distribuicao_elegiveis.\"CNUC\")"
+        for a in ATRIBUTOS_UC
+    )
+    diferencas = " OR ".join(
+        f"{a} IS NOT (SELECT u.{a} FROM td_unidades u WHERE u.cnuc = tf_distribuicao_elegiveis.\"CNUC\")"
+        for a in ATRIBUTOS_UC
+    )
+    return conn.execute(
+        f"UPDATE tf_distribuicao_elegiveis SET {atribuicoes} WHERE {diferencas}"
+    ).rowcount
+
+
+def garantir_atributos_uc(conn: sqlite3.Connection) -> None:
+    """Cria as colunas e índices que faltarem e as preenche. Idempotente."""
+    existentes = {col[1] for col in conn.execute("PRAGMA table_info(tf_distribuicao_elegiveis)")}
+    if not existentes:
+        return
+    novas = [a for a in ATRIBUTOS_UC if a not in existentes]
+    for atributo in novas:
+        conn.execute(f"ALTER TABLE tf_distribuicao_elegiveis ADD COLUMN {atributo} TEXT")
+    criar_indices_atributos_uc(conn)
+    if not novas:
+        sincronizar_atributos_uc(conn)
+        conn.commit()
+        return
+    # primeiro preenchimento: todas as linhas mudam. Sem o trigger de UPDATE,
+    # o log recebe uma única marca de RECARGA em vez de uma linha por registro.
+    conn.execute("DROP TRIGGER IF EXISTS trg_log_tf_distribuicao_elegiveis_update")
+    sincronizar_atributos_uc(conn)
+    conn.commit()
+    garantir_log_alteracoes(conn)
+    registrar_recarga(conn, "tf_distribuicao_elegiveis")
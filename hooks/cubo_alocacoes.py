@@ -0,0 +1,236 @@
+# ---------------------------------------------------------
+# arquivo: hooks/cubo_alocacoes.py
+# ---------------------------------------------------------
+"""
+Cubo de agregação da distribuição de tetos (`tf_distribuicao_elegiveis`).
+
+Dimensões: macroprocesso -> processo (SAMGe), GR / bioma / UF / categoria
+(de td_unidades, já desnormalizados na distribuição), demandante e
+iniciativa. Medidas: valor alocado (colunas de processo/eixo), teto total
+e saldo a distribuir.
+
+O teto e o saldo são da linha (UC x iniciativa), não de um processo: ficam
+em linhas de total com `processo` NULL, enquanto o valor alocado fica nas
+linhas por processo. Assim nenhuma medida é contada duas vezes ao somar.
+
+O cubo é atualizado por iniciativa (`atualizar_cubo_iniciativa`) sempre que
+a distribuição é salva, e as visões de roll-up / drill-down da página de
+Tetos são um GROUP BY sobre algumas centenas de linhas.
+"""
+import sqlite3
+
+import pandas as pd
+
+# dimensões na ordem de drill-down, com o rótulo exibido
+DIMENSOES = {
+    "macroprocesso": "Macroprocesso",
+    "processo": "Processo",
+    "gr": "Gerência Regional",
+    "bioma": "Bioma",
+    "uf": "UF",
+    "categoria_uc": "Categoria",
+    "demandante": "Demandante",
+    "iniciativa": "Iniciativa",
+}
+DIMENSOES_PROCESSO = {"macroprocesso", "processo"}
+SEM_INFORMACAO = "(não informado)"
+
+
+def garantir_cubo_alocacoes(conn: sqlite3.Connection) -> None:
+    """
+    Cria (se não existirem) a tabela e os índices. Na primeira execução
+    o cubo é montado a partir da distribuição atual. Idempotente.
+    """
+    existia = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tf_cubo_alocacoes'"
+    ).fetchone() is not None
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tf_cubo_alocacoes (
+            id_iniciativa INTEGER NOT NULL,
+            iniciativa TEXT,
+            demandante TEXT,
+            gr TEXT,
+            bioma TEXT,
+            uf TEXT,
+            categoria_uc TEXT,
+            macroprocesso TEXT,
+            processo TEXT,                      -- NULL nas linhas de total (teto / saldo)
+            valor_alocado REAL NOT NULL DEFAULT 0,
+            teto REAL NOT NULL DEFAULT 0,
+            saldo REAL NOT NULL DEFAULT 0,
+            registros INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_cubo_alocacoes_iniciativa
+        ON tf_cubo_alocacoes (id_iniciativa)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_cubo_alocacoes_demandante
+        ON tf_cubo_alocacoes (demandante)
+    """)
+    if not existia:
+        reconstruir_cubo_alocacoes(conn)
+    conn.commit()
+
+
+def _processos(conn: sqlite3.Connection) -> pd.DataFrame:
+    """(processo, macroprocesso) do SAMGe, com os nomes como nas colunas da distribuição."""
+    df = pd.read_sql_query("""
+        SELECT TRIM(p.nome) AS processo, m.nome AS macroprocesso
+        FROM td_samge_processos p
+        LEFT JOIN td_samge_macroprocessos m ON m.id_m = p.macroprocesso_id
+        WHERE p.nome IS NOT NULL
+    """, conn)
+    return df.drop_duplicates("processo")
+
+
+def linhas_cubo(conn: sqlite3.Connection, id_iniciativa: int | None = None) -> pd.DataFrame:
+    """
+    Agrega a distribuição (de uma iniciativa ou de todas) nas linhas do cubo:
+    uma de total por combinação de dimensões geográficas e uma por processo
+    com valor alocado diferente de zero.
+    """
+    # gr / bioma / uf / categoria_uc já estão desnormalizados na distribuição
+    query = "SELECT * FROM tf_distribuicao_elegiveis"
+    params = []
+    if id_iniciativa is not None:
+        query += " WHERE id_iniciativa = ?"
+        params.append(int(id_iniciativa))
+    df = pd.read_sql_query(query, conn, params=params)
+    colunas = list(DIMENSOES) + ["id_iniciativa", "valor_alocado", "teto", "saldo", "registros"]
+    if df.empty:
+        return pd.DataFrame(columns=colunas)
+
+    df = df.rename(columns={
+        "Nome da Proposta/Iniciativa Estruturante": "iniciativa",
+        "DEMANDANTE (diretoria)": "demandante",
+    })
+    chaves = ["id_iniciativa", "iniciativa", "demandante", "gr", "bioma", "uf", "categoria_uc"]
+    df[chaves[1:]] = df[chaves[1:]].fillna(SEM_INFORMACAO)
+
+    totais = df.assign(
+        teto=pd.to_numeric(df["TetoTotalDisponivel"], errors="coerce").fillna(0),
+        saldo=pd.to_numeric(df["A Distribuir"], errors="coerce").fillna(0),
+        registros=1,
+    ).groupby(chaves, as_index=False)[["teto", "saldo", "registros"]].sum()
+    totais = totais.assign(macroprocesso=None, processo=None, valor_alocado=0.0)
+
+    processos = _processos(conn)
+    processos = processos[processos["processo"].isin(df.columns)]
+    alocacoes = df[chaves + processos["processo"].tolist()].melt(
+        id_vars=chaves, var_name="processo", value_name="valor_alocado"
+    )
+    alocacoes["valor_alocado"] = pd.to_numeric(alocacoes["valor_alocado"], errors="coerce").fillna(0)
+    alocacoes = (
+        alocacoes[alocacoes["valor_alocado"] != 0]
+        .groupby(chaves + ["processo"], as_index=False)["valor_alocado"].sum()
+        .merge(processos, on="processo", how="left")
+        .assign(teto=0.0, saldo=0.0, registros=0)
+    )
+    alocacoes["macroprocesso"] = alocacoes["macroprocesso"].fillna(SEM_INFORMACAO)
+    return pd.concat([totais, alocacoes], ignore_index=True)[colunas]
+
+
+def _inserir(conn: sqlite3.Connection, linhas: pd.DataFrame) -> None:
+    colunas = list(linhas.columns)
+    conn.executemany(
+        f"INSERT INTO tf_cubo_alocacoes ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+        linhas.astype(object).where(linhas.notna(), None).itertuples(index=False, name=None)
+    )
+
+
+def atualizar_cubo_iniciativa(conn: sqlite3.Connection, id_iniciativa: int) -> None:
+    """
+    Refaz as células da iniciativa a partir da distribuição salva.
+    Não faz commit: deve rodar na transação do salvamento.
+    """
+    conn.execute("DELETE FROM tf_cubo_alocacoes WHERE id_iniciativa = ?", (int(id_iniciativa),))
+    _inserir(conn, linhas_cubo(conn, id_iniciativa))
+
+
+def reconstruir_cubo_alocacoes(conn: sqlite3.Connection) -> None:
+    """Remonta o cubo inteiro a partir de tf_distribuicao_elegiveis."""
+    conn.execute("DELETE FROM tf_cubo_alocacoes")
+    _inserir(conn, linhas_cubo(conn))
+
+
+def consultar_cubo(
+    conn: sqlite3.Connection,
+    dimensoes: list[str],
+    filtros: dict | None = None,
+    demandante: str | None = None,
+) -> pd.DataFrame:
+    """
+    Roll-up do cubo pelas `dimensoes` (chaves de DIMENSOES), restrito aos
+    `filtros` ({dimensão: valor}) — o drill-down é acrescentar a próxima
+    dimensão e fixar a anterior no filtro.
+
+    Teto, saldo e registros só aparecem quando nenhuma dimensão de processo
+    está no agrupamento (não são atribuíveis a um processo).
+    """
+    invalidas = [d for d in list(dimensoes) + list(filtros or {}) if d not in DIMENSOES]
+    if invalidas:
+        raise ValueError(f"Dimensões inválidas: {invalidas}")
+
+    por_processo = bool(DIMENSOES_PROCESSO & (set(dimensoes) | set(filtros or {})))
+    medidas = ["SUM(valor_alocado) AS valor_alocado"]
+    if not por_processo:
+        medidas += ["SUM(teto) AS teto", "SUM(saldo) AS saldo", "SUM(registros) AS registros"]
+
+    filtros_sql, params = [], []
+    if por_processo:
+        filtros_sql.append("processo IS NOT NULL")
+    for dimensao, valor in (filtros or {}).items():
+        filtros_sql.append(f"{dimensao} = ?")
+        params.append(valor)
+    if demandante:
+        filtros_sql.append("UPPER(demandante) = UPPER(?)")
+        params.append(demandante)
+
+    query = f"SELECT {', '.join(list(dimensoes) + medidas)} FROM tf_cubo_alocacoes"
+    if filtros_sql:
+        query += " WHERE " + " AND ".join(filtros_sql)
+    if dimensoes:
+        query += f" GROUP BY {', '.join(dimensoes)} ORDER BY valor_alocado DESC"
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def valores_dimensao(conn: sqlite3.Connection, dimensao: str, demandante: str | None = None) -> list[str]:
+    """Valores distintos de uma dimensão no cubo (para os seletores de drill-down)."""
+    if dimensao not in DIMENSOES:
+        raise ValueError(f"Dimensão inválida: {dimensao}")
+    query = f"SELECT DISTINCT {dimensao} FROM tf_cubo_alocacoes WHERE {dimensao} IS NOT NULL"
+    params = []
+    if demandante:
+        query += " AND UPPER(demandante) = UPPER(?)"
+        params.append(demandante)
+    return [v for (v,) in conn.execute(query + f" ORDER BY {dimensao}", params)]
+
+
+def alocacoes_por_processo(conn: sqlite3.Connection) -> pd.DataFrame:
+    """
+    Valor alocado por (processo, UC, iniciativa) de toda a distribuição, em um
+    único melt + groupby. Ficam os processos com soma positiva (na ordem do
+    SAMGe) e, dentro deles, as linhas com valor positivo.
+    """
+    chaves = ["Unidade de Conservação", "Nome da Proposta/Iniciativa Estruturante"]
+    colunas = ["processo"] + chaves + ["valor_alocado"]
+    df = pd.read_sql_query("SELECT * FROM tf_distribuicao_elegiveis", conn)
+    processos = [p for p in _processos(conn)["processo"] if p in df.columns]
+    if df.empty or not processos or any(c not in df.columns for c in chaves):
+        return pd.DataFrame(columns=colunas)
+
+    longo = df[chaves + processos].melt(id_vars=chaves, var_name="processo", value_name="valor_alocado")
+    longo["valor_alocado"] = pd.to_numeric(longo["valor_alocado"], errors="coerce").fillna(0)
+    somas = longo.groupby("processo")["valor_alocado"].sum()
+
+    agrupado = longo.groupby(["processo"] + chaves, as_index=False)["valor_alocado"].sum()
+    agrupado = agrupado[
+        (agrupado["valor_alocado"] > 0)
+        & agrupado["processo"].isin(somas.index[somas > 0])
+    ]
+    ordem = {processo: i for i, processo in enumerate(processos)}
+    # o groupby já ordena por UC e iniciativa; a ordenação estável só reposiciona os processos
+    agrupado = agrupado.sort_values("processo", key=lambda s: s.map(ordem), kind="stable")
+    return agrupado.reset_index(drop=True)[colunas]
@@ -0,0 +1,43 @@
+# ---------------------------------------------------------
+# arquivo: hooks/dados_base.py
+# ---------------------------------------------------------
+"""
+Carga tipada de `td_dados_base_iniciativas`.
+
+As colunas de classificação (demandante, UC, ação, GR, UF, bioma,
+categoria) viram `category` e as monetárias `float64` uma única vez, na
+carga. O DataFrame resultante é compartilhado entre as sessões (via
+`st.cache_resource` na página) e deve ser tratado como somente leitura:
+filtros produzem cópias e nenhuma coluna é alterada no lugar.
+"""
+import sqlite3
+
+import pandas as pd
+
+COLUNAS_CATEGORICAS = [
+    "DEMANDANTE",
+    "Unidade de Conservação",
+    "AÇÃO DE APLICAÇÃO",
+    "GR",
+    "UF",
+    "BIOMA",
+    "CATEGORIA UC",
+]
+COLUNAS_MONETARIAS = [
+    "VALOR TOTAL ALOCADO",
+    "Valor da Iniciativa (R$)",
+    "Valor Total da Iniciativa",
+    "SALDO",
+]
+
+
+def carregar_dados_base(conn: sqlite3.Connection) -> pd.DataFrame:
+    """`td_dados_base_iniciativas` com categorias e valores em float64."""
+    df = pd.read_sql_query("SELECT * FROM td_dados_base_iniciativas", conn)
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype("category")
+    for coluna in COLUNAS_MONETARIAS:
+        if coluna in df.columns:
+            df[coluna] = pd.to_numeric(df[coluna], errors="coerce").astype("float64")
+    return df
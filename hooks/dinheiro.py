@@ -0,0 +1,78 @@
+# ---------------------------------------------------------
+# arquivo: hooks/dinheiro.py
+# ---------------------------------------------------------
+"""
+Valores monetários em centavos inteiros (int64).
+
+Somas, saldos e comparações são feitos em centavos, sem acumular erro de
+ponto flutuante: `para_centavos` arredonda uma única vez, na entrada, e
+`de_centavos` devolve reais com exatamente duas casas para gravar nas
+colunas REAL existentes (ou para exibir). `formatar_brl` formata um
+vetor inteiro de valores no padrão brasileiro em uma passada, sem
+`.apply` nem as trocas encadeadas de "," e "." em cada string.
+"""
+import numpy as np
+import pandas as pd
+
+CENTAVOS_POR_REAL = 100
+_SEPARADORES_BR = str.maketrans("_.", ".,")
+
+
+def para_centavos(valores) -> np.ndarray:
+    """Reais (escalar, lista, Series, texto numérico) -> centavos int64; vazio / inválido -> 0."""
+    reais = pd.to_numeric(pd.Series(np.atleast_1d(np.asarray(valores, dtype=object))), errors="coerce")
+    return np.rint(reais.fillna(0).to_numpy(dtype="float64") * CENTAVOS_POR_REAL).astype("int64")
+
+
+def de_centavos(centavos) -> np.ndarray:
+    """Centavos -> reais em float64 (duas casas exatas na representação decimal)."""
+    return np.asarray(centavos, dtype="int64") / CENTAVOS_POR_REAL
+
+
+def arredondar_reais(valores) -> np.ndarray:
+    """Reais normalizados para o centavo mais próximo."""
+    return de_centavos(para_centavos(valores))
+
+
+def arredondar_real(valor) -> float:
+    """`arredondar_reais` para um único valor (vazio / inválido -> 0.0)."""
+    return float(arredondar_reais(valor)[0])
+
+
+def somar_reais(valores) -> float:
+    """Soma exata (em centavos) de valores em reais."""
+    return float(para_centavos(valores).sum()) / CENTAVOS_POR_REAL
+
+
+def saldo_centavos(teto, alocacoes) -> np.ndarray:
+    """
+    teto - soma das alocações, linha a linha, em centavos. `alocacoes` é um
+    DataFrame (uma coluna por eixo) ou um array 2D em reais.
+    """
+    teto = para_centavos(teto)
+    alocacoes = np.asarray(alocacoes, dtype=object)
+    if alocacoes.size == 0:
+        return teto
+    em_centavos = para_centavos(alocacoes.ravel()).reshape(alocacoes.shape)
+    return teto - em_centavos.sum(axis=1)
+
+
+def formatar_brl(valores, prefixo: str = "R$ ") -> np.ndarray:
+    """
+    Vetor de textos no padrão brasileiro ("R$ 1.234,56"; negativos como
+    "R$ -1.234,56"). Valores ausentes viram "".
+    """
+    reais = pd.to_numeric(pd.Series(np.atleast_1d(np.asarray(valores, dtype=object))), errors="coerce")
+    ausentes = reais.isna().to_numpy()
+    # arredondado no centavo antes de formatar: o texto é sempre o do valor gravado
+    reais = de_centavos(np.rint(reais.fillna(0).to_numpy(dtype="float64") * CENTAVOS_POR_REAL).astype("int64"))
+    # "_" como separador de milhar do format(); uma única tradução troca "_" e "." por "." e ","
+    formato = (prefixo.replace("{", "{{").replace("}", "}}") + "{:_.2f}").format
+    texto = np.array([formato(v).translate(_SEPARADORES_BR) for v in reais.tolist()], dtype=object)
+    texto[ausentes] = ""
+    return texto
+
+
+def formatar_real(valor, prefixo: str = "R$ ") -> str:
+    """`formatar_brl` para um único valor."""
+    return formatar_brl([valor], prefixo)[0]
@@ -0,0 +1,154 @@
+# ---------------------------------------------------------
+# arquivo: hooks/excel_cadastros.py
+# ---------------------------------------------------------
+"""
+Excel com várias abas da tela "Visualização de Cadastros".
+
+Cada coluna JSON é decodificada de uma vez como Series e achatada com
+`explode` / `json_normalize`; os nomes de ações e insumos entram por
+`merge` com as dimensões (carregadas e cacheadas pela página). A planilha
+é gravada em modo write-only do openpyxl, linha a linha, sem montar a
+estrutura de células em memória.
+"""
+import json
+from io import BytesIO
+
+import pandas as pd
+from openpyxl import Workbook
+
+COLUNAS_INICIATIVAS = [
+    "id_iniciativa", "nome_iniciativa", "usuario", "objetivo_geral",
+    "introducao", "justificativa", "metodologia", "data_hora"
+]
+COLUNAS_EIXOS = [
+    "id_iniciativa", "nome_iniciativa", "nome_eixo", "acao_id", "acao_nome", "insumo_id", "insumo_nome"
+]
+COLUNAS_DISTRIBUICAO = ["id_iniciativa", "nome_iniciativa", "Unidade", "Acao", "Valor Alocado"]
+COLUNAS_FORMAS = ["id_iniciativa", "nome_iniciativa", "Forma de Contratação", "Selecionado"]
+
+
+def _decodificar(serie: pd.Series, tipo: type) -> pd.Series:
+    """json.loads em toda a Series; valores inválidos ou de outro tipo viram None."""
+    def carregar(texto):
+        try:
+            dados = json.loads(texto)
+        except Exception:
+            return None
+        return dados if isinstance(dados, tipo) else None
+    return serie.map(carregar)
+
+
+def _explodir(df: pd.DataFrame, coluna: str, tipo: type) -> pd.DataFrame:
+    """(id_iniciativa, nome_iniciativa, item) para cada item da lista JSON da coluna."""
+    base = df[["id_iniciativa", "nome_iniciativa"]].assign(item=_decodificar(df[coluna], tipo))
+    return base.explode("item").dropna(subset=["item"]).reset_index(drop=True)
+
+
+def _normalizar(itens: pd.DataFrame, padroes: dict) -> pd.DataFrame:
+    """json_normalize dos itens (dicts), com as colunas e valores padrão pedidos."""
+    itens = itens[itens["item"].map(lambda item: isinstance(item, dict))].reset_index(drop=True)
+    normalizado = pd.json_normalize(itens["item"].tolist()) if len(itens) else pd.DataFrame()
+    for coluna, padrao in padroes.items():
+        if coluna not in normalizado.columns:
+            normalizado[coluna] = padrao
+        else:
+            normalizado[coluna] = normalizado[coluna].where(normalizado[coluna].notna(), padrao)
+    return pd.concat([itens[["id_iniciativa", "nome_iniciativa"]], normalizado[list(padroes)]], axis=1)
+
+
+def tabela_eixos_tematicos(df: pd.DataFrame, df_acoes: pd.DataFrame, df_insumos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Uma linha por (iniciativa, eixo, ação, insumo). `df_acoes` (id_ac, nome) e
+    `df_insumos` (id, descricao_insumo) são as dimensões para os nomes.
+    """
+    eixos = _explodir(df, "eixos_tematicos", list)
+    eixos = eixos[eixos["item"].map(lambda item: isinstance(item, dict))]
+    if eixos.empty:
+        return pd.DataFrame(columns=COLUNAS_EIXOS)
+
+    # eixo -> [(acao_id, insumos)]; eixos sem ação mantêm uma linha vazia
+    eixos = eixos.assign(
+        nome_eixo=eixos["item"].map(lambda e: e.get("nome_eixo", "")),
+        acao=eixos["item"].map(
+            lambda e: [(str(k), (v or {}).get("insumos") or [None]) for k, v in (e.get("acoes_manejo") or {}).items()]
+            or [(None, [None])]
+        ),
+    ).explode("acao")
+    eixos["acao_id"] = eixos["acao"].str[0]
+    eixos["insumo_id"] = eixos["acao"].str[1]
+    eixos = eixos.explode("insumo_id")
+
+    acoes = df_acoes.assign(acao_id=df_acoes["id_ac"].astype(str))[["acao_id", "nome"]]
+    insumos = df_insumos.assign(chave_insumo=df_insumos["id"].astype(str))[["chave_insumo", "descricao_insumo"]]
+    eixos = (
+        eixos.assign(chave_insumo=eixos["insumo_id"].map(lambda i: None if i is None else str(i)))
+        .merge(acoes, on="acao_id", how="left")
+        .merge(insumos, on="chave_insumo", how="left")
+    )
+
+    tem_acao = eixos["acao_id"].notna()
+    tem_insumo = eixos["insumo_id"].notna()
+    eixos["acao_nome"] = eixos["nome"].where(eixos["nome"].notna(), "Ação " + eixos["acao_id"].astype(str)).where(tem_acao, None)
+    eixos["insumo_nome"] = eixos["descricao_insumo"].where(
+        eixos["descricao_insumo"].notna(), eixos["chave_insumo"]
+    ).where(tem_insumo, None)
+    return eixos[COLUNAS_EIXOS].reset_index(drop=True)
+
+
+def tabela_distribuicao_ucs(df: pd.DataFrame) -> pd.DataFrame:
+    """Uma linha por registro de `distribuicao_ucs`: Unidade, Acao, Valor Alocado."""
+    itens = _explodir(df, "distribuicao_ucs", list)
+    if itens.empty:
+        return pd.DataFrame(columns=COLUNAS_DISTRIBUICAO)
+    return _normalizar(itens, {"Unidade": "", "Acao": "", "Valor Alocado": 0})
+
+
+def tabela_formas_contratacao(df: pd.DataFrame) -> pd.DataFrame:
+    """Uma linha por forma de contratação listada em `tabela_formas`."""
+    formas = df[["id_iniciativa", "nome_iniciativa"]].assign(
+        item=_decodificar(df["formas_contratacao"], dict).map(
+            lambda d: d.get("tabela_formas") if d else None
+        )
+    ).explode("item").dropna(subset=["item"]).reset_index(drop=True)
+    if formas.empty:
+        return pd.DataFrame(columns=COLUNAS_FORMAS)
+    return _normalizar(formas, {"Forma de Contratação": "Sem descrição", "Selecionado": False})
+
+
+def escrever_excel_streaming(abas: dict[str, pd.DataFrame], destino=None) -> bytes | None:
+    """
+    Grava as abas ({nome: DataFrame}) em xlsx com o openpyxl em modo
+    write-only. Sem `destino`, devolve os bytes do arquivo.
+    """
+    wb = Workbook(write_only=True)
+    for nome_aba, df in abas.items():
+        ws = wb.create_sheet(title=nome_aba[:31])
+        ws.append([str(c) for c in df.columns])
+        # NaN/NaT -> célula vazia; tipos numpy -> tipos nativos
+        valores = df.astype(object).where(df.notna(), None)
+        for linha in valores.itertuples(index=False, name=None):
+            ws.append([v.item() if hasattr(v, "item") else v for v in linha])
+
+    if destino is not None:
+        wb.save(destino)
+        return None
+    saida = BytesIO()
+    wb.save(saida)
+    return saida.getvalue()
+
+
+def gerar_excel_por_abas(df: pd.DataFrame, df_acoes: pd.DataFrame, df_insumos: pd.DataFrame) -> bytes:
+    """
+    Converte as regras (linhas completas) em várias abas:
+      1) Iniciativas (dados principais)
+      2) EixosTematicos
+      3) DistribuicaoUCs
+      4) FormasContratacao
+    Retorna os bytes do arquivo Excel.
+    """
+    return escrever_excel_streaming({
+        "Iniciativas": df[COLUNAS_INICIATIVAS],
+        "EixosTematicos": tabela_eixos_tematicos(df, df_acoes, df_insumos),
+        "DistribuicaoUCs": tabela_distribuicao_ucs(df),
+        "FormasContratacao": tabela_formas_contratacao(df),
+    })
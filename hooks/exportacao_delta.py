@@ -0,0 +1,278 @@
+# ---------------------------------------------------------
+# arquivo: hooks/exportacao_delta.py
+# ---------------------------------------------------------
+"""
+Exportação incremental (delta) de regras, distribuição e insumos.
+
+Toda inclusão, alteração ou exclusão nessas tabelas é registrada por
+triggers em `tf_log_alteracoes`. O `id` do log funciona como versão
+(watermark): o consumidor guarda a `proxima_versao` devolvida por
+`exportar_delta` e a envia na próxima sincronização, recebendo apenas
+o que mudou desde então.
+
+Uso em linha de comando (sem Streamlit):
+    python -m hooks.exportacao_delta --desde-versao 120 --saida exportacoes/
+    python -m hooks.exportacao_delta --desde-data "2025-03-01 00:00:00"
+"""
+import argparse
+import json
+import os
+import sqlite3
+
+import pandas as pd
+
+DB_PATH = "database/app_data.db"
+
+# tabela -> coluna chave usada no log
+TABELAS_DELTA = {
+    "tf_cadastro_regras_negocio": "id",
+    "tf_distribuicao_elegiveis": "id",
+    "td_insumos": "id",
+}
+
+# tabelas que possuem a coluna id_iniciativa (registrada no log)
+TABELAS_COM_INICIATIVA = {"tf_cadastro_regras_negocio", "tf_distribuicao_elegiveis"}
+
+# operação registrada quando uma tabela é recriada por inteiro (init_db)
+OPERACAO_RECARGA = "RECARGA"
+
+
+def garantir_log_alteracoes(conn: sqlite3.Connection) -> None:
+    """
+    Cria (se não existirem) a tabela de log, o índice e os triggers.
+    Idempotente: pode ser chamada a cada inicialização. Tabelas recriadas
+    com `to_sql(if_exists="replace")` perdem os triggers, por isso a
+    função deve ser chamada novamente após a recarga.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tf_log_alteracoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,   -- versão (watermark)
+            tabela TEXT NOT NULL,
+            chave INTEGER,                          -- id da linha alterada (NULL em RECARGA)
+            id_iniciativa INTEGER,
+            operacao TEXT NOT NULL,                 -- INSERT | UPDATE | DELETE | RECARGA
+            data_hora TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%S', 'now'))  -- UTC
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_log_alteracoes_tabela
+        ON tf_log_alteracoes (tabela, id)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_log_alteracoes_data_hora
+        ON tf_log_alteracoes (data_hora)
+    """)
+
+    existentes = {
+        row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
+    for tabela, chave in TABELAS_DELTA.items():
+        if tabela not in existentes:
+            continue
+        for operacao, ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            id_iniciativa = f"{ref}.id_iniciativa" if tabela in TABELAS_COM_INICIATIVA else "NULL"
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_log_{tabela}_{operacao.lower()}
+                AFTER {operacao} ON {tabela}
+                BEGIN
+                    INSERT INTO tf_log_alteracoes (tabela, chave, id_iniciativa, operacao)
+                    VALUES ('{tabela}', {ref}."{chave}", {id_iniciativa}, '{operacao}');
+                END
+            """)
+    conn.commit()
+
+
+def exigir_log_alteracoes(conn: sqlite3.Connection) -> None:
+    """
+    Só confere que o log existe (não cria nada, serve para conexões
+    somente leitura). Quem cria é `garantir_log_alteracoes`, chamada por
+    `init_db.preparar_banco` na inicialização.
+    """
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tf_log_alteracoes'"
+    ).fetchone()
+    if existe is None:
+        raise RuntimeError(
+            "O banco não tem o log de alterações (tf_log_alteracoes); "
+            "inicialize-o pelo app ou com init_db antes da exportação incremental."
+        )
+
+
+def registrar_recarga(conn: sqlite3.Connection, tabela: str) -> None:
+    """Marca no log que a tabela foi recriada: o próximo delta a envia inteira."""
+    conn.execute(
+        "INSERT INTO tf_log_alteracoes (tabela, chave, operacao) VALUES (?, NULL, ?)",
+        (tabela, OPERACAO_RECARGA)
+    )
+    conn.commit()
+
+
+def versao_atual(conn: sqlite3.Connection) -> int:
+    """Maior versão registrada no log (0 se vazio)."""
+    row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM tf_log_alteracoes").fetchone()
+    return int(row[0])
+
+
+def versao_tabela(conn: sqlite3.Connection, tabela: str) -> int:
+    """Última versão em que a tabela mudou (útil como chave de cache)."""
+    row = conn.execute(
+        "SELECT COALESCE(MAX(id), 0) FROM tf_log_alteracoes WHERE tabela = ?",
+        (tabela,)
+    ).fetchone()
+    return int(row[0])
+
+
+def versao_por_data(conn: sqlite3.Connection, data_hora: str) -> int:
+    """
+    Converte um watermark de data/hora (UTC, 'AAAA-MM-DD HH:MM:SS')
+    na versão equivalente: tudo registrado depois dessa data fica no delta.
+    """
+    exigir_log_alteracoes(conn)
+    row = conn.execute(
+        "SELECT COALESCE(MAX(id), 0) FROM tf_log_alteracoes WHERE data_hora <= ?",
+        (data_hora,)
+    ).fetchone()
+    return int(row[0])
+
+
+def _ler_linhas(conn: sqlite3.Connection, tabela: str, chave: str, chaves: list) -> pd.DataFrame:
+    """Lê as linhas atuais das chaves informadas, em lotes (limite de parâmetros do SQLite)."""
+    partes = []
+    for i in range(0, len(chaves), 500):
+        lote = chaves[i:i + 500]
+        marcadores = ",".join("?" * len(lote))
+        partes.append(pd.read_sql_query(
+            f'SELECT * FROM {tabela} WHERE "{chave}" IN ({marcadores})', conn, params=lote
+        ))
+    if not partes:
+        return pd.read_sql_query(f"SELECT * FROM {tabela} WHERE 0", conn)
+    return pd.concat(partes, ignore_index=True)
+
+
+def exportar_delta(
+    conn: sqlite3.Connection,
+    desde_versao: int = 0,
+    tabelas: list[str] | None = None
+) -> dict:
+    """
+    Retorna o que mudou depois de `desde_versao`:
+        {
+            "desde_versao": int,
+            "proxima_versao": int,   # watermark para a próxima chamada
+            "tabelas": {tabela: DataFrame com as linhas incluídas/alteradas},
+            "removidos": {tabela: [chaves excluídas]},
+            "completas": [tabelas enviadas inteiras (recarga ou primeira carga)],
+        }
+    Com `desde_versao=0` todas as tabelas são enviadas por inteiro (carga inicial).
+    """
+    exigir_log_alteracoes(conn)
+    tabelas = tabelas or list(TABELAS_DELTA)
+
+    # uma única transação de leitura: log e tabelas vistos no mesmo instante
+    conn.execute("BEGIN")
+    try:
+        return _exportar_delta(conn, desde_versao, tabelas)
+    finally:
+        conn.commit()
+
+
+def _exportar_delta(conn: sqlite3.Connection, desde_versao: int, tabelas: list[str]) -> dict:
+    """Corpo de `exportar_delta`, executado dentro da transação de leitura."""
+    proxima_versao = versao_atual(conn)
+
+    resultado = {
+        "desde_versao": desde_versao,
+        "proxima_versao": proxima_versao,
+        "tabelas": {},
+        "removidos": {},
+        "completas": [],
+    }
+
+    for tabela in tabelas:
+        chave = TABELAS_DELTA[tabela]
+        if desde_versao <= 0:
+            recarga = True
+        else:
+            recarga = conn.execute(
+                """
+                SELECT 1 FROM tf_log_alteracoes
+                WHERE tabela = ? AND id > ? AND id <= ? AND operacao = ?
+                LIMIT 1
+                """,
+                (tabela, desde_versao, proxima_versao, OPERACAO_RECARGA)
+            ).fetchone() is not None
+
+        if recarga:
+            resultado["tabelas"][tabela] = pd.read_sql_query(f"SELECT * FROM {tabela}", conn)
+            resultado["removidos"][tabela] = []
+            resultado["completas"].append(tabela)
+            continue
+
+        # última operação de cada chave no intervalo (o índice (tabela, id) cobre a busca)
+        alteracoes = conn.execute(
+            """
+            SELECT chave, operacao
+            FROM tf_log_alteracoes
+            WHERE id IN (
+                SELECT MAX(id) FROM tf_log_alteracoes
+                WHERE tabela = ? AND id > ? AND id <= ? AND chave IS NOT NULL
+                GROUP BY chave
+            )
+            """,
+            (tabela, desde_versao, proxima_versao)
+        ).fetchall()
+
+        alteradas = [c for c, op in alteracoes if op != "DELETE"]
+        removidas = [c for c, op in alteracoes if op == "DELETE"]
+        resultado["tabelas"][tabela] = _ler_linhas(conn, tabela, chave, alteradas)
+        resultado["removidos"][tabela] = removidas
+
+    return resultado
+
+
+def delta_para_json(delta: dict) -> str:
+    """Serializa o resultado de `exportar_delta` para JSON."""
+    return json.dumps({
+        "desde_versao": delta["desde_versao"],
+        "proxima_versao": delta["proxima_versao"],
+        "completas": delta["completas"],
+        "removidos": delta["removidos"],
+        "tabelas": {
+            tabela: json.loads(df.to_json(orient="records", date_format="iso", force_ascii=False))
+            for tabela, df in delta["tabelas"].items()
+        },
+    }, ensure_ascii=False)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Exportação incremental de regras, distribuição e insumos.")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--desde-versao", type=int, default=0, help="Watermark (versão) da última sincronização.")
+    grupo.add_argument("--desde-data", help="Data/hora UTC 'AAAA-MM-DD HH:MM:SS' da última sincronização.")
+    parser.add_argument("--saida", default=".", help="Diretório onde o arquivo será gravado.")
+    parser.add_argument("--db", default=DB_PATH, help="Caminho do banco SQLite.")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        desde = versao_por_data(conn, args.desde_data) if args.desde_data else args.desde_versao
+        delta = exportar_delta(conn, desde_versao=desde)
+    except RuntimeError as e:
+        raise SystemExit(f"❌ {e}")
+    finally:
+        conn.close()
+
+    os.makedirs(args.saida, exist_ok=True)
+    caminho = os.path.join(args.saida, f"delta_{delta['desde_versao']}_{delta['proxima_versao']}.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write(delta_para_json(delta))
+
+    for tabela, df in delta["tabelas"].items():
+        print(f"{tabela}: {len(df)} alteradas, {len(delta['removidos'][tabela])} removidas")
+    print(f"✅ Delta gravado em {caminho}")
+    print(f"proxima_versao={delta['proxima_versao']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,598 @@
+# ---------------------------------------------------------
+# arquivo: hooks/exportacoes.py
+# ---------------------------------------------------------
+"""
+Lógica de exportação compartilhada entre a página de Exportações e a
+linha de comando (sem Streamlit), para extrações agendadas em cron.
+
+Uso:
+    python -m hooks.exportacoes --saida exportacoes/ --formato csv
+    python -m hooks.exportacoes --tabelas regras insumos --formato xlsx --workers 4
+    python -m hooks.exportacoes --since 120 --formato json
+    python -m hooks.exportacoes --formato ndjson --gzip
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from hooks.exportacao_delta import exportar_delta, versao_por_data, delta_para_json
+
+DB_PATH = "database/app_data.db"
+
+# nome da exportação -> tabela no banco (None = calculada a partir das regras)
+# a ordem é a das abas da planilha completa
+TABELAS_EXPORTACAO = {
+    "tetos_completo": "tf_distribuicao_elegiveis",
+    "regras": "tf_cadastro_regras_negocio",
+    "regras_negocio_processada": None,
+    "dados_base_iniciativas": "td_dados_base_iniciativas",
+    "dados_resumos_sei": "td_dados_resumos_sei",
+    "demandantes": "td_demandantes",
+    "iniciativas": "td_iniciativas",
+    "acoes_aplicacao": "td_acoes_aplicacao",
+    "insumos": "td_insumos",
+    "acoes": "td_samge_acoes_manejo",
+    "processos": "td_samge_processos",
+    "macroprocessos": "td_samge_macroprocessos",
+    "atividades": "td_samge_atividades",
+    "unidades": "td_unidades",
+    "indice_uc": "tf_indice_uc",
+    "cubo_alocacoes": "tf_cubo_alocacoes",
+    "tetos_exercicio": "tf_distribuicao_tetos",
+}
+
+# linhas lidas do cursor por vez no NDJSON
+TAMANHO_LOTE = 1000
+
+FORMATOS = {
+    "csv": (".csv", "text/csv"),
+    "json": (".json", "application/json"),
+    "ndjson": (".ndjson", "application/x-ndjson"),
+    "xlsx": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def ativar_wal(conn: sqlite3.Connection) -> str:
+    """
+    Coloca o banco em modo WAL (persistente no arquivo): leitores não
+    bloqueiam o escritor e cada transação de leitura enxerga um snapshot fixo.
+    Retorna o modo resultante.
+    """
+    return conn.execute("PRAGMA journal_mode=WAL").fetchone()[0].lower()
+
+
+def exigir_wal(conn: sqlite3.Connection) -> None:
+    """
+    `ativar_wal` para leituras longas (exportações, linha de comando):
+    fora do modo WAL elas bloqueariam as gravações do app, então a
+    exportação falha com uma mensagem clara em vez de seguir.
+    """
+    try:
+        modo = ativar_wal(conn)
+        situacao = f"está em modo '{modo}'"
+    except sqlite3.OperationalError as e:
+        modo, situacao = None, f"está bloqueado ({e})"
+    if modo != "wal":
+        raise RuntimeError(
+            f"O banco {situacao} e não pôde passar para WAL (outra conexão o está usando?). "
+            "Feche o app ou execute o init_db e tente a exportação novamente."
+        )
+
+
+def abrir_leitura(db_path: str = DB_PATH) -> sqlite3.Connection:
+    """Conexão somente leitura, com controle manual de transação, usável em outra thread."""
+    return sqlite3.connect(
+        f"file:{db_path}?mode=ro",
+        uri=True,
+        check_same_thread=False,
+        isolation_level=None
+    )
+
+
+class SnapshotLeitura:
+    """
+    Conexões somente leitura que enxergam exatamente o mesmo estado do banco.
+
+    No modo WAL a transação de leitura fixa o snapshot na primeira consulta.
+    Para que todas as conexões fixem o mesmo instante, uma conexão
+    coordenadora segura o lock de escrita (BEGIN IMMEDIATE) enquanto as
+    leituras são abertas; em seguida o lock é liberado e as gravações do
+    app seguem normalmente, sem alterar o que o snapshot enxerga.
+
+    Uso:
+        with SnapshotLeitura(DB_PATH, n_conexoes=4) as snapshot:
+            df = snapshot.executar(ler_tabela, "regras")
+    """
+
+    def __init__(self, db_path: str = DB_PATH, n_conexoes: int = 1):
+        self.db_path = db_path
+        self.n_conexoes = max(1, n_conexoes)
+        self.conexoes: list[sqlite3.Connection] = []
+        self._livres: queue.Queue = queue.Queue()
+
+    def __enter__(self) -> "SnapshotLeitura":
+        coordenador = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+        try:
+            # o snapshot comum e a leitura sem bloquear o app dependem do WAL
+            exigir_wal(coordenador)
+            coordenador.execute("BEGIN IMMEDIATE")
+            for _ in range(self.n_conexoes):
+                conn = abrir_leitura(self.db_path)
+                conn.execute("BEGIN")
+                conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                self.conexoes.append(conn)
+                self._livres.put(conn)
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        finally:
+            if coordenador.in_transaction:
+                coordenador.execute("ROLLBACK")
+            coordenador.close()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for conn in self.conexoes:
+            try:
+                conn.execute("ROLLBACK")
+            finally:
+                conn.close()
+        self.conexoes = []
+
+    def executar(self, funcao, *args):
+        """Executa `funcao(conn, *args)` com uma conexão livre do snapshot."""
+        conn = self._livres.get()
+        try:
+            return funcao(conn, *args)
+        finally:
+            self._livres.put(conn)
+
+
+def regras_mais_recentes(df_regras: pd.DataFrame) -> pd.DataFrame:
+    """Somente a versão mais recente (maior `id`) de cada iniciativa."""
+    if df_regras.empty:
+        return df_regras
+    return df_regras.sort_values("id").groupby("id_iniciativa").tail(1)
+
+
+def processar_regras(df_regras, df_iniciativas, df_acoes, df_insumos) -> pd.DataFrame:
+    """
+    Expande a coluna `regra` (JSON) da versão mais recente de cada
+    iniciativa em uma linha por objetivo específico x eixo temático x
+    ação x insumo. Página de Exportações e linha de comando usam esta
+    mesma função.
+    """
+    df_regras = regras_mais_recentes(df_regras)
+    processed_data = []
+    for _, row in df_regras.iterrows():
+        regra = json.loads(row['regra'])
+        objetivo_geral = regra.get("objetivo_geral", "")
+        objetivos_especificos = regra.get("objetivos_especificos", [])
+        eixos_tematicos = regra.get("eixos_tematicos", [])
+        acoes = regra.get("acoes", [])
+        insumos = regra.get("insumos", [])
+
+        nome_iniciativa = ""
+        temp_iniciativa = df_iniciativas[df_iniciativas['id_iniciativa'] == row['id_iniciativa']]
+        if not temp_iniciativa.empty:
+            nome_iniciativa = temp_iniciativa['nome_iniciativa'].values[0]
+
+        for objetivo in objetivos_especificos:
+            for eixo in eixos_tematicos:
+                for acao in acoes:
+                    temp_acao = df_acoes[df_acoes['id_ac'] == int(acao)]
+                    acao_nome = temp_acao['nome'].values[0] if not temp_acao.empty else acao
+                    for insumo in insumos:
+                        insumo_data = df_insumos[df_insumos['id'] == int(insumo)]
+                        if not insumo_data.empty:
+                            insumo_nome = insumo_data['descricao_insumo'].values[0]
+                            elemento_despesa = insumo_data['elemento_despesa'].values[0]
+                            especificacao_padrao = insumo_data['especificacao_padrao'].values[0]
+                            preco_referencia = insumo_data['preco_referencia'].values[0]
+                        else:
+                            insumo_nome = insumo
+                            elemento_despesa = ""
+                            especificacao_padrao = ""
+                            preco_referencia = ""
+
+                        processed_data.append([
+                            row['id_iniciativa'],
+                            nome_iniciativa,
+                            objetivo_geral,
+                            objetivo,
+                            eixo['id_eixo'],
+                            eixo['nome_eixo'],
+                            acao,
+                            acao_nome,
+                            insumo,
+                            insumo_nome,
+                            elemento_despesa,
+                            especificacao_padrao,
+                            preco_referencia
+                        ])
+
+    return pd.DataFrame(processed_data, columns=[
+        'id_iniciativa',
+        'nome_iniciativa',
+        'objetivo_geral',
+        'objetivo_especifico',
+        'id_eixo_tematico',
+        'eixo_tematico',
+        'id_acao',
+        'acao',
+        'id_insumo',
+        'insumo',
+        'elemento_despesa',
+        'especificacao_padrao',
+        'preco_referencia'
+    ])
+
+
+def ler_tabela(conn: sqlite3.Connection, nome: str, df_regras: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Lê uma tabela da exportação pelo nome. Para `regras_negocio_processada`,
+    `df_regras` permite expandir apenas um subconjunto das regras (delta).
+    """
+    tabela = TABELAS_EXPORTACAO[nome]
+    if tabela is not None:
+        return pd.read_sql_query(f"SELECT * FROM {tabela}", conn)
+
+    if df_regras is None:
+        df_regras = pd.read_sql_query("SELECT * FROM tf_cadastro_regras_negocio", conn)
+    return processar_regras(
+        df_regras,
+        pd.read_sql_query("SELECT * FROM td_iniciativas", conn),
+        pd.read_sql_query("SELECT * FROM td_samge_acoes_manejo", conn),
+        pd.read_sql_query("SELECT * FROM td_insumos", conn)
+    )
+
+
+def ler_tabelas_snapshot(
+    nomes: list[str],
+    db_path: str = DB_PATH,
+    workers: int = 4
+) -> dict[str, pd.DataFrame]:
+    """
+    Lê as tabelas pedidas de um único snapshot, em paralelo (uma conexão
+    somente leitura por worker). Retorna os DataFrames na ordem de `nomes`.
+    """
+    # as regras processadas são derivadas destas tabelas
+    base_derivada = ["regras", "iniciativas", "acoes", "insumos"]
+    derivadas = [n for n in nomes if TABELAS_EXPORTACAO[n] is None]
+    fisicas = [n for n in nomes if TABELAS_EXPORTACAO[n] is not None]
+    if derivadas:
+        fisicas = list(dict.fromkeys(fisicas + base_derivada))
+
+    dados = {}
+    n = max(1, min(workers, len(fisicas)))
+    with SnapshotLeitura(db_path, n_conexoes=n) as snapshot:
+        with ThreadPoolExecutor(max_workers=n) as executor:
+            futuros = {executor.submit(snapshot.executar, ler_tabela, nome): nome for nome in fisicas}
+            for futuro in as_completed(futuros):
+                dados[futuros[futuro]] = futuro.result()
+
+    if derivadas:
+        dados["regras_negocio_processada"] = processar_regras(
+            dados["regras"], dados["iniciativas"], dados["acoes"], dados["insumos"]
+        )
+    return {nome: dados[nome] for nome in nomes}
+
+
+def escrever_tabela(df: pd.DataFrame, destino, formato: str, nome_aba: str = "dados") -> None:
+    """Grava o DataFrame em `destino` (caminho ou buffer binário) no formato pedido."""
+    if formato == "csv":
+        df.to_csv(destino, index=False, encoding="utf-8")
+    elif formato == "json":
+        df.to_json(destino, orient="records", date_format="iso", force_ascii=False)
+    elif formato == "xlsx":
+        with pd.ExcelWriter(destino, engine="openpyxl") as writer:
+            df.to_excel(writer, sheet_name=nome_aba[:31], index=False)
+    else:
+        raise ValueError(f"Formato não suportado: {formato}")
+
+
+def _colunas_select(conn: sqlite3.Connection, tabela: str) -> str:
+    """
+    Lista de colunas para o SELECT, com as colunas de data/hora já
+    convertidas para ISO 8601 pelo próprio SQLite.
+    """
+    colunas = []
+    for _, nome, tipo, *_ in conn.execute(f"PRAGMA table_info({tabela})"):
+        coluna = f'"{nome}"'
+        if any(t in (tipo or "").upper() for t in ("TIME", "DATE")):
+            colunas.append(f"COALESCE(strftime('%Y-%m-%dT%H:%M:%S', {coluna}), {coluna}) AS {coluna}")
+        else:
+            colunas.append(coluna)
+    return ", ".join(colunas)
+
+
+def _valor_json(valor):
+    """Tipos numpy que aparecem apenas na tabela calculada (regras processadas)."""
+    return valor.item() if hasattr(valor, "item") else str(valor)
+
+
+def iterar_ndjson(conn: sqlite3.Connection, nome: str, df: pd.DataFrame | None = None):
+    """
+    Gera uma linha JSON por registro (com o campo `_tabela`), lendo do
+    cursor em lotes: a tabela nunca é carregada inteira em memória.
+    """
+    if df is None and TABELAS_EXPORTACAO[nome] is None:
+        df = ler_tabela(conn, nome)
+
+    if df is not None:
+        colunas = list(df.columns)
+        for registro in df.itertuples(index=False, name=None):
+            yield json.dumps(
+                {"_tabela": nome, **dict(zip(colunas, registro))},
+                ensure_ascii=False,
+                default=_valor_json
+            ) + "\n"
+        return
+
+    tabela = TABELAS_EXPORTACAO[nome]
+    cursor = conn.execute(f"SELECT {_colunas_select(conn, tabela)} FROM {tabela}")
+    colunas = [c[0] for c in cursor.description]
+    while True:
+        lote = cursor.fetchmany(TAMANHO_LOTE)
+        if not lote:
+            break
+        for registro in lote:
+            yield json.dumps({"_tabela": nome, **dict(zip(colunas, registro))}, ensure_ascii=False) + "\n"
+
+
+def _abrir_texto(caminho: str, compactar: bool):
+    if compactar:
+        return gzip.open(caminho, "wt", encoding="utf-8")
+    return open(caminho, "w", encoding="utf-8")
+
+
+def escrever_ndjson(
+    conn: sqlite3.Connection,
+    caminho: str,
+    tabelas: list[str] | None = None,
+    compactar: bool = False,
+    progresso=None
+) -> int:
+    """
+    Grava as tabelas em um único arquivo NDJSON (opcionalmente .gz),
+    uma linha por registro. Retorna o total de linhas escritas.
+    """
+    tabelas = tabelas or list(TABELAS_EXPORTACAO)
+    if progresso:
+        progresso(tabelas_concluidas=0, total_tabelas=len(tabelas), linhas_escritas=0)
+
+    linhas = 0
+    with _abrir_texto(caminho, compactar) as f:
+        for i, nome in enumerate(tabelas, start=1):
+            for linha in iterar_ndjson(conn, nome):
+                f.write(linha)
+                linhas += 1
+            if progresso:
+                progresso(tabelas_concluidas=i, linhas_escritas=linhas, mensagem=f"Tabela '{nome}' concluída")
+    return linhas
+
+
+def gerar_ndjson_completo(progresso, compactar: bool = True, db_path: str = DB_PATH) -> None:
+    """
+    Job de exportação: grava todas as tabelas em NDJSON direto no arquivo do job.
+    Uma única transação de leitura garante que todas as tabelas venham do mesmo instante.
+    """
+    with SnapshotLeitura(db_path) as snapshot:
+        escrever_ndjson(snapshot.conexoes[0], progresso.caminho_artefato, compactar=compactar, progresso=progresso)
+
+
+def gerar_excel_completo(progresso, db_path: str = DB_PATH) -> bytes:
+    """
+    Job de exportação: monta a planilha com todas as tabelas (uma aba cada).
+    As tabelas são lidas em paralelo de um mesmo snapshot do banco.
+    """
+    total = len(TABELAS_EXPORTACAO)
+    progresso(tabelas_concluidas=0, total_tabelas=total, linhas_escritas=0, mensagem="Lendo tabelas")
+    dados = ler_tabelas_snapshot(list(TABELAS_EXPORTACAO), db_path=db_path)
+
+    linhas = 0
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        for i, (nome, df) in enumerate(dados.items(), start=1):
+            progresso(mensagem=f"Escrevendo aba '{nome}'")
+            df.to_excel(writer, sheet_name=nome, index=False)
+            linhas += len(df)
+            progresso(tabelas_concluidas=i, linhas_escritas=linhas)
+    return buffer.getvalue()
+
+
+def gerar_tabela(progresso, nome: str, formato: str, preparar=None, db_path: str = DB_PATH) -> None:
+    """
+    Job de exportação de uma única tabela (botões das pré-visualizações):
+    lida de um snapshot e gravada direto no arquivo do job. `preparar`
+    ajusta o DataFrame antes da gravação (formatação de textos, por exemplo).
+    """
+    progresso(tabelas_concluidas=0, total_tabelas=1, linhas_escritas=0, mensagem=f"Lendo '{nome}'")
+    with SnapshotLeitura(db_path) as snapshot:
+        df = snapshot.executar(ler_tabela, nome)
+    if preparar is not None:
+        df = preparar(df)
+    escrever_tabela(df, progresso.caminho_artefato, formato, nome_aba=nome)
+    progresso(tabelas_concluidas=1, linhas_escritas=len(df), mensagem="")
+
+
+def gerar_csv_completo(progresso, db_path: str = DB_PATH) -> bytes:
+    """
+    Job de exportação: todas as tabelas em sequência em um único CSV
+    (cada tabela com o seu cabeçalho), lidas de um mesmo snapshot.
+    """
+    total = len(TABELAS_EXPORTACAO)
+    progresso(tabelas_concluidas=0, total_tabelas=total, linhas_escritas=0, mensagem="Lendo tabelas")
+    dados = ler_tabelas_snapshot(list(TABELAS_EXPORTACAO), db_path=db_path)
+
+    linhas = 0
+    buffer = io.StringIO()
+    for i, (nome, df) in enumerate(dados.items(), start=1):
+        df.to_csv(buffer, index=False)
+        linhas += len(df)
+        progresso(tabelas_concluidas=i, linhas_escritas=linhas)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _exportar_uma(
+    snapshot: "SnapshotLeitura",
+    diretorio: str,
+    nome: str,
+    formato: str,
+    df: pd.DataFrame | None,
+    compactar: bool = False
+) -> tuple[str, int]:
+    """Lê (se necessário, a partir do snapshot) e grava uma tabela."""
+    extensao, _ = FORMATOS[formato]
+    if formato == "ndjson":
+        caminho = os.path.join(diretorio, nome + extensao + (".gz" if compactar else ""))
+
+        def gravar(conn):
+            linhas = 0
+            with _abrir_texto(caminho, compactar) as f:
+                for linha in iterar_ndjson(conn, nome, df):
+                    f.write(linha)
+                    linhas += 1
+            return linhas
+
+        return caminho, snapshot.executar(gravar)
+
+    if df is None:
+        df = snapshot.executar(ler_tabela, nome)
+    caminho = os.path.join(diretorio, nome + extensao)
+    escrever_tabela(df, caminho, formato, nome_aba=nome)
+    return caminho, len(df)
+
+
+def exportar(
+    diretorio: str,
+    tabelas: list[str] | None = None,
+    formato: str = "csv",
+    desde: str | None = None,
+    workers: int = 4,
+    db_path: str = DB_PATH,
+    compactar: bool = False
+) -> dict:
+    """
+    Grava cada tabela pedida em `diretorio/<nome>.<formato>`.
+
+    Com `desde` (versão do log ou data/hora UTC) apenas as tabelas
+    acompanhadas pelo log de alterações são exportadas, contendo só as
+    linhas alteradas; o retorno traz a `proxima_versao` para a próxima execução,
+    as chaves `removidos` e as tabelas `completas` (recarga), também gravadas
+    em `diretorio/manifesto.json` ao lado dos arquivos.
+    `compactar` grava os arquivos NDJSON com gzip.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato não suportado: {formato}")
+    tabelas = tabelas or list(TABELAS_EXPORTACAO)
+    desconhecidas = [t for t in tabelas if t not in TABELAS_EXPORTACAO]
+    if desconhecidas:
+        raise ValueError(f"Tabelas desconhecidas: {', '.join(desconhecidas)}")
+    os.makedirs(diretorio, exist_ok=True)
+
+    # DataFrames já prontos (modo delta); None = o worker lê do banco
+    dados: dict[str, pd.DataFrame | None] = {nome: None for nome in tabelas}
+    resultado = {"arquivos": {}, "proxima_versao": None, "ignoradas": [],
+                 "removidos": {}, "completas": [], "manifesto": None}
+
+    if desde is not None:
+        conn = sqlite3.connect(db_path)
+        try:
+            exigir_wal(conn)
+            desde_versao = int(desde) if str(desde).isdigit() else versao_por_data(conn, desde)
+            delta = exportar_delta(conn, desde_versao=desde_versao)
+            por_tabela = {tabela: nome for nome, tabela in TABELAS_EXPORTACAO.items() if tabela}
+            dados = {}
+            for tabela, df in delta["tabelas"].items():
+                nome = por_tabela[tabela]
+                if nome in tabelas:
+                    dados[nome] = df
+            if "regras_negocio_processada" in tabelas:
+                dados["regras_negocio_processada"] = ler_tabela(
+                    conn, "regras_negocio_processada",
+                    df_regras=delta["tabelas"]["tf_cadastro_regras_negocio"]
+                )
+        finally:
+            conn.close()
+        pedidas = {TABELAS_EXPORTACAO[nome] for nome in dados if TABELAS_EXPORTACAO[nome]}
+        resultado["proxima_versao"] = delta["proxima_versao"]
+        resultado["ignoradas"] = [t for t in tabelas if t not in dados]
+        resultado["removidos"] = {t: chaves for t, chaves in delta["removidos"].items() if t in pedidas}
+        resultado["completas"] = [t for t in delta["completas"] if t in pedidas]
+        # as linhas vão nos arquivos das tabelas; o manifesto leva o restante do delta
+        resultado["manifesto"] = os.path.join(diretorio, "manifesto.json")
+        with open(resultado["manifesto"], "w", encoding="utf-8") as f:
+            f.write(delta_para_json({
+                "desde_versao": delta["desde_versao"],
+                "proxima_versao": delta["proxima_versao"],
+                "completas": resultado["completas"],
+                "removidos": resultado["removidos"],
+                "tabelas": {},
+            }))
+
+    # todas as tabelas são lidas do mesmo snapshot, uma conexão por worker
+    n = max(1, min(workers, len(dados)))
+    with SnapshotLeitura(db_path, n_conexoes=n) as snapshot:
+        with ThreadPoolExecutor(max_workers=n) as executor:
+            futuros = {
+                executor.submit(_exportar_uma, snapshot, diretorio, nome, formato, df, compactar): nome
+                for nome, df in dados.items()
+            }
+            for futuro in as_completed(futuros):
+                caminho, linhas = futuro.result()
+                resultado["arquivos"][futuros[futuro]] = {"caminho": caminho, "linhas": linhas}
+
+    return resultado
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Exporta tabelas do SAMGePlan para arquivos.")
+    parser.add_argument("--saida", default="exportacoes", help="Diretório de destino.")
+    parser.add_argument("--tables", "--tabelas", dest="tabelas", nargs="+",
+                        choices=list(TABELAS_EXPORTACAO), help="Tabelas a exportar (padrão: todas).")
+    parser.add_argument("--format", "--formato", dest="formato", default="csv",
+                        choices=list(FORMATOS), help="Formato dos arquivos.")
+    parser.add_argument("--since", "--desde", dest="desde",
+                        help="Versão do log ou data/hora UTC 'AAAA-MM-DD HH:MM:SS' (exportação incremental).")
+    parser.add_argument("--gzip", action="store_true", help="Compacta os arquivos NDJSON.")
+    parser.add_argument("--workers", type=int, default=4, help="Tabelas gravadas em paralelo.")
+    parser.add_argument("--db", default=DB_PATH, help="Caminho do banco SQLite.")
+    args = parser.parse_args(argv)
+
+    try:
+        resultado = exportar(
+            args.saida,
+            tabelas=args.tabelas,
+            formato=args.formato,
+            desde=args.desde,
+            workers=args.workers,
+            db_path=args.db,
+            compactar=args.gzip
+        )
+    except RuntimeError as e:
+        raise SystemExit(f"❌ {e}")
+    for nome, info in resultado["arquivos"].items():
+        print(f"✅ {nome}: {info['linhas']} linhas -> {info['caminho']}")
+    if resultado["ignoradas"]:
+        print(f"⚠️ Sem log de alterações (ignoradas no modo incremental): {', '.join(resultado['ignoradas'])}")
+    for tabela, chaves in resultado["removidos"].items():
+        if chaves:
+            print(f"🗑️ {tabela}: {len(chaves)} registros removidos")
+    if resultado["completas"]:
+        print(f"🔄 Enviadas por inteiro (recarga): {', '.join(resultado['completas'])}")
+    if resultado["manifesto"]:
+        print(f"📄 Manifesto -> {resultado['manifesto']}")
+    if resultado["proxima_versao"] is not None:
+        print(f"proxima_versao={resultado['proxima_versao']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# ---------------------------------------------------------
+# arquivo: hooks/filtros_facetados.py
+# ---------------------------------------------------------
+"""
+Filtros em cascata (facetas) sobre um DataFrame com bitmaps pré-calculados.
+
+`IndiceFacetas` é montado uma vez por versão dos dados: cada coluna de
+faceta é codificada (`pd.factorize`) e cada valor ganha um bitmap
+compactado (`np.packbits`) das linhas em que aparece. Aplicar a seleção é
+um AND bit a bit dos bitmaps, e as opções restantes de cada faceta, com
+contagens, saem de um `np.bincount` dos códigos sob a máscara das demais
+facetas — sem `unique()` nem máscaras booleanas refeitas a cada rerun.
+"""
+import numpy as np
+import pandas as pd
+
+
+class IndiceFacetas:
+    """
+    Índice de facetas de `df` para as `colunas` informadas.
+
+    A seleção é um dict {coluna: valor}; colunas ausentes (ou com valor
+    None) não filtram. `base` é um bitmap adicional aplicado a tudo
+    (por exemplo, a restrição do setor do usuário).
+    """
+
+    def __init__(self, df: pd.DataFrame, colunas: list[str]):
+        self.df = df.reset_index(drop=True)
+        self.n = len(self.df)
+        self.colunas = list(colunas)
+        self.codigos = {}
+        self.valores = {}
+        self.bitmaps = {}
+        for coluna in self.colunas:
+            codigos, valores = pd.factorize(self.df[coluna], sort=True)  # NaN -> -1
+            codigos = codigos.astype(np.int32)
+            self.codigos[coluna] = codigos
+            self.valores[coluna] = list(valores)
+            # uma linha de bits por valor: (n_valores, ceil(n / 8)) bytes
+            self.bitmaps[coluna] = np.packbits(
+                codigos[np.newaxis, :] == np.arange(len(valores), dtype=np.int32)[:, np.newaxis],
+                axis=1
+            )
+        self._todas = np.packbits(np.ones(self.n, dtype=bool))
+
+    def bitmap(self, coluna: str, valor) -> np.ndarray:
+        """Bitmap das linhas com `coluna == valor` (vazio se o valor não existir)."""
+        try:
+            posicao = self.valores[coluna].index(valor)
+        except ValueError:
+            return np.zeros_like(self._todas)
+        return self.bitmaps[coluna][posicao]
+
+    def mascara(self, selecao: dict, ignorar: str | None = None, base: np.ndarray | None = None) -> np.ndarray:
+        """AND dos bitmaps da seleção (exceto a faceta `ignorar`), como array booleano."""
+        bits = self._todas if base is None else base
+        for coluna, valor in selecao.items():
+            if valor is not None and coluna != ignorar:
+                bits = np.bitwise_and(bits, self.bitmap(coluna, valor))
+        return np.unpackbits(bits, count=self.n).astype(bool)
+
+    def filtrar(self, selecao: dict, base: np.ndarray | None = None) -> pd.DataFrame:
+        """Linhas de `df` que atendem a toda a seleção."""
+        return self.df[self.mascara(selecao, base=base)]
+
+    def contagens(self, selecao: dict, base: np.ndarray | None = None) -> dict[str, pd.Series]:
+        """
+        Para cada faceta, as opções ainda possíveis com o nº de linhas,
+        considerando a seleção das outras facetas (Series valor -> contagem).
+        """
+        resultado = {}
+        for coluna in self.colunas:
+            codigos = self.codigos[coluna][self.mascara(selecao, ignorar=coluna, base=base)]
+            contagem = np.bincount(codigos[codigos >= 0], minlength=len(self.valores[coluna]))
+            presentes = np.flatnonzero(contagem)
+            resultado[coluna] = pd.Series(
+                contagem[presentes], index=[self.valores[coluna][i] for i in presentes], dtype="int64"
+            )
+        return resultado
@@ -0,0 +1,166 @@
+# ---------------------------------------------------------
+# arquivo: hooks/grade_paginada.py
+# ---------------------------------------------------------
+"""
+Grade (streamlit-aggrid) com paginação, ordenação e busca no SQLite.
+
+Apenas a página visível sai do banco: busca e filtros viram WHERE,
+a ordenação vira ORDER BY e a página LIMIT / OFFSET. O navegador recebe
+`tamanho_pagina` linhas, qualquer que seja o tamanho da tabela.
+
+Nomes de tabela e de colunas vêm do código das páginas, mas ainda assim
+são validados contra `PRAGMA table_info` antes de entrar no SQL.
+"""
+import math
+import sqlite3
+
+import pandas as pd
+import streamlit as st
+from st_aggrid import AgGrid, GridOptionsBuilder
+
+DB_PATH = "database/app_data.db"
+TAMANHO_PAGINA = 50
+
+# formatação de moeda no navegador (expressão do AG Grid, sem JsCode)
+FORMATADOR_MOEDA = (
+    "value == null ? '' : "
+    "Number(value).toLocaleString('pt-BR', {style: 'currency', currency: 'BRL'})"
+)
+
+
+def colunas_tabela(conn: sqlite3.Connection, tabela: str) -> dict[str, str]:
+    """{coluna: tipo declarado} da tabela; ValueError se ela não existir."""
+    colunas = {row[1]: (row[2] or "").upper() for row in conn.execute(f'PRAGMA table_info("{tabela}")')}
+    if not colunas:
+        raise ValueError(f"Tabela inexistente: {tabela}")
+    return colunas
+
+
+def _identificador(nome: str) -> str:
+    return '"' + nome.replace('"', '""') + '"'
+
+
+def _validar(nomes, existentes: dict, tabela: str) -> None:
+    invalidas = [n for n in nomes if n not in existentes]
+    if invalidas:
+        raise ValueError(f"Colunas inexistentes em {tabela}: {invalidas}")
+
+
+def _where(existentes: dict, filtros: dict | None, busca: str | None, colunas_busca) -> tuple[str, list]:
+    clausulas, params = [], []
+    for coluna, valor in (filtros or {}).items():
+        if valor is None or valor == "":
+            continue
+        clausulas.append(f"{_identificador(coluna)} = ?")
+        params.append(valor)
+    if busca:
+        textos = [c for c in colunas_busca if existentes[c] in ("", "TEXT") or "CHAR" in existentes[c]]
+        if textos:
+            clausulas.append("(" + " OR ".join(f"{_identificador(c)} LIKE ?" for c in textos) + ")")
+            params.extend([f"%{busca}%"] * len(textos))
+    return (" WHERE " + " AND ".join(clausulas)) if clausulas else "", params
+
+
+def consultar_pagina(
+    conn: sqlite3.Connection,
+    tabela: str,
+    colunas: list[str] | None = None,
+    filtros: dict | None = None,
+    busca: str | None = None,
+    ordenar_por: str | None = None,
+    decrescente: bool = False,
+    limite: int = TAMANHO_PAGINA,
+    offset: int = 0,
+) -> tuple[pd.DataFrame, int]:
+    """
+    (linhas da página, total de linhas que atendem a filtros e busca).
+    `filtros` é {coluna: valor} (igualdade); `busca` é um LIKE nas colunas de texto.
+    """
+    existentes = colunas_tabela(conn, tabela)
+    colunas = list(colunas or existentes)
+    _validar(colunas + list(filtros or {}) + ([ordenar_por] if ordenar_por else []), existentes, tabela)
+
+    where, params = _where(existentes, filtros, busca, colunas)
+    origem = f"FROM {_identificador(tabela)}{where}"
+    total = conn.execute(f"SELECT COUNT(*) {origem}", params).fetchone()[0]
+
+    query = f"SELECT {', '.join(_identificador(c) for c in colunas)} {origem}"
+    if ordenar_por:
+        query += f" ORDER BY {_identificador(ordenar_por)} {'DESC' if decrescente else 'ASC'}"
+    query += " LIMIT ? OFFSET ?"
+    df = pd.read_sql_query(query, conn, params=params + [int(limite), int(offset)])
+    return df, total
+
+
+def grade_paginada(
+    tabela: str,
+    chave: str,
+    colunas: list[str] | None = None,
+    filtros: dict | None = None,
+    colunas_moeda=(),
+    ordenacao_padrao: str | None = None,
+    decrescente_padrao: bool = False,
+    tamanho_pagina: int = TAMANHO_PAGINA,
+    db_path: str = DB_PATH,
+    exibir: bool = True,
+    preparar=None,
+) -> pd.DataFrame:
+    """
+    Controles (busca, ordenação, página) + AgGrid com a página atual da
+    tabela. Com `exibir=False` só devolve a página (para um data_editor,
+    por exemplo). `chave` distingue os widgets de cada grade na página.
+    `preparar` formata a página (textos em caixa alta, por exemplo) antes
+    de exibi-la; o banco continua ordenando e filtrando os valores originais.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        existentes = colunas_tabela(conn, tabela)
+        opcoes_ordem = list(colunas or existentes)
+
+        col_busca, col_ordem, col_direcao, col_pagina = st.columns([4, 3, 1, 1])
+        busca = col_busca.text_input("🔎 Buscar", key=f"{chave}_busca")
+        ordenar_por = col_ordem.selectbox(
+            "Ordenar por",
+            opcoes_ordem,
+            index=opcoes_ordem.index(ordenacao_padrao) if ordenacao_padrao in opcoes_ordem else 0,
+            key=f"{chave}_ordem"
+        )
+        decrescente = col_direcao.toggle("↓", value=decrescente_padrao, key=f"{chave}_desc", help="Ordem decrescente")
+
+        # a página é lida antes da consulta para que o total venha na mesma ida ao banco
+        pagina = int(st.session_state.get(f"{chave}_pagina", 1))
+        df, total = consultar_pagina(
+            conn, tabela, colunas, filtros, busca.strip() or None, ordenar_por, decrescente,
+            tamanho_pagina, (pagina - 1) * tamanho_pagina
+        )
+        paginas = max(1, math.ceil(total / tamanho_pagina))
+        if pagina > paginas:
+            pagina = paginas
+            df, total = consultar_pagina(
+                conn, tabela, colunas, filtros, busca.strip() or None, ordenar_por, decrescente,
+                tamanho_pagina, (pagina - 1) * tamanho_pagina
+            )
+    finally:
+        conn.close()
+
+    if st.session_state.get(f"{chave}_pagina", 1) > paginas:
+        st.session_state[f"{chave}_pagina"] = paginas
+    col_pagina.number_input("Página", min_value=1, max_value=paginas, step=1, key=f"{chave}_pagina")
+    st.caption(f"{total} registro(s) — página {pagina} de {paginas}")
+    if preparar is not None:
+        df = preparar(df)
+
+    if exibir:
+        gb = GridOptionsBuilder.from_dataframe(df)
+        # ordenação e filtro já feitos no banco; a grade só exibe a página
+        gb.configure_default_column(sortable=False, filter=False, resizable=True)
+        for coluna in colunas_moeda:
+            if coluna in df.columns:
+                gb.configure_column(coluna, type=["numericColumn"], valueFormatter=FORMATADOR_MOEDA)
+        AgGrid(
+            df,
+            gridOptions=gb.build(),
+            height=min(600, 35 * (len(df) + 1) + 30),
+            key=f"{chave}_grade",
+        )
+    return df
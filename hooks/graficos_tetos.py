@@ -0,0 +1,110 @@
+# ---------------------------------------------------------
+# arquivo: hooks/graficos_tetos.py
+# ---------------------------------------------------------
+"""
+Gráficos de tetos por iniciativa (página Consulta Tetos FCA).
+
+Em vez de uma figura por exercício (saldo e cada teto previsto) e
+iniciativa, cada iniciativa tem uma figura facetada (um painel por
+exercício, eixo de UCs compartilhado) e o comparativo empilhado. Os
+valores vêm de `tf_distribuicao_tetos` (formato longo, um exercício por
+linha), então um exercício novo aparece sem mudança de código. As figuras
+vão serializadas em JSON (`fig.to_json()`), para que a página as guarde
+em cache pela versão dos dados e pelo estado dos filtros e apenas as
+reenvie ao navegador nos reruns. Com muitas UCs, ficam as `top_n` de
+maior teto total e as demais são somadas em uma única barra.
+"""
+import pandas as pd
+import plotly.express as px
+
+from hooks.tetos_exercicio import rotulo_exercicio
+
+COLUNA_UC = "UnidadeConservacao"
+COLUNA_INICIATIVA = "Nome da Proposta/Iniciativa Estruturante"
+TOP_N_UCS = 25
+ALTURA_POR_UC = 22
+
+ROTULOS = {"Valor": "Valor (R$)", COLUNA_UC: "Unidade de Conservação"}
+
+
+def formato_longo(tetos: pd.DataFrame, top_n: int = TOP_N_UCS) -> tuple[pd.DataFrame, list[str]]:
+    """
+    (UC, Categoria, Valor) somado por UC e exercício, e a ordem das UCs
+    (maior teto total primeiro). Além de `top_n` UCs, as restantes viram a
+    barra "Demais UCs (k)".
+    """
+    longo = (
+        tetos.rename(columns={"valor": "Valor"})
+        .groupby([COLUNA_UC, "exercicio"], as_index=False)["Valor"].sum()
+    )
+    totais = longo.groupby(COLUNA_UC)["Valor"].sum().sort_values(ascending=False)
+    ordem = totais.index.tolist()
+    if len(ordem) > top_n:
+        demais = f"Demais UCs ({len(ordem) - top_n})"
+        longo[COLUNA_UC] = longo[COLUNA_UC].where(longo[COLUNA_UC].isin(ordem[:top_n]), demais)
+        longo = longo.groupby([COLUNA_UC, "exercicio"], as_index=False)["Valor"].sum()
+        ordem = ordem[:top_n] + [demais]
+    longo["Categoria"] = longo["exercicio"].map(rotulo_exercicio)
+    return longo, ordem
+
+
+def figuras_iniciativa(tetos: pd.DataFrame, top_n: int = TOP_N_UCS) -> dict:
+    """
+    {"facetas": json, "comparativo": json} de uma iniciativa, a partir das
+    linhas (UC, exercicio, valor); "facetas" é None quando nenhum exercício
+    tem valor positivo.
+    """
+    longo, ordem = formato_longo(tetos, top_n)
+    ordem_categorias = [rotulo_exercicio(e) for e in sorted(longo["exercicio"].unique())]
+    category_orders = {COLUNA_UC: ordem, "Categoria": ordem_categorias}
+    altura = max(300, ALTURA_POR_UC * len(ordem) + 150)
+
+    positivos = longo[longo["Valor"] > 0]
+    facetas = None
+    if not positivos.empty:
+        fig = px.bar(
+            positivos,
+            y=COLUNA_UC,
+            x="Valor",
+            facet_col="Categoria",
+            orientation="h",
+            labels=ROTULOS,
+            category_orders={**category_orders, "Categoria": [c for c in ordem_categorias if c in set(positivos["Categoria"])]},
+            title="Tetos por UC",
+            height=altura,
+        )
+        # cada categoria com a sua escala, como nos gráficos separados
+        fig.update_xaxes(matches=None, title_text="")
+        fig.update_yaxes(autorange="reversed")  # maior teto no topo
+        fig.for_each_annotation(lambda a: a.update(text=a.text.split("=", 1)[-1]))
+        facetas = fig.to_json()
+
+    fig_combo = px.bar(
+        longo,
+        y=COLUNA_UC,
+        x="Valor",
+        color="Categoria",
+        orientation="h",
+        title="Comparativo de Tetos por UC",
+        labels=ROTULOS,
+        category_orders=category_orders,
+        height=max(800, altura),
+    )
+    fig_combo.update_yaxes(autorange="reversed")
+    return {"facetas": facetas, "comparativo": fig_combo.to_json()}
+
+
+def figuras_tetos(df: pd.DataFrame, tetos: pd.DataFrame, top_n: int = TOP_N_UCS) -> list[tuple[str, dict]]:
+    """
+    [(nome da iniciativa, figuras_iniciativa)], na ordem em que as iniciativas
+    aparecem em `df` (linhas da distribuição, com `id`); `tetos` são as linhas
+    (id_distribuicao, exercicio, valor) de `tf_distribuicao_tetos`.
+    """
+    linhas = df[["id", "id_iniciativa", COLUNA_INICIATIVA, COLUNA_UC]]
+    tetos = tetos.merge(linhas, left_on="id_distribuicao", right_on="id")
+    por_iniciativa = dict(tuple(tetos.groupby("id_iniciativa", sort=False)))
+    resultado = []
+    for id_iniciativa, nome in linhas.drop_duplicates("id_iniciativa")[["id_iniciativa", COLUNA_INICIATIVA]].itertuples(index=False):
+        if id_iniciativa in por_iniciativa:
+            resultado.append((nome, figuras_iniciativa(por_iniciativa[id_iniciativa], top_n)))
+    return resultado
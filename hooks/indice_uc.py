@@ -0,0 +1,196 @@
+# ---------------------------------------------------------
+# arquivo: hooks/indice_uc.py
+# ---------------------------------------------------------
+"""
+Índice invertido Unidade de Conservação (CNUC) -> iniciativas.
+
+A distribuição por UC de cada iniciativa fica dentro do JSON
+`distribuicao_ucs` da regra. `tf_indice_uc` guarda uma linha por
+(CNUC, iniciativa, eixo) com o valor planejado, considerando apenas a
+versão mais recente da regra de cada iniciativa. O índice é atualizado
+na mesma transação do salvamento da regra (`atualizar_indice_uc`), e a
+consulta por UC vira um lookup indexado.
+"""
+import json
+import sqlite3
+
+import pandas as pd
+
+from hooks.atributos_uc import ATRIBUTOS_UC
+from hooks.tetos_exercicio import eh_coluna_teto
+
+# colunas fixas de cada linha da distribuição por UC (tf_distribuicao_elegiveis /
+# distribuicao_ucs); junto com ATRIBUTOS_UC e as colunas de teto, tudo o que não é eixo
+COLUNAS_IDENTIFICACAO = (
+    "id",
+    "DEMANDANTE (diretoria)",
+    "Nome da Proposta/Iniciativa Estruturante",
+    "AÇÃO DE APLICAÇÃO",
+    "CNUC",
+    "id_demandante",
+    "id_iniciativa",
+    "id_acao",
+    "Unidade de Conservação",
+    "TetoTotalDisponivel",
+    "A Distribuir",
+)
+
+
+def eh_coluna_identificacao(coluna: str) -> bool:
+    """Coluna fixa da distribuição (identificação, atributo da UC ou teto), isto é, não é eixo."""
+    return coluna in COLUNAS_IDENTIFICACAO or coluna in ATRIBUTOS_UC or eh_coluna_teto(coluna)
+
+
+def garantir_indice_uc(conn: sqlite3.Connection) -> None:
+    """
+    Cria (se não existirem) a tabela e os índices. Na primeira execução
+    o índice é montado a partir das regras já cadastradas. Idempotente.
+    """
+    existia = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tf_indice_uc'"
+    ).fetchone() is not None
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tf_indice_uc (
+            cnuc TEXT NOT NULL,
+            unidade TEXT,
+            id_iniciativa INTEGER NOT NULL,
+            versao INTEGER NOT NULL,            -- id da regra em tf_cadastro_regras_negocio
+            demandante TEXT,
+            acao_aplicacao TEXT,
+            eixo TEXT NOT NULL,
+            valor REAL NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_indice_uc_cnuc
+        ON tf_indice_uc (cnuc, id_iniciativa)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_indice_uc_iniciativa
+        ON tf_indice_uc (id_iniciativa)
+    """)
+    if not existia:
+        reconstruir_indice_uc(conn)
+    conn.commit()
+
+
+def linhas_indice(id_iniciativa: int, versao: int, distribuicao_json: str) -> list[tuple]:
+    """Linhas (cnuc, unidade, id_iniciativa, versao, demandante, ação, eixo, valor) com valor != 0."""
+    try:
+        registros = json.loads(distribuicao_json or "[]")
+    except ValueError:
+        return []
+    if not isinstance(registros, list):
+        return []
+
+    linhas = []
+    for registro in registros:
+        if not isinstance(registro, dict) or not registro.get("CNUC"):
+            continue
+        for eixo, valor in registro.items():
+            if eh_coluna_identificacao(eixo) or isinstance(valor, bool):
+                continue
+            try:
+                valor = float(valor)
+            except (TypeError, ValueError):
+                continue
+            if valor == 0:
+                continue
+            linhas.append((
+                str(registro["CNUC"]),
+                registro.get("Unidade de Conservação"),
+                int(id_iniciativa),
+                int(versao),
+                registro.get("DEMANDANTE (diretoria)"),
+                registro.get("AÇÃO DE APLICAÇÃO"),
+                eixo,
+                valor,
+            ))
+    return linhas
+
+
+def _inserir(conn: sqlite3.Connection, linhas: list[tuple]) -> None:
+    conn.executemany(
+        """
+        INSERT INTO tf_indice_uc
+            (cnuc, unidade, id_iniciativa, versao, demandante, acao_aplicacao, eixo, valor)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        linhas
+    )
+
+
+def atualizar_indice_uc(conn: sqlite3.Connection, id_regra: int) -> None:
+    """
+    Substitui as entradas da iniciativa pelas da regra `id_regra` (recém-salva).
+    Não faz commit: deve rodar na transação do salvamento.
+    """
+    row = conn.execute(
+        "SELECT id_iniciativa, distribuicao_ucs FROM tf_cadastro_regras_negocio WHERE id = ?",
+        (id_regra,)
+    ).fetchone()
+    if row is None:
+        return
+    id_iniciativa, distribuicao_json = row
+    conn.execute("DELETE FROM tf_indice_uc WHERE id_iniciativa = ?", (id_iniciativa,))
+    _inserir(conn, linhas_indice(id_iniciativa, id_regra, distribuicao_json))
+
+
+def reconstruir_indice_uc(conn: sqlite3.Connection) -> None:
+    """
+    Remonta o índice inteiro a partir da última regra (maior `id`) de cada
+    iniciativa; dois salvamentos no mesmo segundo não duplicam entradas.
+    """
+    conn.execute("DELETE FROM tf_indice_uc")
+    regras = conn.execute("""
+        SELECT r.id, r.id_iniciativa, r.distribuicao_ucs
+        FROM tf_cadastro_regras_negocio r
+        JOIN (
+            SELECT MAX(id) AS id
+            FROM tf_cadastro_regras_negocio
+            GROUP BY id_iniciativa
+        ) sub ON sub.id = r.id
+    """).fetchall()
+    for id_regra, id_iniciativa, distribuicao_json in regras:
+        _inserir(conn, linhas_indice(id_iniciativa, id_regra, distribuicao_json))
+
+
+def listar_ucs(conn: sqlite3.Connection, demandante: str | None = None) -> pd.DataFrame:
+    """UCs presentes no índice (cnuc, unidade), opcionalmente de um demandante."""
+    query = "SELECT cnuc, MAX(unidade) AS unidade FROM tf_indice_uc"
+    params = []
+    if demandante:
+        query += " WHERE UPPER(demandante) = UPPER(?)"
+        params.append(demandante)
+    return pd.read_sql_query(query + " GROUP BY cnuc ORDER BY unidade", conn, params=params)
+
+
+def consultar_uc(conn: sqlite3.Connection, cnucs: list[str] | None = None, demandante: str | None = None) -> pd.DataFrame:
+    """
+    Iniciativas, eixos e valores planejados para as UCs informadas
+    (todas, se `cnucs` for None), via idx_indice_uc_cnuc.
+    """
+    query = """
+        SELECT x.cnuc AS "CNUC",
+               x.unidade AS "Unidade de Conservação",
+               x.id_iniciativa,
+               i.nome_iniciativa AS "Iniciativa",
+               x.demandante AS "Demandante",
+               x.acao_aplicacao AS "Ação de Aplicação",
+               x.eixo AS "Eixo Temático",
+               x.valor AS "Valor",
+               x.versao
+        FROM tf_indice_uc x
+        LEFT JOIN td_iniciativas i ON i.id_iniciativa = x.id_iniciativa
+    """
+    filtros, params = [], []
+    if cnucs is not None:
+        filtros.append(f"x.cnuc IN ({','.join('?' * len(cnucs))})" if cnucs else "0")
+        params.extend(cnucs)
+    if demandante:
+        filtros.append("UPPER(x.demandante) = UPPER(?)")
+        params.append(demandante)
+    if filtros:
+        query += " WHERE " + " AND ".join(filtros)
+    query += " ORDER BY x.unidade, i.nome_iniciativa, x.eixo"
+    return pd.read_sql_query(query, conn, params=params)
@@ -4,6 +4,8 @@
 import sqlite3
 import pandas as pd
 
+from hooks.dinheiro import arredondar_real
+
 def get_connection():
     return sqlite3.connect("database/app_data.db")
 
@@ -25,7 +27,7 @@ def inserir_insumo(elemento_despesa: str, especificacao_padrao: str, descricao_i
         )
         VALUES (?, ?, ?, ?, ?)
         """,
-        (elemento_despesa, especificacao_padrao, descricao_insumo, especificacao_tecnica, preco_referencia)
+        (elemento_despesa, especificacao_padrao, descricao_insumo, especificacao_tecnica, arredondar_real(preco_referencia))
     )
     conn.commit()
     conn.close()
@@ -63,7 +65,7 @@ def atualizar_insumo(
             preco_referencia = ?
         WHERE id = ?
         """,
-        (elemento_despesa, especificacao_padrao, descricao_insumo, especificacao_tecnica, preco_referencia, insumo_id)
+        (elemento_despesa, especificacao_padrao, descricao_insumo, especificacao_tecnica, arredondar_real(preco_referencia), insumo_id)
     )
     conn.commit()
     conn.close()
@@ -0,0 +1,306 @@
+# ---------------------------------------------------------
+# arquivo: hooks/jobs_exportacao.py
+# ---------------------------------------------------------
+"""
+Execução em segundo plano das exportações pesadas (planilha completa,
+tabelas avulsas da página de Exportações, extrato em PDF).
+
+Cada job roda em um pool de threads compartilhado entre as sessões do
+Streamlit, reporta progresso (tabelas concluídas, linhas escritas) e grava o
+arquivo final em `database/jobs/<job_id>/`, junto com um `meta.json`. Assim o
+usuário pode sair da página e voltar depois para baixar o resultado.
+"""
+import json
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from hooks.exportacoes import FORMATOS, gerar_tabela
+
+JOBS_DIR = "database/jobs"
+MAX_WORKERS = 2
+DIAS_RETENCAO = 7
+
+STATUS_PENDENTE = "pendente"
+STATUS_EXECUTANDO = "executando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_ERRO = "erro"
+
+ROTULOS_STATUS = {
+    STATUS_PENDENTE: "⏳ Na fila",
+    STATUS_EXECUTANDO: "🔄 Em execução",
+    STATUS_CONCLUIDO: "✅ Concluído",
+    STATUS_ERRO: "❌ Erro",
+}
+
+
+def _agora() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class ProgressoJob:
+    """
+    Callback entregue à função do job para reportar andamento.
+    Uso: progresso(tabelas_concluidas=3, total_tabelas=14, linhas_escritas=1200)
+
+    `caminho_artefato` é onde o arquivo final fica: jobs que geram arquivos
+    grandes podem gravar direto nele (em streaming) e retornar None.
+    """
+
+    def __init__(self, gerenciador: "GerenciadorJobs", job_id: str, caminho_artefato: str):
+        self._gerenciador = gerenciador
+        self._job_id = job_id
+        self.caminho_artefato = caminho_artefato
+
+    def __call__(
+        self,
+        tabelas_concluidas: int | None = None,
+        total_tabelas: int | None = None,
+        linhas_escritas: int | None = None,
+        mensagem: str | None = None
+    ) -> None:
+        campos = {
+            "tabelas_concluidas": tabelas_concluidas,
+            "total_tabelas": total_tabelas,
+            "linhas_escritas": linhas_escritas,
+            "mensagem": mensagem,
+        }
+        self._gerenciador._atualizar(
+            self._job_id, **{k: v for k, v in campos.items() if v is not None}
+        )
+
+
+class GerenciadorJobs:
+    """
+    Fila de jobs de exportação com armazenamento local dos artefatos.
+
+    A função submetida recebe um `ProgressoJob` e deve retornar os bytes do
+    arquivo final (ou gravá-lo em `progresso.caminho_artefato` e retornar None).
+    Não deve chamar `st.*`, pois roda fora da sessão.
+    """
+
+    def __init__(self, diretorio: str = JOBS_DIR, max_workers: int = MAX_WORKERS):
+        self.diretorio = diretorio
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job_exportacao")
+        self._lock = threading.Lock()
+        self._jobs: dict[str, dict] = {}
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._carregar_existentes()
+        self.limpar_antigos()
+
+    # -----------------------------------------------------
+    # Persistência dos metadados
+    # -----------------------------------------------------
+    def _pasta_job(self, job_id: str) -> str:
+        return os.path.join(self.diretorio, job_id)
+
+    def _salvar_metadados(self, job: dict) -> None:
+        pasta = self._pasta_job(job["id"])
+        os.makedirs(pasta, exist_ok=True)
+        caminho_tmp = os.path.join(pasta, "meta.json.tmp")
+        with open(caminho_tmp, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(caminho_tmp, os.path.join(pasta, "meta.json"))
+
+    def _carregar_existentes(self) -> None:
+        """Recarrega jobs de execuções anteriores do servidor."""
+        for job_id in os.listdir(self.diretorio):
+            caminho_meta = os.path.join(self._pasta_job(job_id), "meta.json")
+            if not os.path.exists(caminho_meta):
+                continue
+            try:
+                with open(caminho_meta, encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            # Jobs que estavam rodando quando o servidor caiu não voltam sozinhos
+            if job.get("status") in (STATUS_PENDENTE, STATUS_EXECUTANDO):
+                job["status"] = STATUS_ERRO
+                job["erro"] = "Execução interrompida (reinício do servidor)."
+                self._salvar_metadados(job)
+            self._jobs[job["id"]] = job
+
+    def _atualizar(self, job_id: str, **campos) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(campos)
+            self._salvar_metadados(job)
+
+    # -----------------------------------------------------
+    # API pública
+    # -----------------------------------------------------
+    def submeter(
+        self,
+        tipo: str,
+        descricao: str,
+        funcao,
+        nome_arquivo: str,
+        mime: str,
+        usuario: str,
+        unidade: str = "tabelas"
+    ) -> str:
+        """
+        Enfileira `funcao(progresso) -> bytes | None` e retorna o id do job.
+        `unidade` nomeia as etapas na barra de progresso (tabelas, seções...).
+        """
+        job_id = datetime.now().strftime("%Y%m%d%H%M%S") + "_" + uuid.uuid4().hex[:8]
+        job = {
+            "id": job_id,
+            "tipo": tipo,
+            "descricao": descricao,
+            "usuario": usuario,
+            "nome_arquivo": nome_arquivo,
+            "mime": mime,
+            "status": STATUS_PENDENTE,
+            "criado_em": _agora(),
+            "iniciado_em": None,
+            "concluido_em": None,
+            "tabelas_concluidas": 0,
+            "total_tabelas": None,
+            "unidade": unidade,
+            "linhas_escritas": 0,
+            "mensagem": "",
+            "erro": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._salvar_metadados(job)
+        self._executor.submit(self._executar, job_id, funcao)
+        return job_id
+
+    def _executar(self, job_id: str, funcao) -> None:
+        self._atualizar(job_id, status=STATUS_EXECUTANDO, iniciado_em=_agora())
+        caminho = os.path.join(self._pasta_job(job_id), self._jobs[job_id]["nome_arquivo"])
+        try:
+            conteudo = funcao(ProgressoJob(self, job_id, caminho))
+            if conteudo is not None:
+                with open(caminho, "wb") as f:
+                    f.write(conteudo)
+            self._atualizar(job_id, status=STATUS_CONCLUIDO, concluido_em=_agora(), mensagem="")
+        except Exception as e:
+            self._atualizar(job_id, status=STATUS_ERRO, concluido_em=_agora(), erro=str(e))
+
+    def obter(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def listar(self, usuario: str | None = None, tipo: str | None = None) -> list[dict]:
+        """Lista jobs (mais recentes primeiro), opcionalmente por usuário e tipo."""
+        with self._lock:
+            jobs = [dict(j) for j in self._jobs.values()]
+        if usuario is not None:
+            jobs = [j for j in jobs if j["usuario"] == usuario]
+        if tipo is not None:
+            jobs = [j for j in jobs if j["tipo"] == tipo]
+        return sorted(jobs, key=lambda j: j["criado_em"], reverse=True)
+
+    def ler_artefato(self, job_id: str) -> bytes | None:
+        job = self.obter(job_id)
+        if not job or job["status"] != STATUS_CONCLUIDO:
+            return None
+        caminho = os.path.join(self._pasta_job(job_id), job["nome_arquivo"])
+        if not os.path.exists(caminho):
+            return None
+        with open(caminho, "rb") as f:
+            return f.read()
+
+    def remover(self, job_id: str) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["status"] in (STATUS_PENDENTE, STATUS_EXECUTANDO):
+                return
+            del self._jobs[job_id]
+        shutil.rmtree(self._pasta_job(job_id), ignore_errors=True)
+
+    def limpar_antigos(self, dias: int = DIAS_RETENCAO) -> None:
+        """Remove jobs finalizados há mais de `dias` dias."""
+        limite = (datetime.now() - timedelta(days=dias)).strftime("%Y-%m-%d %H:%M:%S")
+        for job in self.listar():
+            if job["status"] in (STATUS_CONCLUIDO, STATUS_ERRO) and job["criado_em"] < limite:
+                self.remover(job["id"])
+
+
+@st.cache_resource
+def obter_gerenciador_jobs() -> GerenciadorJobs:
+    """Instância única por servidor, compartilhada entre sessões."""
+    return GerenciadorJobs()
+
+
+def exibir_jobs(gerenciador: GerenciadorJobs, usuario: str, tipo: str, chave: str) -> None:
+    """Lista os jobs do usuário com barra de progresso e botão de download."""
+    jobs = gerenciador.listar(usuario=usuario, tipo=tipo)
+    if not jobs:
+        st.caption("Nenhuma exportação gerada recentemente.")
+        return
+
+    if st.button("🔄 Atualizar status", key=f"{chave}_atualizar"):
+        st.rerun()
+
+    for job in jobs:
+        col_info, col_acao = st.columns([4, 1])
+        with col_info:
+            st.markdown(f"**{job['descricao']}** — {ROTULOS_STATUS.get(job['status'], job['status'])}")
+            st.caption(f"Solicitado em {job['criado_em']}")
+            if job["status"] == STATUS_EXECUTANDO:
+                total = job.get("total_tabelas") or 0
+                feitas = job.get("tabelas_concluidas") or 0
+                texto = f"{feitas}/{total} {job.get('unidade', 'tabelas')}"
+                if job.get("linhas_escritas"):
+                    texto += f" · {job['linhas_escritas']} linhas"
+                if job.get("mensagem"):
+                    texto += f" · {job['mensagem']}"
+                st.progress(min(feitas / total, 1.0) if total else 0.0, text=texto)
+            elif job["status"] == STATUS_ERRO:
+                st.error(job.get("erro") or "Erro desconhecido.")
+        with col_acao:
+            if job["status"] == STATUS_CONCLUIDO:
+                conteudo = gerenciador.ler_artefato(job["id"])
+                if conteudo is not None:
+                    st.download_button(
+                        label="⬇️ Baixar",
+                        data=conteudo,
+                        file_name=job["nome_arquivo"],
+                        mime=job["mime"],
+                        use_container_width=True,
+                        key=f"{chave}_download_{job['id']}"
+                    )
+            if job["status"] in (STATUS_CONCLUIDO, STATUS_ERRO):
+                if st.button("🗑", key=f"{chave}_remover_{job['id']}", help="Remover"):
+                    gerenciador.remover(job["id"])
+                    st.rerun()
+
+
+def botoes_exportacao_tabela(
+    nome: str,
+    rotulo: str,
+    nome_arquivo: str,
+    chave: str,
+    usuario: str,
+    preparar=None
+) -> None:
+    """
+    Botões CSV / JSON / Excel que geram, em segundo plano, o arquivo da
+    tabela `nome` (de TABELAS_EXPORTACAO), seguidos da lista desses jobs.
+    Nada é lido nem serializado enquanto o usuário não pede o arquivo.
+    """
+    gerenciador = obter_gerenciador_jobs()
+    tipo = f"tabela_{chave}"
+    for coluna, (formato, titulo) in zip(st.columns(3), (("csv", "CSV"), ("json", "JSON"), ("xlsx", "Excel"))):
+        if coluna.button(f"Gerar {titulo} - {rotulo}", key=f"{chave}_{formato}", use_container_width=True):
+            extensao, mime = FORMATOS[formato]
+            gerenciador.submeter(
+                tipo=tipo,
+                descricao=f"{rotulo} ({titulo})",
+                funcao=lambda progresso, formato=formato: gerar_tabela(progresso, nome, formato, preparar),
+                nome_arquivo=nome_arquivo + extensao,
+                mime=mime,
+                usuario=usuario
+            )
+            st.toast("Exportação enviada para processamento em segundo plano.", icon="⏳")
+    exibir_jobs(gerenciador, usuario, tipo=tipo, chave=f"{chave}_jobs")
@@ -0,0 +1,101 @@
+# ---------------------------------------------------------
+# arquivo: hooks/particoes_tetos.py
+# ---------------------------------------------------------
+"""
+`tf_distribuicao_elegiveis` carregada uma vez e particionada por setor.
+
+A tabela completa é lida uma única vez por versão dos dados:
+`carregar_particoes_tetos` guarda `ParticoesTetos` em `st.cache_resource`,
+com a versão do log de alterações como chave, e é a mesma para todas as
+páginas. Só a versão mais recente fica em memória (`max_entries=1`): cada
+gravação da distribuição muda a versão e a cópia anterior é descartada.
+Cada usuário recebe a partição do seu setor —
+ou a tabela inteira, para admin / cocam — a partir de um dicionário com
+a chave explícita (setor, perfil, versão), em vez de depender do
+`st.session_state` dentro de uma função em cache. A partição é montada
+a partir dos índices do groupby, sem varrer a tabela a cada setor.
+"""
+import os
+import sqlite3
+from threading import Lock
+
+import pandas as pd
+import streamlit as st
+
+from hooks.exportacao_delta import versao_tabela
+
+DB_PATH = "database/app_data.db"
+
+COLUNA_DEMANDANTE = "DEMANDANTE (diretoria)"
+PERFIS_GLOBAIS = ("admin", "cocam")  # enxergam todos os setores
+
+
+class ParticoesTetos:
+    """Tabela de tetos completa (`df`) e partições por (setor, perfil, versão)."""
+
+    def __init__(self, df: pd.DataFrame, versao: int = 0):
+        self.df = df.reset_index(drop=True)
+        if COLUNA_DEMANDANTE in self.df.columns:
+            self.df[COLUNA_DEMANDANTE] = self.df[COLUNA_DEMANDANTE].str.upper()
+            self._posicoes = self.df.groupby(COLUNA_DEMANDANTE, sort=False).indices
+        else:
+            self._posicoes = None
+        self.versao = versao
+        self._particoes = {}
+        self._lock = Lock()
+
+    @classmethod
+    def do_banco(cls, conn: sqlite3.Connection, versao: int = 0) -> "ParticoesTetos":
+        return cls(pd.read_sql_query("SELECT * FROM tf_distribuicao_elegiveis", conn), versao)
+
+    def chave(self, setor: str | None, perfil: str | None) -> tuple:
+        """(setor, perfil, versão); perfis globais compartilham a mesma partição."""
+        if perfil in PERFIS_GLOBAIS or self._posicoes is None or not setor:
+            return ("*", "*", self.versao)
+        return (setor.upper(), perfil, self.versao)
+
+    def particao(self, setor: str | None, perfil: str | None) -> pd.DataFrame:
+        """
+        Linhas visíveis para o usuário, como cópia (a página pode alterá-la).
+        Sem setor informado, a tabela inteira (mesmo comportamento anterior).
+        """
+        chave = self.chave(setor, perfil)
+        with self._lock:
+            df = self._particoes.get(chave)
+        if df is None:
+            if chave[0] == "*":
+                df = self.df
+            else:
+                posicoes = self._posicoes.get(chave[0], [])
+                df = self.df.take(posicoes)
+            with self._lock:
+                self._particoes[chave] = df
+        return df.copy()
+
+
+def versao_distribuicao(db_path: str = DB_PATH) -> int:
+    """Versão de tf_distribuicao_elegiveis no log de alterações (chave dos caches)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return versao_tabela(conn, "tf_distribuicao_elegiveis")
+    finally:
+        conn.close()
+
+
+@st.cache_resource(max_entries=1)
+def carregar_particoes_tetos(versao: int, db_path: str = DB_PATH) -> ParticoesTetos:
+    """tf_distribuicao_elegiveis completa, lida uma vez por versão e compartilhada entre sessões e páginas."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return ParticoesTetos.do_banco(conn, versao)
+    finally:
+        conn.close()
+
+
+def tetos_do_usuario(db_path: str = DB_PATH) -> pd.DataFrame:
+    """Tetos visíveis para o usuário logado: todos para admin/cocam, senão os do seu setor."""
+    if not os.path.exists(db_path):
+        return pd.DataFrame()
+    return carregar_particoes_tetos(versao_distribuicao(db_path), db_path).particao(
+        st.session_state.get("setor"), st.session_state.get("perfil")
+    )
@@ -0,0 +1,314 @@
+# ---------------------------------------------------------
+# arquivo: hooks/regra_decodificada.py
+# ---------------------------------------------------------
+"""
+Modelo de uma linha de `tf_cadastro_regras_negocio` com os campos JSON
+decodificados uma única vez.
+
+Os renderizadores (card e PDF, via hooks.render_iniciativas) leem as
+mesmas visões derivadas: cada JSON passa por `json.loads` uma vez, o
+DataFrame da distribuição é montado uma vez e o agrupamento por
+(Unidade, Ação) atende tanto à tabela por unidade quanto às tabelas
+por eixo.
+"""
+import json
+from datetime import datetime
+from functools import cached_property
+from itertools import groupby
+
+import pandas as pd
+
+# colunas da distribuição que não são eixos temáticos
+COLUNAS_BASE_DISTRIBUICAO = {"Unidade", "Acao", "Valor Alocado", "Distribuir"}
+
+
+class RegraDecodificada:
+    """
+    Uma versão (linha) da regra de negócio de uma iniciativa.
+
+    `row` pode ser um dict ou uma linha de DataFrame; os mapas traduzem os
+    ids de ações de manejo e de insumos em nomes.
+    """
+
+    def __init__(self, row, acoes_map: dict, insumos_map: dict):
+        self.row = row
+        self.acoes_map = acoes_map
+        self.insumos_map = insumos_map
+        self._json = {}
+
+    @property
+    def id_iniciativa(self):
+        return self.row.get('id_iniciativa', '')
+
+    @property
+    def nome_iniciativa(self):
+        return self.row.get('nome_iniciativa', '')
+
+    def json(self, campo: str) -> tuple:
+        """(dados, erro) do campo JSON; decodificado apenas na primeira chamada."""
+        if campo not in self._json:
+            texto = self.row.get(campo, '') or ''
+            try:
+                self._json[campo] = (json.loads(texto), None)
+            except Exception as e:
+                self._json[campo] = (None, e)
+        return self._json[campo]
+
+    # -----------------------------------------------------
+    # Eixos temáticos
+    # -----------------------------------------------------
+    @cached_property
+    def linhas_eixos(self) -> list[dict]:
+        """
+        Uma linha por (eixo, ação, insumo). Eixos sem ações e ações sem
+        insumos geram uma linha com os campos ausentes em None.
+        """
+        linhas, _ = self._eixos
+        return linhas
+
+    @cached_property
+    def _eixos(self) -> tuple[list[dict], Exception | None]:
+        data, erro = self.json('eixos_tematicos')
+        linhas = []
+        if erro:
+            return linhas, erro
+        try:
+            for indice, eixo in enumerate(data):
+                base = {"indice_eixo": indice, "nome_eixo": eixo.get("nome_eixo")}
+                acoes = eixo.get("acoes_manejo", {})
+                if not acoes:
+                    linhas.append({**base, "acao_id": None, "acao_nome": None,
+                                   "insumo_id": None, "insumo_nome": None, "especificacao": None})
+                    continue
+                for acao_id, detalhes in acoes.items():
+                    nome_acao = self.acoes_map.get(str(acao_id), f"Ação {acao_id}")
+                    especificacoes = detalhes.get("especificacao_padrao", {})
+                    insumos_list = detalhes.get("insumos", [])
+                    if not insumos_list:
+                        linhas.append({**base, "acao_id": acao_id, "acao_nome": nome_acao,
+                                       "insumo_id": None, "insumo_nome": None, "especificacao": None})
+                    for ins_id in insumos_list:
+                        linhas.append({
+                            **base,
+                            "acao_id": acao_id,
+                            "acao_nome": nome_acao,
+                            "insumo_id": ins_id,
+                            "insumo_nome": self.insumos_map.get(str(ins_id), str(ins_id)),
+                            "especificacao": especificacoes.get(str(ins_id), "Sem especificação"),
+                        })
+        except Exception as e:
+            return linhas, e
+        return linhas, None
+
+    @cached_property
+    def eixos_tematicos(self) -> list[dict] | str:
+        """Visão do template: (eixo, ação, insumos agrupados por especificação)."""
+        data, _ = self.json('eixos_tematicos')
+        linhas, erro = self._eixos
+        if erro:
+            return f"Erro ao gerar tabela de Eixos Temáticos: {str(erro)}"
+        if not data:
+            return "Nenhum eixo temático cadastrado."
+
+        resultado = []
+        for _, grupo in groupby(linhas, key=lambda l: (l["indice_eixo"], l["acao_id"])):
+            grupo = list(grupo)
+            primeira = grupo[0]
+            insumos_por_especificacao = {}
+            for linha in grupo:
+                if linha["insumo_id"] is not None:
+                    insumos_por_especificacao.setdefault(linha["especificacao"], []).append(linha["insumo_nome"])
+            resultado.append({
+                "eixo": primeira["nome_eixo"] or "Sem nome",
+                "acao": primeira["acao_nome"],
+                "insumos": insumos_por_especificacao if primeira["acao_id"] is not None else None,
+            })
+        return resultado
+
+    # -----------------------------------------------------
+    # Distribuição por unidade / eixo
+    # -----------------------------------------------------
+    @cached_property
+    def colunas_eixos(self) -> list[str]:
+        return [col for col in self.df_distribuicao.columns if col not in COLUNAS_BASE_DISTRIBUICAO]
+
+    @cached_property
+    def df_distribuicao(self) -> pd.DataFrame:
+        data, erro = self.json('distribuicao_ucs')
+        if erro:
+            raise erro
+        return pd.DataFrame(data)
+
+    @cached_property
+    def agregado_uc(self) -> pd.DataFrame:
+        """Valor alocado e valor de cada eixo somados por (Unidade, Ação) — um único groupby."""
+        return self.df_distribuicao.groupby(["Unidade", "Acao"], as_index=False)[
+            self.colunas_eixos + ["Valor Alocado"]
+        ].sum()
+
+    def _distribuicao_vazia(self) -> str | None:
+        data, erro = self.json('distribuicao_ucs')
+        if erro:
+            raise erro
+        if not data or not isinstance(data, list):
+            return "Nenhuma informação de distribuição."
+        return None
+
+    @cached_property
+    def distribuicao_ucs(self) -> list[dict] | str:
+        """Visão do template: valor alocado por (unidade, ação)."""
+        try:
+            mensagem = self._distribuicao_vazia()
+            if mensagem:
+                return mensagem
+            return [
+                {"unidade": unidade, "acao": acao, "valor": valor}
+                for unidade, acao, valor in self.agregado_uc[["Unidade", "Acao", "Valor Alocado"]].itertuples(index=False)
+            ]
+        except Exception as e:
+            return f"Erro ao formatar distribuição por unidade: {str(e)}"
+
+    @cached_property
+    def distribuicao_por_eixo(self) -> dict | str:
+        """Visão do template: linhas e total de cada eixo, mais o resumo por eixo."""
+        try:
+            mensagem = self._distribuicao_vazia()
+            if mensagem:
+                return mensagem
+            if not self.colunas_eixos:
+                return "Nenhum eixo temático identificado."
+
+            eixos = []
+            for eixo in self.colunas_eixos:
+                df_eixo = self.agregado_uc[self.agregado_uc[eixo] > 0]
+                if df_eixo.empty:
+                    continue
+                linhas = [
+                    {"unidade": unidade, "acao": acao, "valor": float(valor)}
+                    for unidade, acao, valor in df_eixo[["Unidade", "Acao", eixo]].itertuples(index=False)
+                ]
+                eixos.append({"nome": eixo, "linhas": linhas, "total": sum(l["valor"] for l in linhas)})
+
+            resumo = sorted(((e["nome"], e["total"]) for e in eixos), key=lambda x: x[0])
+            return {"eixos": eixos, "resumo": resumo}
+        except Exception as e:
+            return f"Erro ao gerar distribuição: {str(e)}"
+
+    # -----------------------------------------------------
+    # Formas de contratação
+    # -----------------------------------------------------
+    @cached_property
+    def linhas_formas(self) -> list[dict]:
+        """Uma linha por forma de contratação (Forma, Selecionado)."""
+        data, erro = self.json('formas_contratacao')
+        if erro:
+            return []
+        try:
+            return [
+                {
+                    "Forma de Contratação": item.get("Forma de Contratação", "Sem descrição"),
+                    "Selecionado": item.get("Selecionado", False),
+                }
+                for item in data.get("tabela_formas", [])
+            ]
+        except Exception:
+            return []
+
+    @cached_property
+    def formas_contratacao(self) -> dict | str:
+        """Visão do template: tabela de seleção + detalhes por forma."""
+        data, erro = self.json('formas_contratacao')
+        try:
+            if erro:
+                raise erro
+            if not data:
+                return "Nenhuma forma de contratação cadastrada."
+            tabela = [
+                {
+                    "forma": str(linha["Forma de Contratação"]),
+                    "status": "✅ Selecionado" if linha["Selecionado"] else "❌ Não selecionado",
+                }
+                for linha in self.linhas_formas
+            ]
+            detalhes = [
+                {
+                    "forma": forma,
+                    # listas viram <ul> no template; os demais valores, texto
+                    "campos": [(k, v if isinstance(v, list) else str(v)) for k, v in (dict_det or {}).items()],
+                }
+                for forma, dict_det in data.get("detalhes_por_forma", {}).items()
+            ]
+            return {"tabela": tabela, "detalhes": detalhes}
+        except Exception as e:
+            return f"Erro ao formatar as formas de contratação: {str(e)}"
+
+    # -----------------------------------------------------
+    # Demais campos
+    # -----------------------------------------------------
+    @cached_property
+    def objetivos_especificos(self) -> list[str] | str:
+        data, erro = self.json('objetivos_especificos')
+        if erro:
+            return self.row.get('objetivos_especificos', '') or ''
+        if isinstance(data, list):
+            return [str(item) for item in data]
+        if isinstance(data, dict):
+            return [f"{k}: {v}" for k, v in data.items()]
+        return str(data)
+
+    @cached_property
+    def insumos(self) -> list[str] | str:
+        """Descrições dos insumos selecionados, em ordem alfabética."""
+        data, erro = self.json('insumos')
+        texto = str(self.row.get('insumos', '') or '')
+        if erro:
+            return texto
+        try:
+            if isinstance(data, list):
+                result = [self.insumos_map.get(str(insumo), str(insumo)) for insumo in data]
+                if not result:
+                    return "Nenhum insumo cadastrado."
+                return ["- " + nome for nome in sorted(result, key=lambda x: x.lower())]
+            elif isinstance(data, dict):
+                return [f"{k}: {v}" for k, v in sorted(data.items(), key=lambda x: str(x[0]).lower())]
+            return str(data)
+        except Exception:
+            return texto
+
+    @cached_property
+    def demais_informacoes(self) -> dict | str:
+        data, erro = self.json('demais_informacoes')
+        if erro:
+            return "Erro ao carregar informações."
+        if not data:
+            return "Sem informações adicionais."
+        return {
+            campo: data.get(campo, "Não informado")
+            for campo in ("diretoria", "usuario_nome", "usuario_email", "perfil")
+        }
+
+    @cached_property
+    def data_hora_formatada(self) -> str:
+        data_hora_str = self.row.get('data_hora')
+        if data_hora_str:
+            return datetime.strptime(data_hora_str, '%Y-%m-%d %H:%M:%S').strftime('%d/%m/%Y %H:%M')
+        return "(sem data)"
+
+    def contexto(self) -> dict:
+        """Contexto comum aos templates do card e da seção do PDF."""
+        return {
+            "nome_iniciativa": self.nome_iniciativa,
+            "objetivo_geral": self.row.get('objetivo_geral', ''),
+            "introducao": self.row.get('introducao', ''),
+            "justificativa": self.row.get('justificativa', ''),
+            "metodologia": self.row.get('metodologia', ''),
+            "responsavel": self.row.get('usuario', ''),
+            "data_hora": self.data_hora_formatada,
+            "objetivos_especificos": self.objetivos_especificos,
+            "eixos_tematicos": self.eixos_tematicos,
+            "insumos": self.insumos,
+            "distribuicao_ucs": self.distribuicao_ucs,
+            "distribuicao_por_eixo": self.distribuicao_por_eixo,
+            "formas_contratacao": self.formas_contratacao,
+            "demais_informacoes": self.demais_informacoes,
+        }
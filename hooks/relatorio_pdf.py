@@ -0,0 +1,112 @@
+# ---------------------------------------------------------
+# arquivo: hooks/relatorio_pdf.py
+# ---------------------------------------------------------
+"""
+Geração do extrato em PDF com uma seção por iniciativa.
+
+Cada seção (documento HTML completo) é renderizada pelo xhtml2pdf em um
+processo separado; os PDFs parciais são unidos com pypdf, precedidos de
+um sumário com o número da página de cada iniciativa e com marcadores
+(outline) para navegação.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+from markupsafe import Markup
+from pypdf import PdfReader, PdfWriter
+from xhtml2pdf import pisa
+
+from hooks.templates_html import renderizar
+
+
+def documento_html(corpo: str) -> str:
+    """Envolve um fragmento HTML (já renderizado) no documento com o CSS do relatório."""
+    return renderizar("pdf/documento.html", corpo=Markup(corpo))
+
+
+def renderizar_secao_pdf(html_string: str) -> bytes:
+    """Renderiza um documento HTML em PDF (executado nos processos do pool)."""
+    pdf_buffer = BytesIO()
+    pisa_status = pisa.CreatePDF(src=html_string, dest=pdf_buffer, encoding='utf-8')
+    if pisa_status.err:
+        raise ValueError(f"Erro ao gerar PDF com xhtml2pdf: {pisa_status.log}")
+    return pdf_buffer.getvalue()
+
+
+def _html_sumario(titulo: str, entradas: list[tuple[str, int]]) -> str:
+    return documento_html(renderizar("pdf/sumario.html", titulo=titulo, entradas=entradas))
+
+
+def _contar_paginas(pdf_bytes: bytes) -> int:
+    return len(PdfReader(BytesIO(pdf_bytes)).pages)
+
+
+def montar_relatorio_pdf(
+    secoes: list[tuple[str, str | bytes]],
+    titulo: str = "Relatório de Iniciativas e Regras de Negócio",
+    progresso=None,
+    max_workers: int | None = None
+) -> bytes:
+    """
+    Renderiza `secoes` ([(titulo_da_secao, documento_html), ...]) em paralelo
+    e devolve um único PDF com sumário e marcadores, na ordem recebida.
+    Seções já renderizadas (bytes do PDF, ex.: hooks.arquivo_relatorios)
+    entram direto na concatenação, sem passar pelo xhtml2pdf.
+    `progresso` segue o contrato de hooks.jobs_exportacao.ProgressoJob.
+    """
+    total = len(secoes)
+    pdfs: list[bytes | None] = [
+        conteudo if isinstance(conteudo, bytes) else None for _, conteudo in secoes
+    ]
+    pendentes = [i for i, pdf in enumerate(pdfs) if pdf is None]
+    prontas = total - len(pendentes)
+    if progresso:
+        progresso(tabelas_concluidas=prontas, total_tabelas=total, mensagem="Renderizando seções")
+
+    # "spawn": o servidor do Streamlit tem várias threads, e fork nesse estado não é seguro
+    contexto = multiprocessing.get_context("spawn")
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(pendentes)))
+
+    if len(pendentes) == 1:
+        pdfs[pendentes[0]] = renderizar_secao_pdf(secoes[pendentes[0]][1])
+    elif len(pendentes) > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as executor:
+            futuros = {
+                executor.submit(renderizar_secao_pdf, secoes[i][1]): i
+                for i in pendentes
+            }
+            for concluidas, futuro in enumerate(as_completed(futuros), start=prontas + 1):
+                pdfs[futuros[futuro]] = futuro.result()
+                if progresso:
+                    progresso(tabelas_concluidas=concluidas, mensagem=f"{concluidas} de {total} seções renderizadas")
+
+    if progresso:
+        progresso(tabelas_concluidas=total, mensagem="Montando sumário e unindo páginas")
+
+    # páginas de cada seção -> página inicial (1-based) após o sumário
+    paginas_secao = [_contar_paginas(pdf) for pdf in pdfs]
+    paginas_sumario = 1
+    for _ in range(2):
+        inicio = paginas_sumario + 1
+        entradas = []
+        for (nome, _), n_paginas in zip(secoes, paginas_secao):
+            entradas.append((nome, inicio))
+            inicio += n_paginas
+        sumario = renderizar_secao_pdf(_html_sumario(titulo, entradas))
+        # o sumário pode ocupar mais de uma página: recalcula uma vez se necessário
+        if _contar_paginas(sumario) == paginas_sumario:
+            break
+        paginas_sumario = _contar_paginas(sumario)
+
+    writer = PdfWriter()
+    writer.append(PdfReader(BytesIO(sumario)))
+    writer.add_outline_item("Sumário", 0)
+    for (nome, _), pdf, (_, pagina) in zip(secoes, pdfs, entradas):
+        writer.append(PdfReader(BytesIO(pdf)))
+        writer.add_outline_item(nome, pagina - 1)
+
+    saida = BytesIO()
+    writer.write(saida)
+    return saida.getvalue()
@@ -0,0 +1,238 @@
+# ---------------------------------------------------------
+# arquivo: hooks/render_iniciativas.py
+# ---------------------------------------------------------
+"""
+Renderização das iniciativas em HTML (card da tela e seção do extrato PDF)
+e cache persistente dos fragmentos renderizados. O HTML vem dos templates
+Jinja2 em `templates/iniciativa/`, alimentados pelas visões de
+hooks.regra_decodificada.RegraDecodificada.
+
+Cada gravação de regra de negócio cria uma nova linha em
+`tf_cadastro_regras_negocio`, logo o `id` da regra identifica a versão da
+iniciativa. Os fragmentos ficam em `tf_cache_fragmentos`, chaveados por
+(id_iniciativa, versão, formato), e são gerados no momento do salvamento;
+a visualização e o PDF apenas concatenam HTML pronto.
+"""
+import sqlite3
+from contextlib import contextmanager
+
+from hooks.exportacao_delta import versao_tabela
+from hooks.regra_decodificada import RegraDecodificada
+from hooks.templates_html import renderizar
+
+# Incrementar sempre que o HTML gerado mudar: invalida todo o cache
+VERSAO_RENDER = 2
+
+FORMATO_CARD = "card"
+FORMATO_PDF = "pdf"
+
+DB_PATH = "database/app_data.db"
+
+# limite do cache (soma dos fragmentos); os menos acessados saem primeiro
+LIMITE_CACHE_BYTES = 64 * 1024 * 1024
+
+# `ultimo_acesso` só é regravado quando é mais antigo que isto: exibir um
+# card não vira uma transação de escrita a cada leitura
+INTERVALO_TOQUE_MINUTOS = 60
+
+
+def carregar_mapas(conn: sqlite3.Connection) -> tuple[dict, dict]:
+    """Retorna (id_acao -> nome_acao, id_insumo -> descricao_insumo)."""
+    acoes_map = {
+        str(id_ac): nome
+        for id_ac, nome in conn.execute("SELECT id_ac, nome FROM td_samge_acoes_manejo")
+    }
+    insumos_map = {
+        str(id_insumo): descricao
+        for id_insumo, descricao in conn.execute("SELECT id, descricao_insumo FROM td_insumos")
+    }
+    return acoes_map, insumos_map
+
+
+# ---------------------------------------------------------
+# Card (tela) e seção (PDF)
+# ---------------------------------------------------------
+def html_card_iniciativa(regra: RegraDecodificada) -> str:
+    """Card HTML de uma iniciativa para a tela de visualização."""
+    return renderizar("iniciativa/card.html", **regra.contexto())
+
+
+def html_secao_iniciativa(regra: RegraDecodificada) -> str:
+    """Fragmento HTML (preto e branco) de uma iniciativa para o extrato em PDF."""
+    return renderizar("iniciativa/secao_pdf.html", **regra.contexto())
+
+
+RENDERIZADORES = {
+    FORMATO_CARD: html_card_iniciativa,
+    FORMATO_PDF: html_secao_iniciativa,
+}
+
+
+# ---------------------------------------------------------
+# Cache persistente de fragmentos
+# ---------------------------------------------------------
+@contextmanager
+def abrir_cache_fragmentos(db_path: str = DB_PATH):
+    """`CacheFragmentos` com uma conexão própria, fechada ao sair do bloco."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        yield CacheFragmentos(conn)
+    finally:
+        conn.close()
+
+
+def garantir_cache_fragmentos(conn: sqlite3.Connection) -> None:
+    """Cria (se não existir) a tabela do cache de fragmentos. Idempotente."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tf_cache_fragmentos (
+            id_iniciativa INTEGER NOT NULL,
+            versao INTEGER NOT NULL,                -- id da linha em tf_cadastro_regras_negocio
+            formato TEXT NOT NULL,                  -- card | pdf
+            versao_dependencias TEXT NOT NULL,      -- VERSAO_RENDER + versão de td_insumos
+            html TEXT NOT NULL,
+            tamanho INTEGER NOT NULL,
+            ultimo_acesso TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+            PRIMARY KEY (id_iniciativa, versao, formato)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_cache_fragmentos_acesso
+        ON tf_cache_fragmentos (ultimo_acesso)
+    """)
+    conn.commit()
+
+
+class CacheFragmentos:
+    """
+    Fragmentos HTML por (id_iniciativa, versão, formato).
+
+    Os nomes de ações e insumos entram no HTML, por isso a chave também
+    registra a versão de `td_insumos` no log de alterações (as ações de
+    manejo só mudam pelo init_db, que marca recarga de td_insumos):
+    quando ela muda, os fragmentos antigos são renderizados de novo.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, limite_bytes: int = LIMITE_CACHE_BYTES):
+        self.conn = conn
+        self.limite_bytes = limite_bytes
+        self._mapas = None
+        self._versao_dependencias = None
+        garantir_cache_fragmentos(conn)
+
+    @property
+    def mapas(self) -> tuple[dict, dict]:
+        if self._mapas is None:
+            self._mapas = carregar_mapas(self.conn)
+        return self._mapas
+
+    @property
+    def versao_dependencias(self) -> str:
+        if self._versao_dependencias is None:
+            self._versao_dependencias = f"{VERSAO_RENDER}.{versao_tabela(self.conn, 'td_insumos')}"
+        return self._versao_dependencias
+
+    def obter(self, row, formato: str, regra: RegraDecodificada | None = None) -> str:
+        """
+        Devolve o fragmento da linha da regra; renderiza e grava se faltar.
+        `regra` permite reaproveitar uma decodificação já feita da mesma linha.
+        """
+        chave = (int(row['id_iniciativa']), int(row['id']), formato)
+        encontrado = self.conn.execute(
+            """
+            SELECT html, ultimo_acesso < strftime('%Y-%m-%d %H:%M:%f', 'now', ?)
+            FROM tf_cache_fragmentos
+            WHERE id_iniciativa = ? AND versao = ? AND formato = ? AND versao_dependencias = ?
+            """,
+            (f"-{INTERVALO_TOQUE_MINUTOS} minutes", *chave, self.versao_dependencias)
+        ).fetchone()
+        if encontrado:
+            html, desatualizado = encontrado
+            if not desatualizado:
+                return html
+            self.conn.execute(
+                """
+                UPDATE tf_cache_fragmentos
+                SET ultimo_acesso = strftime('%Y-%m-%d %H:%M:%f', 'now')
+                WHERE id_iniciativa = ? AND versao = ? AND formato = ?
+                """,
+                chave
+            )
+            self.conn.commit()
+            return html
+
+        if regra is None:
+            regra = RegraDecodificada(row, *self.mapas)
+        fragmento = RENDERIZADORES[formato](regra)
+        self._gravar(chave, fragmento)
+        return fragmento
+
+    def ler_regra(self, id_regra: int) -> dict | None:
+        """Linha completa da regra (com o nome da iniciativa), ou None."""
+        cursor = self.conn.execute(
+            """
+            SELECT r.*, i.nome_iniciativa
+            FROM tf_cadastro_regras_negocio r
+            JOIN td_iniciativas i ON r.id_iniciativa = i.id_iniciativa
+            WHERE r.id = ?
+            """,
+            (id_regra,)
+        )
+        valores = cursor.fetchone()
+        if valores is None:
+            return None
+        return dict(zip([c[0] for c in cursor.description], valores))
+
+    def aquecer(self, id_regra: int) -> dict | None:
+        """
+        Renderiza todos os formatos de uma regra recém-salva e descarta os
+        fragmentos das versões anteriores da mesma iniciativa. Retorna a linha.
+        """
+        row = self.ler_regra(id_regra)
+        if row is None:
+            return None
+
+        self.conn.execute(
+            "DELETE FROM tf_cache_fragmentos WHERE id_iniciativa = ? AND versao < ?",
+            (row['id_iniciativa'], row['id'])
+        )
+        # os formatos compartilham a mesma decodificação da linha
+        regra = RegraDecodificada(row, *self.mapas)
+        for formato in RENDERIZADORES:
+            self.obter(row, formato, regra)
+        return row
+
+    def _gravar(self, chave: tuple, fragmento: str) -> None:
+        tamanho = len(fragmento.encode("utf-8"))
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO tf_cache_fragmentos
+                (id_iniciativa, versao, formato, versao_dependencias, html, tamanho)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (*chave, self.versao_dependencias, fragmento, tamanho)
+        )
+        self._limitar_tamanho()
+        self.conn.commit()
+
+    def _limitar_tamanho(self) -> None:
+        """Remove os fragmentos menos acessados até caber no limite."""
+        total = self.conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM tf_cache_fragmentos").fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+        excedente = total - self.limite_bytes
+        removidos = []
+        for id_iniciativa, versao, formato, tamanho in self.conn.execute(
+            """
+            SELECT id_iniciativa, versao, formato, tamanho
+            FROM tf_cache_fragmentos
+            ORDER BY ultimo_acesso
+            """
+        ):
+            if excedente <= 0:
+                break
+            removidos.append((id_iniciativa, versao, formato))
+            excedente -= tamanho
+        self.conn.executemany(
+            "DELETE FROM tf_cache_fragmentos WHERE id_iniciativa = ? AND versao = ? AND formato = ?",
+            removidos
+        )
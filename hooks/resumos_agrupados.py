@@ -0,0 +1,100 @@
+# ---------------------------------------------------------
+# arquivo: hooks/resumos_agrupados.py
+# ---------------------------------------------------------
+"""
+Totais "por <coluna>" da Consulta de Iniciativas, memorizados.
+
+`ResumosAgrupados` calcula o resumo de uma coluna de agrupamento sob uma
+máscara de filtros apenas na primeira vez em que é pedido e guarda o
+resultado, com a chave (bitmap da máscara, coluna). Como fica junto do
+índice de facetas (cache de recurso), trocar de agrupamento ou voltar a
+uma combinação de filtros já vista — em qualquer sessão — não recalcula
+nada. Percentuais e barras de progresso são vetorizados.
+"""
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+COLUNA_INICIATIVA = "Nome da Proposta/Iniciativa Estruturante"
+COLUNA_UC = "Unidade de Conservação"
+COLUNAS_VALORES = ["VALOR TOTAL ALOCADO", "Valor Total da Iniciativa", "SALDO"]
+
+BLOCOS_PROGRESSO = 10
+_BARRAS_NORMAIS = np.array(["🟩" * i + "⬜" * (BLOCOS_PROGRESSO - i) for i in range(BLOCOS_PROGRESSO + 1)])
+_BARRAS_EXCESSO = np.array(["🟧" * i + "⬜" * (BLOCOS_PROGRESSO - i) for i in range(BLOCOS_PROGRESSO + 1)])
+
+
+def percentual(parte, total) -> np.ndarray:
+    """parte / total * 100, com 0 onde o total é 0 (ou o resultado não é finito), em 2 casas."""
+    parte = np.asarray(parte, dtype="float64")
+    total = np.asarray(total, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resultado = np.where(total > 0, parte / total * 100, 0.0)
+    return np.round(np.nan_to_num(resultado, nan=0.0, posinf=0.0, neginf=0.0), 2)
+
+
+def barras_progresso(percentuais) -> np.ndarray:
+    """Barra de 10 blocos por percentual: verde até 100%, laranja acima (excesso)."""
+    percentuais = np.nan_to_num(np.asarray(percentuais, dtype="float64"), nan=0.0)
+    preenchidos = np.clip(np.trunc(percentuais / 100 * BLOCOS_PROGRESSO), 0, BLOCOS_PROGRESSO).astype(int)
+    return np.where(percentuais > 100, _BARRAS_EXCESSO[preenchidos], _BARRAS_NORMAIS[preenchidos])
+
+
+class ResumosAgrupados:
+    """Resumos por coluna de `df`, memorizados por (máscara de filtros, coluna)."""
+
+    def __init__(self, df: pd.DataFrame, limite: int = 256):
+        self.df = df
+        self.limite = limite
+        self._memoria = OrderedDict()
+        self._lock = Lock()
+
+    def totais(self, mascara: np.ndarray, coluna_grupo: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        (tabela por `coluna_grupo` com a linha "Total Geral", itens omissos na soma)
+        para as linhas de `df` selecionadas por `mascara` (array booleano).
+        Os DataFrames devolvidos são compartilhados: não devem ser alterados.
+        """
+        chave = (np.packbits(mascara).tobytes(), coluna_grupo)
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                return self._memoria[chave]
+
+        resultado = self._calcular(self.df[mascara], coluna_grupo)
+        with self._lock:
+            self._memoria[chave] = resultado
+            while len(self._memoria) > self.limite:
+                self._memoria.popitem(last=False)
+        return resultado
+
+    @staticmethod
+    def _calcular(df: pd.DataFrame, coluna_grupo: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+        df_total = df.groupby(coluna_grupo, observed=True).agg(
+            **{
+                "Total de Iniciativas": (COLUNA_INICIATIVA, "nunique"),
+                "Total de UCs": (COLUNA_UC, "nunique"),
+            },
+            **{coluna: (coluna, "sum") for coluna in COLUNAS_VALORES},
+        ).reset_index()
+        df_total[coluna_grupo] = df_total[coluna_grupo].astype(object)
+
+        df_total["% Valor Alocado"] = percentual(df_total["VALOR TOTAL ALOCADO"], df_total["Valor Total da Iniciativa"])
+        df_total["Progresso"] = barras_progresso(df_total["% Valor Alocado"])
+
+        somas = df_total[COLUNAS_VALORES].sum()
+        total_geral = pd.DataFrame({
+            coluna_grupo: ["Total Geral"],
+            "Total de Iniciativas": [df_total["Total de Iniciativas"].sum()],
+            "Total de UCs": [df_total["Total de UCs"].sum()],
+            **{coluna: [somas[coluna]] for coluna in COLUNAS_VALORES},
+            "% Valor Alocado": [somas["VALOR TOTAL ALOCADO"] / somas["Valor Total da Iniciativa"] * 100
+                                if somas["Valor Total da Iniciativa"] else 0.0],
+        })
+        df_total = pd.concat([df_total, total_geral], ignore_index=True)
+
+        # registros que ficam fora da soma (alocado + total da iniciativa = 0)
+        itens_omissos = df[df["VALOR TOTAL ALOCADO"] + df["Valor Total da Iniciativa"] == 0]
+        return df_total, itens_omissos
@@ -0,0 +1,52 @@
+# ---------------------------------------------------------
+# arquivo: hooks/templates_html.py
+# ---------------------------------------------------------
+"""
+Ambiente Jinja2 compartilhado pelos cards da tela e pelo extrato em PDF.
+
+Os templates ficam em `templates/` (raiz do projeto), são compilados uma
+única vez por processo e renderizados com autoescape: valores vindos do
+banco nunca precisam de `html.escape` manual.
+"""
+import os
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup, escape
+
+from hooks.dinheiro import formatar_real
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+
+def formatar_moeda_br(valor) -> str:
+    """Converte float p/ estilo brasileiro (1.234,56)."""
+    if valor is None or valor == "":
+        return ""
+    try:
+        val = float(valor)
+    except (TypeError, ValueError):
+        return str(valor)
+    return formatar_real(val, prefixo="")
+
+
+def quebras_de_linha(valor) -> Markup:
+    """Escapa o texto e converte quebras de linha em <br>."""
+    if valor is None:
+        valor = ""
+    return Markup(str(escape(str(valor))).replace("\n", "<br>"))
+
+
+ambiente = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+ambiente.filters["moeda_br"] = formatar_moeda_br
+ambiente.filters["quebras"] = quebras_de_linha
+
+
+def renderizar(nome_template: str, **contexto) -> str:
+    """Renderiza um template; a saída é gerada em partes e unida uma única vez."""
+    return "".join(ambiente.get_template(nome_template).generate(**contexto))
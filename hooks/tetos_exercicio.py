@@ -0,0 +1,159 @@
+# ---------------------------------------------------------
+# arquivo: hooks/tetos_exercicio.py
+# ---------------------------------------------------------
+"""
+Tetos da distribuição por exercício, em formato longo.
+
+A planilha de elegíveis traz uma coluna `TetoPrevisto <ano>` por exercício,
+além do saldo disponível (`TetoSaldo disponível`). Os exercícios são
+detectados pelo nome da coluna (`ANO_TETO_PREVISTO`), de modo que um novo
+ciclo (2028, ...) não exige mudança de código, e os valores são gravados em
+`tf_distribuicao_tetos` (linha da distribuição, exercício, valor), com
+chave (id_distribuicao, exercicio) e índice por exercício. O saldo
+disponível fica no exercício 0 (`EXERCICIO_SALDO`); o teto total é a soma
+por linha (visão `vw_distribuicao_teto_total`).
+
+As colunas largas continuam em `tf_distribuicao_elegiveis` para as telas
+de edição; somas e gráficos por exercício saem de uma única consulta na
+tabela longa.
+"""
+import json
+import re
+import sqlite3
+
+import pandas as pd
+
+from hooks.dinheiro import arredondar_reais
+
+COLUNA_SALDO = "TetoSaldo disponível"
+EXERCICIO_SALDO = 0
+
+# "TetoPrevisto 2025" (banco / planilha) ou "TetoPrevisto2025" (nomes renomeados nas páginas)
+ANO_TETO_PREVISTO = re.compile(r"^TetoPrevisto ?(\d{4})$")
+
+
+def exercicios_colunas(colunas) -> dict[int, str]:
+    """{ano: coluna} das colunas de teto previsto, em ordem de ano."""
+    encontrados = {}
+    for coluna in colunas:
+        correspondencia = ANO_TETO_PREVISTO.match(str(coluna))
+        if correspondencia:
+            encontrados[int(correspondencia.group(1))] = coluna
+    return dict(sorted(encontrados.items()))
+
+
+def colunas_teto(colunas) -> list[str]:
+    """Colunas de teto por exercício presentes em `colunas`: o saldo e os previstos por ano."""
+    colunas = list(colunas)
+    saldo = [COLUNA_SALDO] if COLUNA_SALDO in colunas else []
+    return saldo + list(exercicios_colunas(colunas).values())
+
+
+def eh_coluna_teto(coluna: str) -> bool:
+    return coluna == COLUNA_SALDO or ANO_TETO_PREVISTO.match(str(coluna)) is not None
+
+
+def rotulo_exercicio(exercicio: int) -> str:
+    return "Teto Saldo Disponível" if exercicio == EXERCICIO_SALDO else f"Teto Previsto {exercicio}"
+
+
+def rotulo_teto(coluna: str) -> str:
+    """'TetoPrevisto 2025' -> 'Teto Previsto 2025'; o saldo -> 'Teto Saldo Disponível'."""
+    if coluna in (COLUNA_SALDO, "TetoSaldoDisponivel"):
+        return rotulo_exercicio(EXERCICIO_SALDO)
+    correspondencia = ANO_TETO_PREVISTO.match(str(coluna))
+    return rotulo_exercicio(int(correspondencia.group(1))) if correspondencia else coluna
+
+
+def garantir_tetos_exercicio(conn: sqlite3.Connection) -> None:
+    """
+    Cria (se não existirem) a tabela longa, o índice e a visão do total. Na
+    primeira execução a tabela é preenchida a partir das colunas largas.
+    Idempotente.
+    """
+    existia = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tf_distribuicao_tetos'"
+    ).fetchone() is not None
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tf_distribuicao_tetos (
+            id_distribuicao INTEGER NOT NULL,   -- tf_distribuicao_elegiveis.id
+            exercicio INTEGER NOT NULL,         -- ano; 0 = saldo disponível
+            valor REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (id_distribuicao, exercicio)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_distribuicao_tetos_exercicio
+        ON tf_distribuicao_tetos (exercicio)
+    """)
+    conn.execute("""
+        CREATE VIEW IF NOT EXISTS vw_distribuicao_teto_total AS
+        SELECT id_distribuicao, SUM(valor) AS teto_total
+        FROM tf_distribuicao_tetos
+        GROUP BY id_distribuicao
+    """)
+    if not existia:
+        sincronizar_tetos_exercicio(conn)
+    conn.commit()
+
+
+def tetos_longos(df: pd.DataFrame) -> pd.DataFrame:
+    """(id_distribuicao, exercicio, valor) a partir das colunas largas de `df` (com a coluna `id`)."""
+    colunas = {EXERCICIO_SALDO: COLUNA_SALDO} if COLUNA_SALDO in df.columns else {}
+    colunas.update(exercicios_colunas(df.columns))
+    if df.empty or not colunas:
+        return pd.DataFrame(columns=["id_distribuicao", "exercicio", "valor"])
+    longo = df[["id"] + list(colunas.values())].rename(
+        columns={"id": "id_distribuicao", **{coluna: ano for ano, coluna in colunas.items()}}
+    ).melt(id_vars="id_distribuicao", var_name="exercicio", value_name="valor")
+    longo["exercicio"] = longo["exercicio"].astype(int)
+    longo["valor"] = arredondar_reais(longo["valor"])
+    return longo
+
+
+def sincronizar_tetos_exercicio(conn: sqlite3.Connection) -> int:
+    """Recria `tf_distribuicao_tetos` a partir de `tf_distribuicao_elegiveis` (sem commit)."""
+    df = pd.read_sql_query("SELECT * FROM tf_distribuicao_elegiveis", conn)
+    longo = tetos_longos(df if "id" in df.columns else pd.DataFrame())
+    conn.execute("DELETE FROM tf_distribuicao_tetos")
+    conn.executemany(
+        "INSERT OR REPLACE INTO tf_distribuicao_tetos (id_distribuicao, exercicio, valor) VALUES (?, ?, ?)",
+        longo.astype(object).itertuples(index=False, name=None)
+    )
+    return len(longo)
+
+
+def resumo_exercicios(conn: sqlite3.Connection, ids=None) -> pd.DataFrame:
+    """
+    Por exercício, em uma consulta: soma dos tetos e média, por linha, do
+    percentual do exercício sobre o teto total (linhas com total zero não
+    entram na média). `ids` restringe às linhas da distribuição informadas.
+    Colunas: exercicio, rotulo, soma, percentual_medio.
+    """
+    query = """
+        SELECT t.exercicio,
+               SUM(CAST(ROUND(t.valor * 100) AS INTEGER)) / 100.0 AS soma,  -- soma exata em centavos
+               AVG(t.valor * 100.0 / NULLIF(tot.teto_total, 0)) AS percentual_medio
+        FROM tf_distribuicao_tetos t
+        JOIN vw_distribuicao_teto_total tot ON tot.id_distribuicao = t.id_distribuicao
+    """
+    params = []
+    if ids is not None:
+        query += " WHERE t.id_distribuicao IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps([int(i) for i in ids]))
+    query += " GROUP BY t.exercicio ORDER BY t.exercicio"
+    df = pd.read_sql_query(query, conn, params=params)
+    df["soma"] = df["soma"].fillna(0)
+    df["percentual_medio"] = df["percentual_medio"].fillna(0)
+    df.insert(1, "rotulo", df["exercicio"].map(rotulo_exercicio))
+    return df
+
+
+def tetos_por_linha(conn: sqlite3.Connection, ids=None) -> pd.DataFrame:
+    """(id_distribuicao, exercicio, valor) das linhas informadas (todas, se `ids` for None)."""
+    query = "SELECT id_distribuicao, exercicio, valor FROM tf_distribuicao_tetos"
+    params = []
+    if ids is not None:
+        query += " WHERE id_distribuicao IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps([int(i) for i in ids]))
+    return pd.read_sql_query(query + " ORDER BY id_distribuicao, exercicio", conn, params=params)
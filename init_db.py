@@ -5,6 +5,14 @@ import sqlite3
 import os
 import streamlit as st
 
+from hooks.exportacao_delta import garantir_log_alteracoes, registrar_recarga, TABELAS_DELTA
+from hooks.exportacoes import ativar_wal
+from hooks.indice_uc import garantir_indice_uc, reconstruir_indice_uc
+from hooks.atributos_uc import anexar_atributos_uc, criar_indices_atributos_uc, garantir_atributos_uc
+from hooks.cubo_alocacoes import garantir_cubo_alocacoes, reconstruir_cubo_alocacoes
+from hooks.dinheiro import arredondar_reais, de_centavos, para_centavos
+from hooks.tetos_exercicio import colunas_teto, garantir_tetos_exercicio, sincronizar_tetos_exercicio
+
 
 def init_database():
     # 📌 Caminhos dos arquivos de dados e do banco
@@ -23,6 +31,7 @@ def init_database():
     # 📌 Criando diretório do banco de dados se não existir
     os.makedirs("database", exist_ok=True)
     conn = sqlite3.connect(db_path)
+    ativar_wal(conn)
     cursor = conn.cursor()
 
     # ----------------------------------------------------------------------------
@@ -147,6 +156,11 @@ def init_database():
     ]
     df_base = df_base[colunas_base]
 
+    # Valores monetários normalizados no centavo (vazios continuam vazios)
+    for col in ["VALOR TOTAL ALOCADO", "Valor da Iniciativa (R$)", "Valor Total da Iniciativa", "SALDO"]:
+        valores = pd.to_numeric(df_base[col], errors="coerce")
+        df_base[col] = pd.Series(arredondar_reais(valores), index=df_base.index).where(valores.notna())
+
     # Criar tabela fixa de consulta
     cursor.execute(""" DROP TABLE IF EXISTS td_dados_base_iniciativas """)
     df_base.to_sql("td_dados_base_iniciativas", conn, if_exists="replace", index=False)
@@ -253,8 +267,16 @@ def init_database():
     # ----------------------------------------------------------------------------
     # CRIA TABELA tf_distribuicao_elegiveis
     # ----------------------------------------------------------------------------
+    # Lê o arquivo base_iniciativas_elegiveis.xlsx
+    df_elegiveis = pd.read_excel(excel_path_elegiveis, engine="openpyxl")
+
+    # Colunas de teto: o saldo disponível e uma "TetoPrevisto <ano>" por exercício
+    # da planilha (detectadas pelo nome; um novo exercício não exige mudança aqui)
+    colunas_tetos = colunas_teto(df_elegiveis.columns)
+    colunas_tetos_sql = ",\n".join(f'            "{col}" REAL' for col in colunas_tetos)
+
     cursor.execute(""" DROP TABLE IF EXISTS tf_distribuicao_elegiveis """)
-    cursor.execute("""
+    cursor.execute(f"""
         CREATE TABLE IF NOT EXISTS tf_distribuicao_elegiveis (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             "DEMANDANTE (diretoria)" TEXT,
@@ -262,42 +284,12 @@ def init_database():
             "AÇÃO DE APLICAÇÃO" TEXT,
             "Unidade de Conservação" TEXT,
             CNUC TEXT,
-            "TetoSaldo disponível" INTEGER,
-            "TetoPrevisto 2025" INTEGER,
-            "TetoPrevisto 2026" INTEGER,
-            "TetoPrevisto 2027" INTEGER,
+{colunas_tetos_sql},
             "TetoTotalDisponivel" INTEGER,
             "A Distribuir" INTEGER
         )
     """)
 
-
-    # Lê o arquivo base_iniciativas_elegiveis.xlsx
-    df_elegiveis = pd.read_excel(excel_path_elegiveis, engine="openpyxl")
-
-    # Garantir que os valores numéricos tenham até 2 casas decimais
-    colunas_numericas = [
-        "TetoSaldo disponível",
-        "TetoPrevisto 2025",
-        "TetoPrevisto 2026",
-        "TetoPrevisto 2027"
-    ]
-
-    # Converte os valores para float e arredonda para 2 casas decimais
-    for col in colunas_numericas:
-        df_elegiveis[col] = pd.to_numeric(df_elegiveis[col], errors="coerce").round(2).fillna(0.00)
-
-    # Criar a coluna "TetoTotalDisponivel" antes de inserir no banco
-    df_elegiveis["TetoTotalDisponivel"] = (
-        df_elegiveis["TetoSaldo disponível"] +
-        df_elegiveis["TetoPrevisto 2025"] +
-        df_elegiveis["TetoPrevisto 2026"] +
-        df_elegiveis["TetoPrevisto 2027"]
-    ).round(2)
-
-    # Inicializa a coluna "A Distribuir" como NULL
-    df_elegiveis["A Distribuir"] = None
-
     # Define as colunas necessárias
     colunas_elegiveis = [
         "DEMANDANTE (diretoria)",
@@ -305,50 +297,29 @@ def init_database():
         "AÇÃO DE APLICAÇÃO",
         "Unidade de Conservação",
         "CNUC",
-        "TetoSaldo disponível",
-        "TetoPrevisto 2025",
-        "TetoPrevisto 2026",
-        "TetoPrevisto 2027",
-        "TetoTotalDisponivel",
-        "A Distribuir"
+        *colunas_tetos
     ]
 
     # Filtra as colunas necessárias (ou renomeie caso sejam diferentes)
     df_distribuicao = df_elegiveis[colunas_elegiveis].copy()
 
-    # (Opcional) Se quiser preencher tetos nulos com zero:
-    df_distribuicao[
-        [
-            "TetoSaldo disponível",
-            "TetoPrevisto 2025",
-            "TetoPrevisto 2026",
-            "TetoPrevisto 2027"
-        ]
-    ] = df_distribuicao[
-        [
-            "TetoSaldo disponível",
-            "TetoPrevisto 2025",
-            "TetoPrevisto 2026",
-            "TetoPrevisto 2027"
-        ]
-    ].fillna(0)
-
+    # Tetos em centavos inteiros (um único arredondamento, na entrada; nulos viram zero):
+    # as somas abaixo são exatas e só no fim voltam a reais
+    for col in colunas_tetos:
+        df_distribuicao[col] = para_centavos(df_distribuicao[col])
 
     # se houverem linhas com unidade e ação de aplicação iguais, mas com diferentes tetos,
     # então, agrupe por unidade e ação de aplicação, somando os tetos
     df_distribuicao = df_distribuicao.groupby(
         ["DEMANDANTE (diretoria)", "Nome da Proposta/Iniciativa Estruturante", "AÇÃO DE APLICAÇÃO", "Unidade de Conservação", "CNUC"],
         as_index=False
-    ).agg({
-        "TetoSaldo disponível": "sum",
-        "TetoPrevisto 2025": "sum",
-        "TetoPrevisto 2026": "sum",
-        "TetoPrevisto 2027": "sum",
-        "TetoTotalDisponivel": "sum"
-    })
-    
-
+    ).agg({col: "sum" for col in colunas_tetos})
 
+    # "TetoTotalDisponivel" = soma dos tetos; "A Distribuir" começa igual a ele
+    df_distribuicao["TetoTotalDisponivel"] = df_distribuicao[colunas_tetos].sum(axis=1)
+    for col in [*colunas_tetos, "TetoTotalDisponivel"]:
+        df_distribuicao[col] = de_centavos(df_distribuicao[col])
+    df_distribuicao["A Distribuir"] = df_distribuicao["TetoTotalDisponivel"]
 
     # Popula a nova tabela tf_distribuicao_elegiveis
     df_distribuicao.to_sql("tf_distribuicao_elegiveis", conn, if_exists="append", index=False)
@@ -372,31 +343,17 @@ def init_database():
 
 
     # ----------------------------------------------------------------------
-    # 3️⃣ Criar a coluna `TetoTotalDisponivel`, se não existir
+    # 3️⃣ Criar a coluna `TetoTotalDisponivel`, se não existir (valores já gravados pelo to_sql)
     # ----------------------------------------------------------------------
     if "TetoTotalDisponivel" not in colunas_existentes:
         cursor.execute('ALTER TABLE tf_distribuicao_elegiveis ADD COLUMN "TetoTotalDisponivel" REAL')
 
-    # Atualizar os valores de `TetoTotalDisponivel`
-    cursor.execute("""
-        UPDATE tf_distribuicao_elegiveis
-        SET TetoTotalDisponivel = COALESCE("TetoSaldo disponível", 0) +
-                                  COALESCE("TetoPrevisto 2025", 0) +
-                                  COALESCE("TetoPrevisto 2026", 0) +
-                                  COALESCE("TetoPrevisto 2027", 0)
-    """)
-
     # ----------------------------------------------------------------------
-    # 4️⃣ Criar a coluna `"A Distribuir"`, se não existir (mas sem calcular ainda)
+    # 4️⃣ Criar a coluna `"A Distribuir"`, se não existir (valores já gravados pelo to_sql)
     # ----------------------------------------------------------------------
     if "A Distribuir" not in colunas_existentes:
         cursor.execute('ALTER TABLE tf_distribuicao_elegiveis ADD COLUMN "A Distribuir" REAL NULL')
 
-    # popular a coluna "A Distribuir" com valores iguais a teto total disponível
-    cursor.execute("""
-        UPDATE tf_distribuicao_elegiveis
-        SET "A Distribuir" = TetoTotalDisponivel
-    """)
     
 
     # ----------------------------------------------------------------------------
@@ -566,8 +523,12 @@ def init_database():
     df_distribuicao["id_iniciativa"] = df_distribuicao["Nome da Proposta/Iniciativa Estruturante"].map(id_maps["td_iniciativas"]).fillna(-1).astype(int)
     df_distribuicao["id_acao"] = df_distribuicao["AÇÃO DE APLICAÇÃO"].map(id_maps["td_acoes_aplicacao"]).fillna(-1).astype(int)
 
+    # 🔹 Atributos da UC (GR, bioma, UF, categoria) desnormalizados, para filtros sem join
+    df_distribuicao = anexar_atributos_uc(df_distribuicao, conn)
+
     # 🔹 Salvar os dados atualizados na tabela
     df_distribuicao.to_sql("tf_distribuicao_elegiveis", conn, if_exists="replace", index=False)
+    criar_indices_atributos_uc(conn)
 
     # 🔍 Verificar se ainda há IDs inválidos
     df_check = pd.read_sql_query("""
@@ -609,7 +570,7 @@ def init_database():
         #     .str.replace(".", "")   # remove milhar
         #     .str.replace(",", ".")  # vírgula decimal -> ponto
         # )
-        df_insumos["valor_referencia"] = pd.to_numeric(df_insumos["valor_referencia"], errors="coerce").fillna(0.0)
+        df_insumos["valor_referencia"] = arredondar_reais(df_insumos["valor_referencia"])
 
         # Seleciona colunas na ordem
         df_insumos = df_insumos[[
@@ -648,6 +609,40 @@ def init_database():
     except Exception as e:
         print("❌ Erro ao tentar popular td_insumos:", e)
 
+    # ----------------------------------------------------------------------------
+    # 12) LOG DE ALTERAÇÕES (exportação incremental)
+    # ----------------------------------------------------------------------------
+    # As tabelas acima foram recriadas: os triggers precisam ser refeitos e o
+    # próximo delta deve enviar cada uma delas por inteiro.
+    garantir_log_alteracoes(conn)
+    for tabela in TABELAS_DELTA:
+        registrar_recarga(conn, tabela)
+    print("✅ Log de alterações configurado!")
+
+    # ----------------------------------------------------------------------------
+    # 13) ÍNDICE POR UNIDADE DE CONSERVAÇÃO
+    # ----------------------------------------------------------------------------
+    garantir_indice_uc(conn)
+    reconstruir_indice_uc(conn)
+    conn.commit()
+    print("✅ Índice por UC reconstruído!")
+
+    # ----------------------------------------------------------------------------
+    # 14) TETOS POR EXERCÍCIO (formato longo)
+    # ----------------------------------------------------------------------------
+    garantir_tetos_exercicio(conn)
+    sincronizar_tetos_exercicio(conn)
+    conn.commit()
+    print("✅ Tetos por exercício gravados!")
+
+    # ----------------------------------------------------------------------------
+    # 15) CUBO DE ALOCAÇÕES (processo x geografia x demandante x iniciativa)
+    # ----------------------------------------------------------------------------
+    garantir_cubo_alocacoes(conn)
+    reconstruir_cubo_alocacoes(conn)
+    conn.commit()
+    print("✅ Cubo de alocações reconstruído!")
+
     conn.close()
     print("✅ Banco de dados inicializado com sucesso!")
 
@@ -791,6 +786,25 @@ def init_samge_database():
     print("✅ Banco de dados SAMGe atualizado com sucesso!")
 
 
+
+@st.cache_resource
+def preparar_banco(db_path: str = "database/app_data.db"):
+    """
+    Uma vez por processo, nos pontos de entrada do app: garante o modo WAL,
+    o log de alterações (triggers), os atributos de UC na distribuição, o
+    índice por UC, os tetos por exercício e o cubo de alocações, também em
+    bancos criados antes deles.
+    """
+    conn = sqlite3.connect(db_path)
+    ativar_wal(conn)
+    garantir_log_alteracoes(conn)
+    garantir_indice_uc(conn)
+    garantir_atributos_uc(conn)
+    garantir_tetos_exercicio(conn)
+    garantir_cubo_alocacoes(conn)
+    conn.close()
+
+
 if __name__ == "__main__":
     init_samge_database()
     init_database()
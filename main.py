@@ -5,7 +5,7 @@ import time
 import base64
 
 # Importe as funções de inicialização (se necessário)
-from init_db import init_database, init_samge_database
+from init_db import init_database, init_samge_database, preparar_banco
 
 # Caminho onde o DB será criado
 db_path = "database/app_data.db"
@@ -15,6 +15,9 @@ if not os.path.exists(db_path):
     init_database()
     init_samge_database()
 
+# Garante WAL, log de alterações e as estruturas derivadas (ver init_db.preparar_banco)
+preparar_banco(db_path)
+
 # --------------------------------------------------
 # Configuração da página
 # --------------------------------------------------
@@ -2,10 +2,14 @@ import streamlit as st
 import pandas as pd
 import sqlite3
 import os
-import numpy as np
 
 from init_db import init_database
 from init_db import init_samge_database
+from hooks.apresentacao import exibir_tabela
+from hooks.dados_base import carregar_dados_base
+from hooks.dinheiro import formatar_real, somar_reais
+from hooks.filtros_facetados import IndiceFacetas
+from hooks.resumos_agrupados import ResumosAgrupados, barras_progresso, percentual
 
 
 db_path = "database/app_data.db"
@@ -30,13 +34,37 @@ st.set_page_config(
 
 st.subheader("Informações sobre as Iniciativas Estruturantes")
 
-@st.cache_data
-def load_data_from_db():
-    """Carrega os dados da tabela 'td_dados_base_iniciativas' do SQLite."""
+# (coluna, rótulo, opção "todos", chave do widget) de cada filtro da barra lateral
+FACETAS = [
+    ("DEMANDANTE", "📌 Demandante", "Todos", "filtro_demandante"),
+    ("Unidade de Conservação", "🏞 Unidade de Conservação", "Todas", "filtro_uc"),
+    ("AÇÃO DE APLICAÇÃO", "🎯 Ação de Aplicação", "Todas", "filtro_acao"),
+    ("GR", "🏢 Gerência Regional", "Todos", "filtro_gr"),
+    ("UF", "📍 UF (Estado)", "Todas", "filtro_uf"),
+    ("BIOMA", "🌱 Bioma", "Todos", "filtro_bioma"),
+    ("CATEGORIA UC", "🏷 Categoria UC", "Todas", "filtro_categoria"),
+]
+
+def versao_dados_base():
+    """Assinatura de td_dados_base_iniciativas (recriada apenas pelo init_db)."""
     conn = sqlite3.connect(db_path)
-    df = pd.read_sql_query("SELECT * FROM td_dados_base_iniciativas", conn)
+    versao = conn.execute("SELECT COUNT(*), MAX(rowid) FROM td_dados_base_iniciativas").fetchone()
     conn.close()
-    return df
+    return versao
+
+@st.cache_resource
+def load_indice_facetas(versao):
+    """
+    Carrega 'td_dados_base_iniciativas' já tipada e monta os bitmaps das facetas
+    e os resumos "por <coluna>" sobre o mesmo DataFrame, uma vez por versão,
+    compartilhados (somente leitura) entre as sessões. Índice e resumos ficam
+    no mesmo objeto em cache: um `.clear()` nunca separa um do outro.
+    """
+    conn = sqlite3.connect(db_path)
+    df = carregar_dados_base(conn)
+    conn.close()
+    indice = IndiceFacetas(df, [coluna for coluna, _, _, _ in FACETAS])
+    return indice, ResumosAgrupados(indice.df)
 
 
 
@@ -44,18 +72,15 @@ def load_data_from_db():
 if not os.path.exists(db_path):
     st.warning("Banco de dados não encontrado. Verifique se executou o init_db.py.")
 else:
-    df = load_data_from_db()  # ⬅️ Agora `df` é carregado antes dos filtros
-
-    if st.session_state["perfil"] == "admin":
-        df_filtrado = df  # Admin vê todos os registros
-        df = df_filtrado
-    # perfil cocam também vê todos os registros
-    elif st.session_state["perfil"] == "cocam":
-        df_filtrado = df
-        df = df_filtrado
+    versao = versao_dados_base()
+    indice, resumos = load_indice_facetas(versao)  # ⬅️ bitmaps carregados antes dos filtros
+
+    # admin e cocam veem todos os registros; os demais perfis, apenas os do seu setor
+    if st.session_state["perfil"] in ("admin", "cocam"):
+        base = None
     else:
-        df_filtrado = df[df["DEMANDANTE"] == st.session_state["setor"]]
-        df = df_filtrado
+        base = indice.bitmap("DEMANDANTE", st.session_state["setor"])
+    df = indice.filtrar({}, base)
 
 
  
@@ -86,6 +111,7 @@ else:
                 # Resetando os filtros para "Todos"
                 st.session_state["filtro_demandante"] = "Todos"
                 st.session_state["filtro_uc"] = "Todas"
+                st.session_state["filtro_acao"] = "Todas"
                 st.session_state["filtro_gr"] = "Todos"
                 st.session_state["filtro_uf"] = "Todas"
                 st.session_state["filtro_bioma"] = "Todos"
@@ -94,33 +120,28 @@ else:
                 st.rerun()
 
         # 📌 Aplicação de Filtros no Menu Lateral
-        filtro_demandante = st.sidebar.selectbox("📌 Demandante", ["Todos"] + sorted(df["DEMANDANTE"].dropna().unique().tolist()), key="filtro_demandante")
-        if filtro_demandante != "Todos":
-            df = df[df["DEMANDANTE"] == filtro_demandante]
-
-        filtro_uc = st.sidebar.selectbox("🏞 Unidade de Conservação", ["Todas"] + sorted(df["Unidade de Conservação"].dropna().unique().tolist()), key="filtro_uc")
-        if filtro_uc != "Todas":
-            df = df[df["Unidade de Conservação"] == filtro_uc]
-
-        filtro_acao = st.sidebar.selectbox("🎯 Ação de Aplicação", ["Todas"] + sorted(df["AÇÃO DE APLICAÇÃO"].dropna().unique().tolist()), key="filtro_acao")
-        if filtro_acao != "Todas":
-            df = df[df["AÇÃO DE APLICAÇÃO"] == filtro_acao]
-
-        filtro_gr = st.sidebar.selectbox("🏢 Gerência Regional", ["Todos"] + sorted(df["GR"].dropna().unique().tolist()), key="filtro_gr")
-        if filtro_gr != "Todos":
-            df = df[df["GR"] == filtro_gr]
-
-        filtro_uf = st.sidebar.selectbox("📍 UF (Estado)", ["Todas"] + sorted(df["UF"].dropna().unique().tolist()), key="filtro_uf")
-        if filtro_uf != "Todas":
-            df = df[df["UF"] == filtro_uf]
-
-        filtro_bioma = st.sidebar.selectbox("🌱 Bioma", ["Todos"] + sorted(df["BIOMA"].dropna().unique().tolist()), key="filtro_bioma")
-        if filtro_bioma != "Todos":
-            df = df[df["BIOMA"] == filtro_bioma]
+        # As opções de cada filtro (com contagem) consideram a seleção de todos os outros
+        selecao = {
+            coluna: st.session_state.get(chave)
+            for coluna, _, todos, chave in FACETAS
+            if st.session_state.get(chave, todos) != todos
+        }
+        contagens = indice.contagens(selecao, base)
+
+        for coluna, rotulo, todos, chave in FACETAS:
+            opcoes = contagens[coluna]
+            if coluna in selecao and selecao[coluna] not in opcoes.index:
+                # seleção que ficou sem registros com os demais filtros: mantém visível, com 0
+                opcoes = pd.concat([pd.Series({selecao[coluna]: 0}), opcoes])
+            st.sidebar.selectbox(
+                rotulo,
+                [todos] + opcoes.index.tolist(),
+                key=chave,
+                format_func=lambda v, opcoes=opcoes, todos=todos: v if v == todos else f"{v} ({opcoes[v]})"
+            )
 
-        filtro_categoria = st.sidebar.selectbox("🏷 Categoria UC", ["Todas"] + sorted(df["CATEGORIA UC"].dropna().unique().tolist()), key="filtro_categoria")
-        if filtro_categoria != "Todas":
-            df = df[df["CATEGORIA UC"] == filtro_categoria]
+        mascara = indice.mascara(selecao, base=base)
+        df = indice.df[mascara]
 
         
 
@@ -135,6 +156,7 @@ else:
                     try:
                         init_database()
                         init_samge_database()
+                        load_indice_facetas.clear()
                         st.success("Banco de dados recriado com sucesso!")
                         st.rerun()
                     except Exception as e:
@@ -142,6 +164,7 @@ else:
 
                 if st.button("🗑 Limpar Cache"):
                     st.cache_data.clear()
+                    load_indice_facetas.clear()
                     st.success("Cache limpo com sucesso!")
                     st.rerun()
 
@@ -156,18 +179,18 @@ else:
             
             total_iniciativas = df["Nome da Proposta/Iniciativa Estruturante"].nunique()
             total_ucs = df["Unidade de Conservação"].nunique()
-            valor_alocado = df["VALOR TOTAL ALOCADO"].astype(float).sum()
-            valor_total_iniciativa = df["Valor Total da Iniciativa"].astype(float).sum()
-            saldo_total = df["SALDO"].astype(float).sum()  # Adicionamos o saldo total
+            valor_alocado = somar_reais(df["VALOR TOTAL ALOCADO"])
+            valor_total_iniciativa = somar_reais(df["Valor Total da Iniciativa"])
+            saldo_total = somar_reais(df["SALDO"])  # Adicionamos o saldo total
 
             # 📌 Cálculo da % de valor alocado em relação ao total da iniciativa
             percentual_alocado = (valor_alocado / valor_total_iniciativa) * 100 if valor_total_iniciativa > 0 else 0
 
             col1.metric("📌 Total de Iniciativas", total_iniciativas)
             col2.metric("🏞 Total de UCs", total_ucs)
-            col3.metric("💰 Valor Alocado", f"R$ {valor_alocado:,.2f}")
-            col4.metric("💰 Valor Total da Iniciativa", f"R$ {valor_total_iniciativa:,.2f}")
-            col5.metric("💰 Saldo", f"R$ {saldo_total:,.2f}")  # Mostra o saldo total
+            col3.metric("💰 Valor Alocado", formatar_real(valor_alocado))
+            col4.metric("💰 Valor Total da Iniciativa", formatar_real(valor_total_iniciativa))
+            col5.metric("💰 Saldo", formatar_real(saldo_total))  # Mostra o saldo total
 
             # 📌 Exibição da % e da Progress Bar
             col4.markdown(f"💹 % Alocado: {percentual_alocado:.2f}%")
@@ -186,61 +209,16 @@ else:
             )
 
         # 📌 Função para Destacar Totais na Tabela e Identificar Itens Omissos
-        def destacar_totais(df, coluna_grupo):
-            df_total = df.groupby(coluna_grupo).agg({
-                "Nome da Proposta/Iniciativa Estruturante": "nunique",
-                "Unidade de Conservação": "nunique",
-                "VALOR TOTAL ALOCADO": lambda x: x.astype(float).sum(),
-                "Valor Total da Iniciativa": lambda x: x.astype(float).sum(),
-                "SALDO": lambda x: x.astype(float).sum()  # Adicionamos o saldo na agregação
-            }).rename(columns={
-                "Nome da Proposta/Iniciativa Estruturante": "Total de Iniciativas",
-                "Unidade de Conservação": "Total de UCs"
-            }).reset_index()
-
-            # 📌 Evitar divisão por zero ao calcular a % de Valor Alocado
-            df_total["% Valor Alocado"] = np.where(
-                df_total["Valor Total da Iniciativa"] > 0,
-                (df_total["VALOR TOTAL ALOCADO"] / df_total["Valor Total da Iniciativa"]) * 100,
-                0  # Se "Valor Total da Iniciativa" for 0, define como 0%
+        # (o resumo é memorizado por máscara de filtros + coluna em ResumosAgrupados;
+        # os valores seguem numéricos e a formatação fica no column_config)
+        def destacar_totais(coluna_grupo):
+            df_total, itens_omissos = resumos.totais(mascara, coluna_grupo)
+            exibir_tabela(
+                df_total,
+                colunas_moeda=["VALOR TOTAL ALOCADO", "Valor Total da Iniciativa", "SALDO"],
+                colunas_percentual=["% Valor Alocado"],
             )
-
-            # 🔥 Garante que os valores sejam numéricos e sem infinitos
-            df_total["% Valor Alocado"] = df_total["% Valor Alocado"].replace([np.inf, -np.inf], 0).fillna(0).round(2)
-
-            # 📌 Criando a barra de progresso com valores limitados entre 0 e 100
-            def gerar_barra_progresso(perc):
-                total_blocos = 10  # Define a quantidade de blocos para a barra
-                preenchidos = max(0, min(int((perc / 100) * total_blocos), total_blocos))  # Evita valores inválidos
-
-                if perc > 100:
-                    return "🟧" * preenchidos + "⬜" * (total_blocos - preenchidos)  # 🔥 Excesso em laranja
-                return "🟩" * preenchidos + "⬜" * (total_blocos - preenchidos)  # 🔥 Normal em verde
-
-            df_total["Progresso"] = df_total["% Valor Alocado"].apply(gerar_barra_progresso)
-
-
-            total_geral = pd.DataFrame({
-                coluna_grupo: ["Total Geral"],
-                "Total de Iniciativas": [df_total["Total de Iniciativas"].sum()],
-                "Total de UCs": [df_total["Total de UCs"].sum()],
-                "VALOR TOTAL ALOCADO": [df_total["VALOR TOTAL ALOCADO"].sum()],
-                "Valor Total da Iniciativa": [df_total["Valor Total da Iniciativa"].sum()],
-                "SALDO": [df_total["SALDO"].sum()],  # Adicionamos o saldo total geral
-                "% Valor Alocado": [(df_total["VALOR TOTAL ALOCADO"].sum() / df_total["Valor Total da Iniciativa"].sum()) * 100]
-            })
-            
-            df_total = pd.concat([df_total, total_geral], ignore_index=True)
-
-            # 🔎 Identificando Registros que Estão Fora da Soma
-            itens_omissos = df[df["VALOR TOTAL ALOCADO"].astype(float) + df["Valor Total da Iniciativa"].astype(float) == 0]
-
-            return df_total.style.format({
-                "VALOR TOTAL ALOCADO": "R$ {:,.2f}",
-                "Valor Total da Iniciativa": "R$ {:,.2f}",
-                "SALDO": "R$ {:,.2f}",
-                "% Valor Alocado": "{:.2f}%"
-            }).set_properties(subset=["Progresso"], **{"text-align": "center"}), itens_omissos
+            return itens_omissos
 
         # 📊 Estatísticas Agregadas
         for nome, coluna in [
@@ -255,8 +233,7 @@ else:
             
         ]:
             with st.expander(nome):
-                df_agregado, itens_fora = destacar_totais(df, coluna)
-                st.dataframe(df_agregado, use_container_width=True)
+                itens_fora = destacar_totais(coluna)
 
                 # ✅ Exibir Itens Omissos somente se o toggle estiver ativado
                 if exibir_itens_omissos and not itens_fora.empty:
@@ -291,8 +268,8 @@ else:
             gr_list = sorted(df_iniciativa["GR"].dropna().astype(str).unique())
             bioma_list = sorted(df_iniciativa["BIOMA"].dropna().astype(str).unique())
             uf_list = sorted(df_iniciativa["UF"].dropna().astype(str).unique())
-            valor_total_alocado = df_iniciativa["VALOR TOTAL ALOCADO"].sum()
-            valor_total_iniciativa = df_iniciativa["Valor Total da Iniciativa"].sum()
+            valor_total_alocado = somar_reais(df_iniciativa["VALOR TOTAL ALOCADO"])
+            valor_total_iniciativa = somar_reais(df_iniciativa["Valor Total da Iniciativa"])
             # 📌 Extraindo valores únicos da coluna "Observações"
             observacoes_list = df_iniciativa["Observações"].dropna().astype(str).unique().tolist()
 
@@ -333,8 +310,8 @@ else:
 
             with col2:
                 st.markdown("#### 📊 Valores Financeiros")
-                st.metric(label="💰 Valor Total Alocado", value=f"R$ {valor_total_alocado:,.2f}")
-                st.metric(label="🏗 Valor Total da Iniciativa", value=f"R$ {valor_total_iniciativa:,.2f}")
+                st.metric(label="💰 Valor Total Alocado", value=formatar_real(valor_total_alocado))
+                st.metric(label="🏗 Valor Total da Iniciativa", value=formatar_real(valor_total_iniciativa))
 
                 # 📌 Cálculo do percentual do valor alocado
                 percentual_valor_alocado = (valor_total_alocado / valor_total_iniciativa) * 100 if valor_total_iniciativa > 0 else 0
@@ -386,20 +363,10 @@ else:
             unidades_iniciativa = unidades[unidades["Valor Total da Iniciativa"] > 0].copy()
 
             # 📌 Cálculo do percentual de valor alocado (evitando divisão por zero e problemas de infinidade)
-            unidades_alocadas["% Valor Alocado"] = (unidades_alocadas["VALOR TOTAL ALOCADO"] / unidades_alocadas["Valor Total da Iniciativa"]) * 100
-            unidades_alocadas["% Valor Alocado"] = unidades_alocadas["% Valor Alocado"].replace([np.inf, -np.inf], 0).fillna(0).round(2)
+            unidades_alocadas["% Valor Alocado"] = percentual(unidades_alocadas["VALOR TOTAL ALOCADO"], unidades_alocadas["Valor Total da Iniciativa"])
 
-            # 📌 Criando uma barra de progresso visual diferenciada
-            def gerar_barra_progresso(perc):
-                total_blocos = 10  # Define a quantidade de blocos para a barra
-                preenchidos = max(0, min(int((perc / 100) * total_blocos), total_blocos))  # Garante que esteja dentro do limite
-
-                if perc > 100:
-                    return "🟧" * preenchidos + "⬜" * (total_blocos - preenchidos)  # 🔥 Excesso em laranja
-                return "🟩" * preenchidos + "⬜" * (total_blocos - preenchidos)  # 🔥 Normal em verde
-
-            # 📌 Aplicando a barra de progresso na tabela
-            unidades_alocadas["Progresso"] = unidades_alocadas["% Valor Alocado"].apply(gerar_barra_progresso)
+            # 📌 Barra de progresso visual diferenciada (vetorizada)
+            unidades_alocadas["Progresso"] = barras_progresso(unidades_alocadas["% Valor Alocado"])
 
             # 📌 Criando a linha de total corretamente
             linha_total = pd.DataFrame([{
@@ -416,19 +383,18 @@ else:
 
             # 📌 Exibir DataFrame formatado
             with st.expander("💰 Valores Alocados", expanded=False):
-                st.dataframe(
+                exibir_tabela(
                     unidades_alocadas.rename(columns={
                         "VALOR TOTAL ALOCADO": "Valor Alocado (R$)",
                         "Valor Total da Iniciativa": "Valor da Iniciativa (R$)"
                     }),
-                    hide_index=True,
-                    use_container_width=True
+                    colunas_moeda=["Valor Alocado (R$)", "Valor da Iniciativa (R$)"],
+                    colunas_percentual=["% Valor Alocado"],
                 )
 
             # 📌 Ajuste para "Valores da Iniciativa" (evitando erros de divisão)
-            unidades_iniciativa["% Valor Alocado"] = (unidades_iniciativa["VALOR TOTAL ALOCADO"] / unidades_iniciativa["Valor Total da Iniciativa"]) * 100
-            unidades_iniciativa["% Valor Alocado"] = unidades_iniciativa["% Valor Alocado"].replace([np.inf, -np.inf], 0).fillna(0).round(2)
-            unidades_iniciativa["Progresso"] = unidades_iniciativa["% Valor Alocado"].apply(gerar_barra_progresso)
+            unidades_iniciativa["% Valor Alocado"] = percentual(unidades_iniciativa["VALOR TOTAL ALOCADO"], unidades_iniciativa["Valor Total da Iniciativa"])
+            unidades_iniciativa["Progresso"] = barras_progresso(unidades_iniciativa["% Valor Alocado"])
 
             # 📌 Criando a linha de total corretamente para "Valores da Iniciativa"
             linha_total_iniciativa = pd.DataFrame([{
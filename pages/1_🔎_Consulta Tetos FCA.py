@@ -9,6 +9,12 @@ import json
 
 from init_db import init_database
 from init_db import init_samge_database
+from hooks.apresentacao import coluna_moeda, exibir_tabela, linha_total
+from hooks.cubo_alocacoes import DIMENSOES, alocacoes_por_processo, consultar_cubo
+from hooks.dinheiro import formatar_real, somar_reais
+from hooks.graficos_tetos import figuras_tetos
+from hooks.particoes_tetos import carregar_particoes_tetos, tetos_do_usuario, versao_distribuicao
+from hooks.tetos_exercicio import exercicios_colunas, resumo_exercicios, tetos_por_linha
 
 DB_PATH = "database/app_data.db"  # Ajuste o caminho do seu DB
 
@@ -37,25 +43,34 @@ st.subheader("Consulta Tetos FCA")
 ####################################
 # 3) Função para carregar dados    #
 ####################################
-@st.cache_data
 def load_tetos_from_db() -> pd.DataFrame:
-    """Carrega dados da tabela tf_distribuicao_elegiveis do banco."""
-    if not os.path.exists(DB_PATH):
-        return pd.DataFrame()
+    """Tetos visíveis para o usuário logado (carga compartilhada em hooks.particoes_tetos)."""
+    return tetos_do_usuario(DB_PATH)
+
+
+@st.cache_data(max_entries=64)
+def load_figuras_tetos(estado_filtros: tuple, _df_tetos: pd.DataFrame) -> list:
+    """
+    Figuras por iniciativa, serializadas. `estado_filtros` (partição com a
+    versão dos dados + filtros da barra lateral) é a chave; `_df_tetos` não
+    entra no hash.
+    """
     conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM tf_distribuicao_elegiveis", conn)
-    conn.close()
-    
-    # Normaliza os dados para comparação
-    if "DEMANDANTE (diretoria)" in df.columns and "setor" in st.session_state:
-        df["DEMANDANTE (diretoria)"] = df["DEMANDANTE (diretoria)"].str.upper()
-        setor_usuario = st.session_state["setor"].upper()
-        
-        # Verifica se o perfil é admin ou cocam
-        if st.session_state["perfil"] not in ["admin", "cocam"]:
-            df = df[df["DEMANDANTE (diretoria)"] == setor_usuario]
-    
-    return df
+    try:
+        tetos = tetos_por_linha(conn, _df_tetos["id"])
+    finally:
+        conn.close()
+    return figuras_tetos(_df_tetos, tetos)
+
+
+@st.cache_data(max_entries=1)
+def load_alocacoes_por_processo(versao: int) -> pd.DataFrame:
+    """Valor alocado por processo, UC e iniciativa; `versao` invalida o cache."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return alocacoes_por_processo(conn)
+    finally:
+        conn.close()
 
 
 
@@ -77,15 +92,17 @@ if df_tetos.empty:
 rename_map = {
     "Unidade de Conservação": "UnidadeConservacao",
     "TetoSaldo disponível":   "TetoSaldoDisponivel",
-    "TetoPrevisto 2025":      "TetoPrevisto2025",
-    "TetoPrevisto 2026":      "TetoPrevisto2026",
-    "TetoPrevisto 2027":      "TetoPrevisto2027",
     "TetoTotalDisponivel":    "TetoTotalDisponivel",
     "A Distribuir":           "SaldoADistribuir",
+    # "TetoPrevisto <ano>" -> "TetoPrevisto<ano>", para cada exercício existente
+    **{coluna: f"TetoPrevisto{ano}" for ano, coluna in exercicios_colunas(df_tetos.columns).items()},
     # Adicione mais se precisar
 }
 df_tetos.rename(columns=rename_map, inplace=True)
 
+# colunas de teto por exercício (saldo disponível + previstos por ano)
+colunas_exercicios = ["TetoSaldoDisponivel", *exercicios_colunas(df_tetos.columns).values()]
+
 ##########################################
 # 6) Layout de Filtros na Barra Lateral  #
 ##########################################
@@ -145,28 +162,14 @@ if "DEMANDANTE (diretoria)" in df_tetos.columns:
     if filtro_demandante != "Todos":
         df_tetos = df_tetos[df_tetos["DEMANDANTE (diretoria)"] == filtro_demandante]
 
-# Filtrar por GR (Gerência Regional) (utilizar tabela td_unidades)
-# a tabela td_unidades tem uma coluna cnuc que relaciona com a coluna CNUC do df_tetos
-# e uma coluna gr que indica a Gerência Regional da unidade
-if "CNUC" in df_tetos.columns:
-    conn = sqlite3.connect(DB_PATH)
-    df_unidades = pd.read_sql_query("SELECT cnuc, gr FROM td_unidades", conn)
-    conn.close()
-    if not df_unidades.empty:
-        # Obtemos a lista de CNUCs disponíveis no df_tetos
-        lista_cnuc = sorted(df_tetos["CNUC"].dropna().unique())
-        # Filtramos o df_unidades para obter somente os CNUCs presentes no df_tetos
-        df_unidades = df_unidades[df_unidades["cnuc"].isin(lista_cnuc)]
-        
-        if not df_unidades.empty:
-            # Obtemos a lista de GRs disponíveis
-            lista_gr = sorted(df_unidades["gr"].dropna().unique())
-            filtro_gr = st.sidebar.selectbox("Gerência Regional", ["Todas"] + list(lista_gr), key="filtro_gr")
-            if filtro_gr != "Todas":
-                cnucs_filtrados = df_unidades[df_unidades["gr"] == filtro_gr]["cnuc"].unique()
-                df_tetos = df_tetos[df_tetos["CNUC"].isin(cnucs_filtrados)]
-# Se o filtro de GR não retornar nenhum CNUNC, mantemos o df_tetos original
-# Caso contrário, o df_tetos será filtrado para incluir somente os CNUNCs correspondentes à GR selecionada
+# Filtrar por GR (Gerência Regional)
+# a coluna gr vem desnormalizada de td_unidades na própria tf_distribuicao_elegiveis
+if "gr" in df_tetos.columns:
+    lista_gr = sorted(df_tetos["gr"].dropna().unique())
+    if lista_gr:
+        filtro_gr = st.sidebar.selectbox("Gerência Regional", ["Todas"] + list(lista_gr), key="filtro_gr")
+        if filtro_gr != "Todas":
+            df_tetos = df_tetos[df_tetos["gr"] == filtro_gr]
 
 
 
@@ -228,33 +231,13 @@ if "Nome da Proposta/Iniciativa Estruturante" in df_tetos.columns:
 
 # Soma do TetoTotalDisponivel
 if "TetoTotalDisponivel" in df_tetos.columns:
-    soma_teto = df_tetos["TetoTotalDisponivel"].fillna(0).sum()
-    col2.metric("Soma Teto Total", f"R$ {soma_teto:,.2f}")
-
-# Soma do Teto Saldo Disponível
-if "TetoSaldoDisponivel" in df_tetos.columns:
-    soma_saldoDisp = df_tetos["TetoSaldoDisponivel"].fillna(0).sum()
-    col3.metric("Teto Saldo Disponível (Soma)", f"R$ {soma_saldoDisp:,.2f}")
-
-# Soma do Teto Previsto 2025
-if "TetoPrevisto2025" in df_tetos.columns:
-    soma_previsto2025 = df_tetos["TetoPrevisto2025"].fillna(0).sum()
-    col3.metric("Teto Previsto 2025 (Soma)", f"R$ {soma_previsto2025:,.2f}")
-
-# Soma do Teto Previsto 2026
-if "TetoPrevisto2026" in df_tetos.columns:
-    soma_previsto2026 = df_tetos["TetoPrevisto2026"].fillna(0).sum()
-    col3.metric("Teto Previsto 2026 (Soma)", f"R$ {soma_previsto2026:,.2f}")
-
-# Soma do Teto Previsto 2027
-if "TetoPrevisto2027" in df_tetos.columns:
-    soma_previsto2027 = df_tetos["TetoPrevisto2027"].fillna(0).sum()
-    col3.metric("Teto Previsto 2027 (Soma)", f"R$ {soma_previsto2027:,.2f}")
+    soma_teto = somar_reais(df_tetos["TetoTotalDisponivel"])
+    col2.metric("Soma Teto Total", formatar_real(soma_teto))
 
 # Soma do Saldo a Distribuir
 if "SaldoADistribuir" in df_tetos.columns:
-    soma_saldo = df_tetos["SaldoADistribuir"].fillna(0).sum()
-    col2.metric("Soma do Saldo a Distribuir por Eixo Temático", f"R$ {soma_saldo:,.2f}")
+    soma_saldo = somar_reais(df_tetos["SaldoADistribuir"])
+    col2.metric("Soma do Saldo a Distribuir por Eixo Temático", formatar_real(soma_saldo))
 
 # metrica calculando a porcentagem a distribuir em relação ao teto total
 if "TetoTotalDisponivel" in df_tetos.columns and "SaldoADistribuir" in df_tetos.columns:
@@ -262,27 +245,17 @@ if "TetoTotalDisponivel" in df_tetos.columns and "SaldoADistribuir" in df_tetos.
     percentual_distribuicao = df_tetos["percentual_distribuicao"].mean()
     col2.metric("Percentual a Distribuir (%)", f"{percentual_distribuicao:.2f} %")
 
-# metrica calculando a porcentagem de tetos previstos em relação ao teto total - saldo disponível
-if "TetoSaldoDisponivel" in df_tetos.columns and "TetoTotalDisponivel" in df_tetos.columns:
-    df_tetos["percentual_saldo_disponivel"] = (df_tetos["TetoSaldoDisponivel"].fillna(0) / df_tetos["TetoTotalDisponivel"].fillna(1)) * 100
-    percentual_saldo_disponivel = df_tetos["percentual_saldo_disponivel"].mean()
-    col4.metric("Percentual Saldo Disponível (%)", f"{percentual_saldo_disponivel:.2f} %")
-
-# metrica calculando a porcentagem de tetos previstos em relação ao teto total
-if "TetoTotalDisponivel" in df_tetos.columns and "TetoPrevisto2025" in df_tetos.columns:
-    df_tetos["percentual_previsto"] = (df_tetos["TetoPrevisto2025"].fillna(0) / df_tetos["TetoTotalDisponivel"].fillna(1)) * 100
-    percentual_previsto = df_tetos["percentual_previsto"].mean()
-    col4.metric("Percentual Previsto 2025 (%)", f"{percentual_previsto:.2f} %")
-# metrica calculando a porcentagem de tetos previstos em relação ao teto total
-if "TetoTotalDisponivel" in df_tetos.columns and "TetoPrevisto2026" in df_tetos.columns:
-    df_tetos["percentual_previsto"] = (df_tetos["TetoPrevisto2026"].fillna(0) / df_tetos["TetoTotalDisponivel"].fillna(1)) * 100
-    percentual_previsto = df_tetos["percentual_previsto"].mean()
-    col4.metric("Percentual Previsto 2026 (%)", f"{percentual_previsto:.2f} %")
-# metrica calculando a porcentagem de tetos previstos em relação ao teto total
-if "TetoTotalDisponivel" in df_tetos.columns and "TetoPrevisto2027" in df_tetos.columns:
-    df_tetos["percentual_previsto"] = (df_tetos["TetoPrevisto2027"].fillna(0) / df_tetos["TetoTotalDisponivel"].fillna(1)) * 100
-    percentual_previsto = df_tetos["percentual_previsto"].mean()
-    col4.metric("Percentual Previsto 2027 (%)", f"{percentual_previsto:.2f} %")
+# Soma e percentual médio (sobre o teto total) do saldo disponível e de cada
+# exercício previsto: uma consulta agregada em tf_distribuicao_tetos
+if "id" in df_tetos.columns:
+    conn = sqlite3.connect(DB_PATH)
+    df_exercicios = resumo_exercicios(conn, df_tetos["id"])
+    conn.close()
+    for _, exercicio in df_exercicios.iterrows():
+        col3.metric(f"{exercicio['rotulo']} (Soma)", formatar_real(exercicio["soma"]))
+    for _, exercicio in df_exercicios.iterrows():
+        rotulo = exercicio["rotulo"].replace("Teto ", "", 1)
+        col4.metric(f"Percentual {rotulo} (%)", f"{exercicio['percentual_medio']:.2f} %")
 
 
 # Custom CSS for metrics
@@ -301,87 +274,22 @@ with st.spinner("Carregando gráficos..."):
     # implementa um expander para mostrar gráficos dos tetos de saldo disponível e por ano, de cada iniciativa
     with st.expander("📊 Gráficos de Tetos por Iniciativa", expanded=False):
         if "id_iniciativa" in df_tetos.columns and "Nome da Proposta/Iniciativa Estruturante" in df_tetos.columns:
-            iniciativas_unicas = df_tetos[["id_iniciativa", "Nome da Proposta/Iniciativa Estruturante"]].drop_duplicates()
-
-            for _, row in iniciativas_unicas.iterrows():
-                iniciativa_id = row["id_iniciativa"]
-                iniciativa_nome = row["Nome da Proposta/Iniciativa Estruturante"]
-
+            # figuras (JSON) em cache pela versão dos dados e pelo estado dos filtros
+            estado_filtros = (
+                carregar_particoes_tetos(versao_distribuicao(DB_PATH), DB_PATH).chave(
+                    st.session_state.get("setor"), st.session_state.get("perfil")
+                ),
+                *(st.session_state.get(chave) for chave in (
+                    "filtro_iniciativa", "filtro_uc", "filtro_demandante", "filtro_gr", "filtro_somente_positivos"
+                )),
+            )
+            for iniciativa_nome, figuras in load_figuras_tetos(estado_filtros, df_tetos):
                 st.divider()
 
                 st.markdown(f"### **{iniciativa_nome.title()}**")
-                df_iniciativa = df_tetos[df_tetos["id_iniciativa"] == iniciativa_id]
-
-                # Gráfico de Teto Saldo Disponível
-                if "TetoSaldoDisponivel" in df_iniciativa.columns:
-                    df_teto_saldo = df_iniciativa[df_iniciativa["TetoSaldoDisponivel"] > 0]
-                    if not df_teto_saldo.empty:
-                        fig1 = px.bar(df_teto_saldo.sort_values("TetoSaldoDisponivel"), 
-                                    y="UnidadeConservacao", 
-                                    x="TetoSaldoDisponivel",
-                                    title="Teto Saldo Disponível por UC",
-                                    labels={"TetoSaldoDisponivel": "Valor (R$)", "UnidadeConservacao": "Unidade de Conservação"})
-                        st.plotly_chart(fig1, use_container_width=True)
-
-                # Gráfico horizontal de Tetos Previsto por Ano
-                anos_previstos = ["TetoPrevisto2025", "TetoPrevisto2026", "TetoPrevisto2027"]
-                for ano in anos_previstos:
-                    if ano in df_iniciativa.columns:
-                        df_teto_ano = df_iniciativa[df_iniciativa[ano] > 0]
-                        if not df_teto_ano.empty:
-                            fig_ano = px.bar(df_teto_ano.sort_values(ano), 
-                                            y="UnidadeConservacao", 
-                                            x=ano,
-                                            title=f"Teto Previsto {ano[-4:]} por UC",
-                                            labels={ano: "Valor (R$)", "UnidadeConservacao": "Unidade de Conservação"})
-                            st.plotly_chart(fig_ano, use_container_width=True)
-
-                # Melt the DataFrame to long format for plotting
-                df_melt = df_iniciativa.melt(
-                    id_vars=["UnidadeConservacao"],
-                    value_vars=["TetoSaldoDisponivel", "TetoPrevisto2025", "TetoPrevisto2026", "TetoPrevisto2027"],
-                    var_name="Categoria",
-                    value_name="Valor"
-                )
-
-                # Gráfico combinado de barras horizontais agrupadas
-                # 1) Ordene por soma total (decida se ascending=True ou False)
-                df_melt["TotalTeto"] = df_melt.groupby("UnidadeConservacao")["Valor"].transform("sum") # soma total por UC
-                df_melt = df_melt.sort_values("TotalTeto", ascending=True)
-
-                # 2) Transforme a coluna em Categorical para fixar a ordem no DataFrame
-                ordered_ucs = df_melt["UnidadeConservacao"].unique().tolist() # lista de UCs na ordem correta
-                df_melt["UnidadeConservacao"] = pd.Categorical(
-                    df_melt["UnidadeConservacao"], 
-                    categories=ordered_ucs, 
-                    ordered=True
-                )
-
-                # 3) Defina a ordem das categorias de tetos (você já fazia isso)
-                categoria_order = ["TetoSaldoDisponivel", "TetoPrevisto2025", "TetoPrevisto2026", "TetoPrevisto2027"]
-                df_melt["Categoria"] = pd.Categorical(df_melt["Categoria"], categories=categoria_order, ordered=True)
-
-                # 4) Finalmente, crie o gráfico indicando “category_orders”:
-                fig_combo = px.bar(
-                    df_melt, 
-                    y="UnidadeConservacao", 
-                    x="Valor", 
-                    color="Categoria",
-                    title="Comparativo de Tetos por UC",
-                    labels={"Valor": "Valor (R$)", "UnidadeConservacao": "Unidade de Conservação"},
-                    category_orders={
-                        "UnidadeConservacao": ordered_ucs,    # y-axis
-                        "Categoria": categoria_order         # legend
-                    },
-                    height=800
-                )
-
-                # 5) Se quiser o maior valor no TOPO, basta reverter o eixo y:
-                fig_combo.update_layout(
-                    yaxis=dict(autorange="reversed")
-                )
-
-                st.plotly_chart(fig_combo, use_container_width=True)
+                if figuras["facetas"]:
+                    st.plotly_chart(json.loads(figuras["facetas"]), use_container_width=True)
+                st.plotly_chart(json.loads(figuras["comparativo"]), use_container_width=True)
 
 
 
@@ -390,13 +298,6 @@ with st.spinner("Carregando gráficos..."):
 #############################################
 st.divider()
 
-def fmt_money(valor):
-    """Função de formatação monetária."""
-    try:
-        return f"R$ {float(valor):,.2f}"
-    except:
-        return "R$ 0,00"
-
 def agrupar_e_exibir(coluna_grupo):
     """Agrupa a df_tetos pela coluna_grupo e mostra soma das colunas monetárias."""
     if coluna_grupo not in df_tetos.columns:
@@ -404,8 +305,7 @@ def agrupar_e_exibir(coluna_grupo):
         return
 
     col_monetarias = []
-    for c in ["TetoSaldoDisponivel", "TetoPrevisto2025", "TetoPrevisto2026", 
-              "TetoPrevisto2027", "TetoTotalDisponivel", "SaldoADistribuir"]:
+    for c in [*colunas_exercicios, "TetoTotalDisponivel", "SaldoADistribuir"]:
         if c in df_tetos.columns:
             col_monetarias.append(c)
 
@@ -415,20 +315,9 @@ def agrupar_e_exibir(coluna_grupo):
 
     df_ag = df_tetos.groupby(coluna_grupo).agg(ag_dict).reset_index()
 
-    # Adiciona linha "Total Geral"
-    linha_total = {}
-    for c in df_ag.columns:
-        if c == coluna_grupo:
-            linha_total[c] = "Total Geral"
-        else:
-            linha_total[c] = df_ag[c].sum()
-    df_ag.loc[len(df_ag)] = linha_total
-
-    # Formata
-    for c in col_monetarias:
-        df_ag[c] = df_ag[c].apply(fmt_money)
-
-    st.dataframe(df_ag, use_container_width=True, hide_index=True)
+    # Adiciona linha "Total Geral" (valores seguem numéricos; a formatação é do column_config)
+    df_ag = linha_total(df_ag, coluna_grupo, col_monetarias)
+    exibir_tabela(df_ag, colunas_moeda=col_monetarias)
 
 
 # Expander por Iniciativa (tabela única)
@@ -437,32 +326,22 @@ with st.expander("por **Iniciativa (Resumo)**", expanded=False):
         colunas_iniciativa = [
             "Nome da Proposta/Iniciativa Estruturante",
             "TetoTotalDisponivel",
-            "TetoSaldoDisponivel",
-            "TetoPrevisto2025",
-            "TetoPrevisto2026",
-            "TetoPrevisto2027",
+            *colunas_exercicios,
             "SaldoADistribuir"
         ]
         df_iniciativas = df_tetos.groupby("Nome da Proposta/Iniciativa Estruturante", as_index=False)[colunas_iniciativa].sum(numeric_only=True)
-        for c_moeda in colunas_iniciativa[1:]:
-            df_iniciativas[c_moeda] = df_iniciativas[c_moeda].apply(fmt_money)
-        st.dataframe(df_iniciativas, use_container_width=True, hide_index=True)
+        exibir_tabela(df_iniciativas, colunas_moeda=colunas_iniciativa[1:])
 
     # mostra totalizações
     colunas_total = [
         "TetoTotalDisponivel",
-        "TetoSaldoDisponivel",
-        "TetoPrevisto2025",
-        "TetoPrevisto2026",
-        "TetoPrevisto2027",
+        *colunas_exercicios,
         "SaldoADistribuir"
     ]
     df_total = df_tetos[colunas_total].sum(numeric_only=True).to_frame().T
-    for c_moeda in colunas_total:
-        df_total[c_moeda] = df_total[c_moeda].apply(fmt_money)
     df_total.insert(0, "Nome da Proposta/Iniciativa Estruturante", "Total Geral")
     st.write("Total Geral:")
-    st.dataframe(df_total[colunas_iniciativa], use_container_width=True, hide_index=True)
+    exibir_tabela(df_total[colunas_iniciativa], colunas_moeda=colunas_total)
 
 
 with st.expander("por **Iniciativa (Detalhado)**", expanded=False):
@@ -483,36 +362,26 @@ with st.expander("por **Iniciativa (Detalhado)**", expanded=False):
             colunas_iniciativa = [
                 "TetoTotalDisponivel",
                 "SaldoADistribuir",
-                "TetoSaldoDisponivel",
-                "TetoPrevisto2025",
-                "TetoPrevisto2026",
-                "TetoPrevisto2027",
+                *colunas_exercicios,
             ]
             df_total = df_iniciativa.groupby("Nome da Proposta/Iniciativa Estruturante", as_index=False)[colunas_iniciativa].sum(numeric_only=True)
-            for c_moeda in colunas_iniciativa:
-                df_total[c_moeda] = df_total[c_moeda].apply(fmt_money)
             st.write("Total da Iniciativa:")
-            st.dataframe(df_total, use_container_width=True, hide_index=True)
+            exibir_tabela(df_total, colunas_moeda=colunas_iniciativa)
 
             # Agrupar e somar apenas as colunas desejadas por unidade
             colunas_desejadas = [
                 "UnidadeConservacao",
                 "TetoTotalDisponivel",
                 "SaldoADistribuir",
-                "TetoSaldoDisponivel",
-                "TetoPrevisto2025",
-                "TetoPrevisto2026",
-                "TetoPrevisto2027",
+                *colunas_exercicios,
             ]
             df_agrupado = (
                 df_iniciativa.groupby("UnidadeConservacao", as_index=False)[colunas_desejadas[1:]]
                 .sum(numeric_only=True)
             )
             df_agrupado.insert(0, "UnidadeConservacao", df_agrupado.pop("UnidadeConservacao"))
-            for c_moeda in colunas_desejadas[1:]:
-                df_agrupado[c_moeda] = df_agrupado[c_moeda].apply(fmt_money)
             st.write("Distribuição por Unidade:")
-            st.dataframe(df_agrupado[colunas_desejadas], use_container_width=True, hide_index=True)
+            exibir_tabela(df_agrupado[colunas_desejadas], colunas_moeda=colunas_desejadas[1:])
 
 with st.expander("por **UC (Unidade de Conservacao)**", expanded=False):
     if "UnidadeConservacao" in df_tetos.columns:
@@ -521,17 +390,10 @@ with st.expander("por **UC (Unidade de Conservacao)**", expanded=False):
         st.info("Coluna 'UnidadeConservacao' não disponível.")
 
 with st.expander("por **GR (Gerência Regional)**", expanded=False):
-    if "CNUC" in df_tetos.columns:
-        conn = sqlite3.connect(DB_PATH)
-        df_unidades = pd.read_sql_query("SELECT cnuc, gr FROM td_unidades", conn)
-        conn.close()
-        if not df_unidades.empty:
-            df_tetos = df_tetos.merge(df_unidades, left_on="CNUC", right_on="cnuc", how="left")
-            agrupar_e_exibir("gr")
-        else:
-            st.info("Tabela 'td_unidades' está vazia.")
+    if "gr" in df_tetos.columns:
+        agrupar_e_exibir("gr")
     else:
-        st.info("Coluna 'CNUC' não disponível.")
+        st.info("Coluna 'gr' não disponível.")
 
 
 # expander por Demandante (Diretoria)
@@ -552,58 +414,102 @@ st.markdown("###### Distribuição por Eixo Temático")
 
 # Expander principal
 with st.expander("por **Eixo Temático**", expanded=False):
-    # 1) Ler tabela de processos (td_samge_processos) do banco
-    conn = sqlite3.connect(DB_PATH)
-    df_processos = pd.read_sql_query("SELECT * FROM td_samge_processos", conn)
-    
-    # 2) Ler a tabela de distribuição (tf_distribuicao_elegiveis)
-    df_elegiveis = pd.read_sql_query("SELECT * FROM tf_distribuicao_elegiveis", conn)
-    conn.close()
-
-    # Verificamos se existe a coluna de 'Unidade de Conservação' (ou o nome exato)
-    if "Unidade de Conservação" not in df_elegiveis.columns:
-        st.warning("Coluna 'Unidade de Conservação' não encontrada em tf_distribuicao_elegiveis.")
-        st.stop()
+    # Todas as tabelas de processo saem de um único melt + groupby da distribuição
+    # (hooks.cubo_alocacoes), em cache até a próxima alteração da tabela.
+    col_uc = "Unidade de Conservação"
+    col_iniciativa = "Nome da Proposta/Iniciativa Estruturante"
+    df_alocacoes = load_alocacoes_por_processo(versao_distribuicao(DB_PATH))
 
-    # (Opcional) Converter a coluna do processo para numérico, se necessário, 
-    # mas normalmente você fará isso apenas depois que souber qual coluna estamos somando.
-
-    # 3) Para cada linha de df_processos, checamos se df_processos["nome"] está em df_elegiveis.columns
-    col_uc = "Unidade de Conservação"  # Ajuste se seu DB estiver com outro nome
-    lista_processos = df_processos[["id_p","nome"]].dropna()
-    
     processos_exibidos = 0  # Contador para saber se pelo menos um processo foi mostrado
 
-    for idx, row in lista_processos.iterrows():
-        processo_id = row["id_p"]
-        processo_nome = row["nome"].strip()
+    for processo_nome, df_agrupado in df_alocacoes.groupby("processo", sort=False):
+        processos_exibidos += 1
+        st.subheader(f"{processo_nome}")
+        exibir_tabela(
+            df_agrupado.drop(columns="processo").rename(columns={"valor_alocado": processo_nome}),
+            colunas_moeda=[processo_nome],
+            column_config={
+                col_uc: st.column_config.TextColumn(),
+                col_iniciativa: st.column_config.TextColumn(),
+            }
+        )
 
-        if processo_nome in df_elegiveis.columns:
-            df_elegiveis[processo_nome] = pd.to_numeric(df_elegiveis[processo_nome], errors="coerce").fillna(0)
-            soma_total = df_elegiveis[processo_nome].sum()
+    if processos_exibidos == 0:
+        st.info("Nenhum processo com valores > 0.")
 
-            if soma_total > 0:
-                processos_exibidos += 1
 
-                df_agrupado = (
-                    df_elegiveis
-                    .groupby([col_uc, "Nome da Proposta/Iniciativa Estruturante"], as_index=False)[processo_nome]
-                    .sum()
-                )
+st.divider()
+st.markdown("###### Roll-up por Processo, Geografia e Demandante")
+
+with st.expander("**Cubo de alocações** (roll-up / drill-down)", expanded=False):
+    # Responde a partir de tf_cubo_alocacoes (atualizado a cada salvamento da
+    # distribuição). Os filtros de iniciativa, diretoria e GR da barra lateral
+    # também valem aqui; o de UC não, pois a UC não é dimensão do cubo.
+    hierarquia = st.multiselect(
+        "Hierarquia (na ordem do drill-down)",
+        options=list(DIMENSOES),
+        default=["macroprocesso", "processo"],
+        format_func=DIMENSOES.get,
+        key="cubo_hierarquia"
+    )
 
-                # Filtrar para mostrar somente as linhas com valores maiores que zero
-                df_agrupado = df_agrupado[df_agrupado[processo_nome] > 0]
+    filtros_cubo = {}
+    if st.session_state.get("filtro_iniciativa", "Todos") != "Todos":
+        filtros_cubo["iniciativa"] = st.session_state["filtro_iniciativa"]
+    if st.session_state.get("filtro_gr", "Todas") != "Todas":
+        filtros_cubo["gr"] = st.session_state["filtro_gr"]
+    if st.session_state.get("filtro_demandante", "Todos") != "Todos":
+        demandante_cubo = st.session_state["filtro_demandante"]
+    elif st.session_state["perfil"] not in ["admin", "cocam"]:
+        demandante_cubo = st.session_state["setor"]
+    else:
+        demandante_cubo = None
 
-                # Exemplo: subheader (ou st.markdown)
-                st.subheader(f"{processo_nome}")
-                st.dataframe(df_agrupado, use_container_width=True, hide_index=True, column_config={
-                    col_uc: st.column_config.TextColumn(),
-                    "Nome da Proposta/Iniciativa Estruturante": st.column_config.TextColumn(),
-                    processo_nome: st.column_config.NumberColumn(format="localized", help="R$")
-                })
+    if not hierarquia:
+        st.info("Escolha ao menos uma dimensão.")
 
-    if processos_exibidos == 0:
-        st.info("Nenhum processo com valores > 0.")
+    conn = sqlite3.connect(DB_PATH)
+    for nivel, dimensao in enumerate(hierarquia):
+        if dimensao in filtros_cubo:
+            continue
+        df_cubo = consultar_cubo(conn, [dimensao], filtros_cubo, demandante_cubo)
+        if df_cubo.empty:
+            st.info("Nenhum valor para os filtros selecionados.")
+            break
+
+        caminho = " › ".join(str(v) for v in filtros_cubo.values())
+        st.markdown(f"**{DIMENSOES[dimensao]}**" + (f" — {caminho}" if caminho else ""))
+
+        medidas = ["valor_alocado"] if "teto" not in df_cubo.columns else ["valor_alocado", "teto", "saldo"]
+        fig = px.bar(
+            df_cubo.melt(id_vars=[dimensao], value_vars=medidas, var_name="Medida", value_name="Valor"),
+            x=dimensao, y="Valor", color="Medida", barmode="group",
+            labels={dimensao: DIMENSOES[dimensao]}
+        )
+        st.plotly_chart(fig, use_container_width=True, key=f"cubo_grafico_{nivel}")
+        st.dataframe(
+            df_cubo.rename(columns={dimensao: DIMENSOES[dimensao]}),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "valor_alocado": coluna_moeda("Valor Alocado"),
+                "teto": coluna_moeda("Teto Total"),
+                "saldo": coluna_moeda("Saldo a Distribuir"),
+                "registros": st.column_config.NumberColumn("Registros"),
+            }
+        )
+
+        if nivel == len(hierarquia) - 1:
+            break
+        valor = st.selectbox(
+            f"Detalhar {DIMENSOES[dimensao]}",
+            ["Todos"] + df_cubo[dimensao].dropna().tolist(),
+            key=f"cubo_drill_{dimensao}"
+        )
+        if valor == "Todos":
+            break
+        filtros_cubo[dimensao] = valor
+    conn.close()
 
 
 
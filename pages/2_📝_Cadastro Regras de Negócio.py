@@ -18,6 +18,14 @@ import time as time
 import pytz
 from datetime import datetime, timezone
 
+from hooks.apresentacao import exibir_tabela
+from hooks.arquivo_relatorios import arquivar_versao
+from hooks.cubo_alocacoes import atualizar_cubo_iniciativa
+from hooks.dinheiro import arredondar_reais, de_centavos, saldo_centavos
+from hooks.indice_uc import COLUNAS_IDENTIFICACAO, atualizar_indice_uc, eh_coluna_identificacao
+from hooks.jobs_exportacao import obter_gerenciador_jobs
+from hooks.tetos_exercicio import colunas_teto, rotulo_teto
+
 # -----------------------------------------------------------------------------
 #                     Verificação de Login e Configurações de Página
 # -----------------------------------------------------------------------------
@@ -193,25 +201,10 @@ def salvar_dados_iniciativa(
     if "df_uc_editado" in st.session_state and not st.session_state["df_uc_editado"].empty:
         df_uc = st.session_state["df_uc_editado"]
         # Colunas de identificação que devem ser mantidas
-        id_cols = [
-            "id",
-            "DEMANDANTE (diretoria)",
-            "Nome da Proposta/Iniciativa Estruturante",
-            "AÇÃO DE APLICAÇÃO",
-            "CNUC",
-            "id_demandante",
-            "id_iniciativa",
-            "id_acao",
-            "Unidade de Conservação",
-            "TetoSaldo disponível",
-            "TetoPrevisto 2025",
-            "TetoPrevisto 2026",
-            "TetoPrevisto 2027",
-            "TetoTotalDisponivel",
-            "A Distribuir"
-        ]
-        # Colunas dos eixos (as que não estão nas colunas de identificação)
-        eixo_cols = [col for col in df_uc.columns if col not in id_cols]
+        id_cols = [*COLUNAS_IDENTIFICACAO, *colunas_teto(df_uc.columns)]
+        # Colunas dos eixos (as que não estão nas colunas de identificação
+        # nem são atributos da UC, que também ficam fora do JSON)
+        eixo_cols = [col for col in df_uc.columns if not eh_coluna_identificacao(col)]
         # Filtra os eixos que possuem soma diferente de zero
         filtered_eixos = [col for col in eixo_cols if df_uc[col].astype(float).sum() != 0]
         # Seleciona todas as colunas de identificação e somente os eixos filtrados
@@ -249,10 +242,27 @@ def salvar_dados_iniciativa(
         demais_info_json, eixos_json, acoes_json, insumos_json, regra_json,
         distribuicao_ucs_json, formas_contratacao_json
     ))
+    id_regra = cursor.lastrowid
+
+    # 🗺️ Índice por UC (CNUC -> iniciativa, eixo, valor) na mesma transação
+    atualizar_indice_uc(conn, id_regra)
 
     conn.commit()
+
     conn.close()
 
+    # 🧩 Card, seção e PDF desta versão são gerados em segundo plano e
+    # arquivados; a Visualização e o extrato só reaproveitam o resultado
+    obter_gerenciador_jobs().submeter(
+        tipo="arquivo_relatorio",
+        descricao=f"Arquivo do extrato — iniciativa {id_iniciativa} (versão {id_regra})",
+        funcao=lambda progresso, id_regra=id_regra: arquivar_versao(id_regra, DB_PATH, progresso=progresso),
+        nome_arquivo=f"{id_iniciativa}_{id_regra}.pdf",
+        mime="application/pdf",
+        usuario=usuario,
+        unidade="etapas"
+    )
+
 
     # st.success(f"✅ Cadastro atualizado com sucesso! (Registrado em UTC-3: {data_hora_formatada})")
 
@@ -998,24 +1008,6 @@ with st.form("form_textos_resumo"):
 
   
 
-    # Conjunto das colunas consideradas "padrão" (não são eixos)
-    COL_PADRAO = {
-        "id",
-        "DEMANDANTE (diretoria)",
-        "Nome da Proposta/Iniciativa Estruturante",
-        "AÇÃO DE APLICAÇÃO",
-        "CNUC",
-        "id_demandante",
-        "id_iniciativa",
-        "id_acao",
-        "Unidade de Conservação",
-        "TetoSaldo disponível",
-        "TetoPrevisto 2025",
-        "TetoPrevisto 2026",
-        "TetoPrevisto 2027",
-        "TetoTotalDisponivel",
-        "A Distribuir"
-    }
 # -----------------------------------------------------------------------------
     def load_data_from_db():
         """Carrega e filtra as linhas da tabela para a iniciativa."""
@@ -1031,26 +1023,25 @@ with st.form("form_textos_resumo"):
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
 
-        for idx, row in df_edit.iterrows():
-            registro_id = row["id"]
-            # Para cada eixo
-            for c_eixo in col_eixos:
-                val = float(row.get(c_eixo, 0.0))
-                cursor.execute("""
-                    UPDATE tf_distribuicao_elegiveis
-                    SET "{}" = ?
-                    WHERE id = ?
-                    AND id_iniciativa = ?
-                """.format(c_eixo), (val, registro_id, id_iniciativa))
-
-            saldo_val = float(row.get("A Distribuir", 0.0))
-            cursor.execute("""
+        # eixos e saldo gravados já arredondados no centavo (sem resíduo de float entre ciclos)
+        colunas = list(col_eixos) + ["A Distribuir"]
+        valores = {c: arredondar_reais(df_edit.get(c, pd.Series(0.0, index=df_edit.index))) for c in colunas}
+        set_sql = ", ".join(f'"{c}" = ?' for c in colunas)
+        cursor.executemany(
+            f"""
                 UPDATE tf_distribuicao_elegiveis
-                SET "A Distribuir" = ?
+                SET {set_sql}
                 WHERE id = ?
                 AND id_iniciativa = ?
-            """, (saldo_val, registro_id, id_iniciativa))
+            """,
+            [
+                (*(float(valores[c][i]) for c in colunas), int(registro_id), id_iniciativa)
+                for i, registro_id in enumerate(df_edit["id"])
+            ]
+        )
 
+        # células da iniciativa no cubo de alocações, na mesma transação
+        atualizar_cubo_iniciativa(conn, id_iniciativa)
         conn.commit()
         conn.close()
 
@@ -1062,22 +1053,18 @@ with st.form("form_textos_resumo"):
         if df.empty:
             return df
 
-        col_eixos_db = [c for c in df.columns if c not in COL_PADRAO]
+        col_eixos_db = [c for c in df.columns if not eh_coluna_identificacao(c)]
 
         if "TetoTotalDisponivel" in df.columns:
-            df["TetoTotalDisponivel"] = pd.to_numeric(df["TetoTotalDisponivel"], errors="coerce").fillna(0)
+            df["TetoTotalDisponivel"] = arredondar_reais(df["TetoTotalDisponivel"])
+        else:
+            df["TetoTotalDisponivel"] = 0.0
 
         for c_eixo in col_eixos_db:
-            df[c_eixo] = pd.to_numeric(df[c_eixo], errors="coerce").fillna(0)
+            df[c_eixo] = arredondar_reais(df[c_eixo])
 
-        if "A Distribuir" not in df.columns:
-            df["A Distribuir"] = 0.0
-        else:
-            df["A Distribuir"] = pd.to_numeric(df["A Distribuir"], errors="coerce").fillna(0)
-
-        for idx, row in df.iterrows():
-            soma_eixos = sum(row[c_eixo] for c_eixo in col_eixos_db)
-            df.at[idx, "A Distribuir"] = row["TetoTotalDisponivel"] - soma_eixos
+        # soma e subtração em centavos inteiros, no DataFrame inteiro de uma vez
+        df["A Distribuir"] = de_centavos(saldo_centavos(df["TetoTotalDisponivel"], df[col_eixos_db]))
 
         return df
     
@@ -1219,7 +1206,7 @@ with st.form("form_textos_resumo"):
                 df_viz = df_all.copy()
 
                 # 2.1) Filtra somente colunas de eixos que tenham soma > 0
-                col_eixos_db = [c for c in df_viz.columns if c not in COL_PADRAO]
+                col_eixos_db = [c for c in df_viz.columns if not eh_coluna_identificacao(c)]
                 for c_eixo in col_eixos_db:
                     if df_viz[c_eixo].fillna(0).sum() == 0:
                         df_viz.drop(columns=[c_eixo], inplace=True)
@@ -1236,14 +1223,14 @@ with st.form("form_textos_resumo"):
                 df_viz.insert(0, "No", range(1, len(df_viz) + 1))
 
                 # 2.4) Reconstruir col_eixos_db após eventuais drops
-                col_eixos_db = [c for c in df_viz.columns if c not in COL_PADRAO and c not in ["No"]]
+                col_eixos_db = [c for c in df_viz.columns if not eh_coluna_identificacao(c) and c not in ["No"]]
 
                 # 2.5) Monta lista exibir_cols
                 exibir_cols = ["No", "Unidade de Conservação", "TetoTotalDisponivel", "A Distribuir"]
                 if st.session_state["show_eixos_flag"] and col_eixos_db:
                     exibir_cols += col_eixos_db
 
-                col_tetos = ["TetoSaldo disponível", "TetoPrevisto 2025", "TetoPrevisto 2026", "TetoPrevisto 2027"]
+                col_tetos = colunas_teto(df_viz.columns)
                 if st.session_state["show_tetos_flag"]:
                     for c_teto in col_tetos:
                         if c_teto in df_viz.columns:
@@ -1255,199 +1242,38 @@ with st.form("form_textos_resumo"):
                 exibir_cols = [c for c in exibir_cols if c in df_viz.columns]
                 df_viz = df_viz[exibir_cols]
 
-                # 2.6) Formatação monetária
-                def fmt_moeda(x):
-                    try:
-                        return f"<div style='text-align:right;'>R$ {float(x):,.2f}</div>"
-                    except:
-                        return "<div style='text-align:right;'>R$ 0,00</div>"
-
-                for col_ in df_viz.columns:
-                    if col_ not in ["No", "Unidade de Conservação", "info"]:
-                        df_viz[col_] = df_viz[col_].apply(fmt_moeda)
-
-                # 2.7) Criar coluna “info” (tooltip)
-                def build_tooltip(row):
-                    lines = []
-                    # Eixos
-                    if st.session_state["show_eixos_flag"]:
-                        # Quais eixos aparecem no df_viz?
-                        for c_eixo in col_eixos_db:
-                            if c_eixo in row:
-                                val = row[c_eixo]
-                                if not isinstance(val, str):
-                                    val = fmt_moeda(val)
-                                v_clean = val.replace("<div style='text-align:right;'>","").replace("</div>","")
-                                lines.append(f"{c_eixo}: <strong>{v_clean}</strong>")
-                    # Tetos
-                    if st.session_state["show_tetos_flag"]:
-                        for c_teto in col_tetos:
-                            if c_teto in row:
-                                val = row[c_teto]
-                                if not isinstance(val, str):
-                                    val = fmt_moeda(val)
-                                v_clean = val.replace("<div style='text-align:right;'>","").replace("</div>","")
-                                lines.append(f"{c_teto}: <strong>{v_clean}</strong>")
-
-                    if not lines:
-                        lines.append("Sem dados extras")
-
-                    tooltip_content = "<br>".join(lines)
-                    icon_html = f"""
-                    <span class="tooltip" style="cursor:pointer;">
-                        ℹ️
-                        <span class="tooltiptext">{tooltip_content}</span>
-                    </span>
-                    """
-                    return icon_html.strip()
-
-                df_viz["info"] = df_viz.apply(build_tooltip, axis=1)
-
-                # 2.8) Reposiciona “info” como segunda coluna
-                col_list = list(df_viz.columns)
-                # Remove “info”, remove “No” e reinsera
-                if "info" in col_list:
-                    col_list.remove("info")
-                if "No" in col_list:
-                    col_list.remove("No")
-                col_list = ["No", "info"] + col_list
-                df_viz = df_viz[col_list]
-
-                # exclui coluna info do dataframe para não exibir na tabela
-                df_viz.drop(columns=["info"], inplace=True)
-
-                # exclui coluna No do dataframe para não exibir na tabela
-                df_viz.drop(columns=["No"], inplace=True)
-
-                # Linha de total
-                # Usar df_all (sem formatação)
-                df_all_num = df_all.copy()
-                df_all_num.reset_index(drop=True, inplace=True)
-                df_all_num.insert(0, "No", range(1, len(df_all_num)+1))
-                # Converte numérico
-                for c_ in df_all_num.columns:
-                    if c_ not in ["No", "id", "id_iniciativa", "Unidade de Conservação"]:
-                        df_all_num[c_] = pd.to_numeric(df_all_num[c_], errors="coerce").fillna(0)
-
-                def soma_format(col_name):
-                    if col_name in df_all_num.columns:
-                        return fmt_moeda(df_all_num[col_name].sum())
-                    return "<div style='text-align:right;'>R$ 0,00</div>"
-
-                total_row = {}
-                for c_ in df_viz.columns:
-                    if c_ == "No":
-                        total_row[c_] = ""
-                    elif c_ == "info":
-                        total_row[c_] = ""
-                    elif c_ == "Unidade de Conservação":
-                        total_row[c_] = "<strong>TOTAL</strong>"
-                    else:
-                        # Remove tags <div> se preferir
-                        total_row[c_] = soma_format(c_)
-
-                df_viz.loc[len(df_viz)] = total_row
-
-                # 2.10) Renomear colunas
+                # 2.6) Linha de total, sobre df_all (valores numéricos; a formatação
+                # monetária fica no column_config, sem converter em texto/HTML)
+                df_viz = df_viz.drop(columns=["No"])
+                col_valores = [c for c in df_viz.columns if c != "Unidade de Conservação"]
+                df_viz[col_valores] = df_viz[col_valores].apply(pd.to_numeric, errors="coerce").fillna(0)
+                total_row = {"Unidade de Conservação": "TOTAL"}
+                for c_ in col_valores:
+                    total_row[c_] = pd.to_numeric(df_all[c_], errors="coerce").fillna(0).sum()
+                df_viz = pd.concat([df_viz, pd.DataFrame([total_row])], ignore_index=True)
+
+                # 2.7) Renomear colunas
                 rename_map = {
                     "Unidade de Conservação": "Unidade de Conservação",
-                    "TetoSaldo disponível":   "Teto Saldo Disponível",
-                    "TetoPrevisto 2025":      "Teto Previsto 2025",
-                    "TetoPrevisto 2026":      "Teto Previsto 2026",
-                    "TetoPrevisto 2027":      "Teto Previsto 2027",
+                    **{c_: rotulo_teto(c_) for c_ in colunas_teto(df_viz.columns)},
                     "TetoTotalDisponivel":    "Teto Total",
                     "A Distribuir":           "Saldo a Distribuir"
                 }
                 df_viz.rename(columns=rename_map, inplace=True)
 
                 # ====== DESTAQUE DAS COLUNAS DE EIXO COM SOMA > 0 ======
-                # Precisamos descobrir quais colunas de eixos realmente estão em df_viz.
-                eixos_exibidos = [c for c in col_eixos_db if c in df_viz.columns]
-
-                # Verificamos a soma de cada eixo em df_all para saber se > 0
-                # (df_viz também é formatação HTML, então melhor usar df_all)
-                highlight_eixos = []
-                for e_ in eixos_exibidos:
-                    if df_all[e_].fillna(0).sum() > 0:
-                        highlight_eixos.append(e_)
-
-                # Convert df_viz para Styler
-                df_style = df_viz.style
-
-                # Função para destacar colunas inteiras se elas estiverem em highlight_eixos
-                def highlight_columns(col, eixos):
-                    # Se col.name está em eixos, pintamos
-                    if col.name in eixos:
-                        return [ "background-color: #ffffcc; font-weight: bold;" ]*len(col)
-                    else:
-                        return [ "" ]*len(col)
-
-                # Aplica para cada coluna
-                df_style = df_style.apply(highlight_columns, axis=0, eixos=highlight_eixos)
-
-                # =========== CSS de Tooltip e Tabela ==============
-                custom_css = """
-                <style>
-                .table-container {
-                    max-height: 600px;
-                    overflow-y: auto;
-                    margin-bottom: 1rem;
-                    border: 1px solid #ccc;
-                }
-                .table-container table {
-                    border-collapse: collapse;
-                    width: 100%;
-                }
-                .table-container th, .table-container td {
-                    border: 1px solid #ddd;
-                    padding: 8px;
-                }
-                .table-container th {
-                    background-color: #f2f2f2;
-                    position: sticky;
-                    top: 0;
-                    z-index: 2;
-                    text-align: center;
-                }
-                .tooltip {
-                    position: relative;
-                    display: inline-block;
-                }
-                .tooltip .tooltiptext {
-                    visibility: hidden;
-                    width: 280px;
-                    background-color: #fafafa;
-                    color: #000;
-                    text-align: left;
-                    border: 1px solid #ccc;
-                    padding: 5px;
-                    border-radius: 4px;
-                    font-size: 0.9em;
-                    position: absolute;
-                    z-index: 1;
-                    top: 150%;
-                    left: -120%;
-                }
-                .tooltip:hover .tooltiptext {
-                    visibility: visible;
-                }
-                /* centralizar o ícone de informação */
-                .tooltip {
-                    text-align: center;
-                    display: block;
-                    margin: 0 auto;
-                }
-                /* centralizar primeira coluna (No) */
-                .table-container th:first-child, .table-container td:first-child {
-                    text-align: center;
-                }
-                </style>
-                """
-                st.markdown(custom_css, unsafe_allow_html=True)
-
-                # Renderiza a tabela via Styler
-                html_table = df_style.to_html(index=False, escape=False)
-                st.markdown(f"<div class='table-container'>{html_table}</div>", unsafe_allow_html=True)
+                # (marcadas no cabeçalho; df_all tem os valores de todas as linhas)
+                highlight_eixos = [
+                    e_ for e_ in col_eixos_db
+                    if e_ in df_viz.columns and df_all[e_].fillna(0).sum() > 0
+                ]
+
+                exibir_tabela(
+                    df_viz,
+                    colunas_moeda=[rename_map.get(c_, c_) for c_ in col_valores],
+                    rotulos={e_: f"🟨 {e_}" for e_ in highlight_eixos},
+                    height=min(600, 35 * (len(df_viz) + 1) + 3),
+                )
 
                
 
@@ -1458,7 +1284,7 @@ with st.form("form_textos_resumo"):
                 st.warning("**Modo de Edição:** Ajuste valores e clique em **'🔢 Calcular Saldo'** ou **'✅ Salvar Distribuição'**.")
 
                 df_edit = df_all.copy()
-                col_eixos_db = [c for c in df_edit.columns if c not in COL_PADRAO]
+                col_eixos_db = [c for c in df_edit.columns if not eh_coluna_identificacao(c)]
 
                 # Eixos do session_state
                 eixos_cfg = st.session_state.get("eixos_tematicos", [])
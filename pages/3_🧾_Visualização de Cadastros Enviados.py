@@ -4,21 +4,23 @@
 import streamlit as st
 import sqlite3
 import pandas as pd
-import json
 from datetime import datetime
 import html
 import re
 import tempfile
-from io import BytesIO
 import os 
 import base64
-# PDF com xhtml2pdf
-from xhtml2pdf import pisa
-
 # Visualização de PDF
 from streamlit_pdf_viewer import pdf_viewer
 from datetime import datetime
 
+from hooks.jobs_exportacao import obter_gerenciador_jobs, exibir_jobs
+from hooks.relatorio_pdf import documento_html, montar_relatorio_pdf
+from hooks.arquivo_relatorios import pdf_arquivado
+from hooks.excel_cadastros import gerar_excel_por_abas
+from hooks.exportacao_delta import versao_tabela
+from hooks.render_iniciativas import abrir_cache_fragmentos, FORMATO_CARD, FORMATO_PDF
+
 # Verificação de login no Streamlit
 if "usuario_logado" not in st.session_state or not st.session_state["usuario_logado"]:
     st.warning("🔒 Acesso negado! Faça login na página principal para acessar esta seção.")
@@ -61,12 +63,15 @@ st.markdown(BACKGROUND_CSS, unsafe_allow_html=True)
 ###############################################################################
 #                    2. FUNÇÕES DE CARREGAMENTO DE DADOS                      #
 ###############################################################################
-def load_iniciativas(setor: str, perfil: str) -> pd.DataFrame:
-    """Carrega iniciativas do banco SQLite conforme setor e perfil."""
-    conn = sqlite3.connect("database/app_data.db")
-    if perfil in ("admin", "cocam"):
-        query = """
-        SELECT r.*, i.nome_iniciativa
+# cards por página na visualização (o resumo é leve; o card completo só é
+# montado quando o usuário expande a iniciativa)
+TAMANHO_PAGINA = 10
+TODAS_INICIATIVAS = "📚 Todas as iniciativas"
+
+def _sql_iniciativas(colunas: str, setor: str, perfil: str, id_iniciativa=None) -> tuple[str, list]:
+    """Consulta da última versão de cada iniciativa visível ao usuário."""
+    query = f"""
+        SELECT {colunas}
         FROM tf_cadastro_regras_negocio r
         JOIN td_iniciativas i ON r.id_iniciativa = i.id_iniciativa
         JOIN (
@@ -75,380 +80,86 @@ def load_iniciativas(setor: str, perfil: str) -> pd.DataFrame:
             GROUP BY id_iniciativa
         ) sub ON sub.id_iniciativa = r.id_iniciativa
              AND sub.max_data = r.data_hora
-        ORDER BY r.data_hora DESC
+    """
+    filtros, params = [], []
+    if perfil not in ("admin", "cocam"):
+        query += " JOIN tf_usuarios u ON r.usuario = u.cpf"
+        filtros.append("u.setor_demandante = ?")
+        params.append(setor)
+    if id_iniciativa is not None:
+        filtros.append("r.id_iniciativa = ?")
+        params.append(int(id_iniciativa))
+    if filtros:
+        query += " WHERE " + " AND ".join(filtros)
+    return query, params
+
+def load_iniciativas(setor: str, perfil: str, id_iniciativa=None) -> pd.DataFrame:
+    """Carrega iniciativas (linhas completas) do banco SQLite conforme setor e perfil."""
+    conn = sqlite3.connect("database/app_data.db")
+    query, params = _sql_iniciativas("r.*, i.nome_iniciativa", setor, perfil, id_iniciativa)
+    df = pd.read_sql_query(query + " ORDER BY r.data_hora DESC", conn, params=params)
+    conn.close()
+    return df
+
+def load_lista_iniciativas(setor: str, perfil: str) -> pd.DataFrame:
+    """Somente id e nome das iniciativas, para o seletor."""
+    conn = sqlite3.connect("database/app_data.db")
+    query, params = _sql_iniciativas("r.id_iniciativa, i.nome_iniciativa", setor, perfil)
+    df = pd.read_sql_query(query + " ORDER BY r.data_hora DESC", conn, params=params)
+    conn.close()
+    return df
+
+def load_resumo_iniciativas(setor: str, perfil: str, limite: int, offset: int, id_iniciativa=None) -> pd.DataFrame:
+    """Uma página de resumos (sem os JSONs pesados), paginada no próprio SQL."""
+    conn = sqlite3.connect("database/app_data.db")
+    query, params = _sql_iniciativas(
+        """r.id, r.id_iniciativa, i.nome_iniciativa, r.usuario, r.data_hora,
+           substr(r.objetivo_geral, 1, 300) AS objetivo_geral_resumo""",
+        setor, perfil, id_iniciativa
+    )
+    df = pd.read_sql_query(
+        query + " ORDER BY r.data_hora DESC, r.id DESC LIMIT ? OFFSET ?",
+        conn, params=params + [limite, offset]
+    )
+    conn.close()
+    return df
+
+def load_regra(id_regra: int) -> pd.Series:
+    """Linha completa de uma regra (carregada só quando o card é expandido)."""
+    conn = sqlite3.connect("database/app_data.db")
+    df = pd.read_sql_query(
         """
-        df = pd.read_sql_query(query, conn)
-    else:
-        query = """
         SELECT r.*, i.nome_iniciativa
         FROM tf_cadastro_regras_negocio r
         JOIN td_iniciativas i ON r.id_iniciativa = i.id_iniciativa
-        JOIN tf_usuarios u ON r.usuario = u.cpf
-        JOIN (
-            SELECT id_iniciativa, MAX(data_hora) AS max_data
-            FROM tf_cadastro_regras_negocio
-            GROUP BY id_iniciativa
-        ) sub ON sub.id_iniciativa = r.id_iniciativa
-             AND sub.max_data = r.data_hora
-        WHERE u.setor_demandante = ?
-        ORDER BY r.data_hora DESC
-        """
-        df = pd.read_sql_query(query, conn, params=[setor])
+        WHERE r.id = ?
+        """,
+        conn, params=[int(id_regra)]
+    )
     conn.close()
-    return df
+    return df.iloc[0]
 
-def load_acoes_map():
-    """Retorna dict id_acao -> nome_acao."""
+def versao_dimensoes() -> int:
+    """Versão de td_insumos no log de alterações (chave do cache das dimensões)."""
     conn = sqlite3.connect("database/app_data.db")
-    df = pd.read_sql_query("SELECT id_ac, nome FROM td_samge_acoes_manejo", conn)
+    versao = versao_tabela(conn, "td_insumos")
     conn.close()
-    return {str(row['id_ac']): row['nome'] for _, row in df.iterrows()}
+    return versao
 
-def load_insumos_map():
-    """Retorna dict id_insumo -> descricao_insumo."""
+@st.cache_data(show_spinner=False)
+def load_dimensoes(versao: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Ações de manejo (id_ac, nome) e insumos (id, descricao_insumo) para os merges do Excel."""
     conn = sqlite3.connect("database/app_data.db")
-    df = pd.read_sql_query("SELECT id, descricao_insumo FROM td_insumos", conn)
+    df_acoes = pd.read_sql_query("SELECT id_ac, nome FROM td_samge_acoes_manejo", conn)
+    df_insumos = pd.read_sql_query("SELECT id, descricao_insumo FROM td_insumos", conn)
     conn.close()
-    return {str(row['id']): row['descricao_insumo'] for _, row in df.iterrows()}
-
-acoes_map = load_acoes_map()
-insumos_map = load_insumos_map()
+    return df_acoes, df_insumos
 
 ###############################################################################
-#                      3. FUNÇÕES DE FORMATAÇÃO DE CONTEÚDO (HTML)           #
+#                      3. FRAGMENTOS HTML (CACHE PERSISTENTE)                 #
 ###############################################################################
-def safe_html(value: str) -> str:
-    if value is None:
-        value = ""
-    return html.escape(str(value)).replace("\n", "<br>")
-
-def format_objetivos_especificos(json_str):
-    """Formata JSON de objetivos específicos em HTML (<ul>...</ul>)"""
-    try:
-        data = json.loads(json_str)
-        if isinstance(data, list):
-            if not data:
-                return "Nenhum objetivo específico."
-            html_list = "<ul>"
-            for item in data:
-                item_escaped = html.escape(str(item))
-                html_list += f"<li>{item_escaped}</li>"
-            html_list += "</ul>"
-            return html_list
-
-        elif isinstance(data, dict):
-            if not data:
-                return "Nenhum objetivo específico."
-            html_list = "<ul>"
-            for k, v in data.items():
-                item_escaped = f"{html.escape(str(k))}: {html.escape(str(v))}"
-                html_list += f"<li>{item_escaped}</li>"
-            html_list += "</ul>"
-            return html_list
-
-        return html.escape(str(data))
-    except Exception:
-        return html.escape(json_str)
-
-def format_eixos_tematicos_table(json_str):
-    """Tabela de Eixos Temáticos (Eixo, Ação de Manejo, Insumos) em HTML."""
-    try:
-        data = json.loads(json_str)
-        if not data:
-            return "Nenhum eixo temático cadastrado."
-
-        table_html = """<table>
-<thead>
-<tr>
-<th>Eixo Temático</th>
-<th>Ação de Manejo</th>
-<th>Insumos</th>
-</tr>
-</thead>
-<tbody>
-"""
-        for eixo in data:
-            nome_eixo = eixo.get("nome_eixo", "Sem nome")
-            acoes = eixo.get("acoes_manejo", {})
-            if not acoes:
-                table_html += f"""
-<tr>
-<td>{nome_eixo}</td>
-<td>Nenhuma ação de manejo</td>
-<td>-</td>
-</tr>
-"""
-            else:
-                for acao_id, detalhes in acoes.items():
-                    nome_acao = acoes_map.get(str(acao_id), f"Ação {acao_id}")
-                    insumos_list = detalhes.get("insumos", [])
-                    if insumos_list:
-                        especificacoes = detalhes.get("especificacao_padrao", {})
-                        insumos_por_especificacao = {}
-                        for insumo_id in insumos_list:
-                            insumo_nome = insumos_map.get(str(insumo_id), str(insumo_id))
-                            especificacao_padrao = especificacoes.get(str(insumo_id), "Sem especificação")
-                            if especificacao_padrao not in insumos_por_especificacao:
-                                insumos_por_especificacao[especificacao_padrao] = []
-                            insumos_por_especificacao[especificacao_padrao].append(insumo_nome)
-
-                        insumos_html = "<ul>"
-                        for especificacao, insumos in insumos_por_especificacao.items():
-                            especificacao_escaped = html.escape(especificacao)
-                            insumos_html += f"<li>{especificacao_escaped}<ul>"
-                            for insumo in insumos:
-                                insumo_escaped = html.escape(insumo)
-                                insumos_html += f"<li>{insumo_escaped}</li>"
-                            insumos_html += "</ul></li>"
-                        insumos_html += "</ul>"
-                    else:
-                        insumos_html = "-"
-                    table_html += f"""
-<tr>
-<td>{html.escape(nome_eixo)}</td>
-<td>{html.escape(nome_acao)}</td>
-<td>{insumos_html}</td>
-</tr>
-"""
-        table_html += "</tbody></table>"
-        return table_html.strip()
-    except Exception as e:
-        return f"Erro ao gerar tabela de Eixos Temáticos: {str(e)}"
-
-def format_formas_contratacao(json_str):
-    """Tabelas de Formas de Contratação e detalhes, em HTML."""
-    try:
-        data = json.loads(json_str)
-        if not data:
-            return "<p>Nenhuma forma de contratação cadastrada.</p>"
-
-        tabela_formas = data.get("tabela_formas", [])
-        if not tabela_formas:
-            formas_html = "<p>Nenhuma forma de contratação listada.</p>"
-        else:
-            formas_html = """
-<table>
-<thead>
-<tr><th>Forma de Contratação</th><th>Status</th></tr>
-</thead>
-<tbody>
-"""
-            for item in tabela_formas:
-                forma = str(item.get("Forma de Contratação", "Sem descrição"))
-                selecionado = item.get("Selecionado", False)
-                status = "✅ Selecionado" if selecionado else "❌ Não selecionado"
-                formas_html += f"""
-<tr>
-<td>{html.escape(forma)}</td>
-<td>{html.escape(status)}</td>
-</tr>
-"""
-            formas_html += "</tbody></table>"
-
-        detalhes_html = ""
-        detalhes_por_forma = data.get("detalhes_por_forma", {})
-        for forma, dict_det in detalhes_por_forma.items():
-            detalhes_html += f"<h4>{html.escape(forma)}</h4>"
-            if not dict_det:
-                detalhes_html += "<p>Sem detalhes específicos.</p>"
-                continue
-
-            detalhes_html += """
-<table>
-<thead>
-<tr><th>Campo</th><th>Valor</th></tr>
-</thead>
-<tbody>
-"""
-            for k, v in dict_det.items():
-                if isinstance(v, list):
-                    if v:
-                        v = "<ul>" + "".join(f"<li>{html.escape(str(item))}</li>" for item in v) + "</ul>"
-                    else:
-                        v = "Nenhuma opção selecionada"
-                detalhes_html += f"""
-<tr>
-<td>{html.escape(str(k))}</td>
-<td>{v}</td>
-</tr>
-"""
-            detalhes_html += "</tbody></table>"
-
-        return formas_html.strip() + "<br>" + detalhes_html.strip()
-    except Exception as e:
-        return f"<p>Erro ao formatar as formas de contratação: {html.escape(str(e))}</p>"
-
-def format_insumos(json_str):
-    """Lista de insumos (IDs -> descrições) ou dict, em HTML."""
-    try:
-        data = json.loads(json_str)
-        if isinstance(data, list):
-            result = [insumos_map.get(str(insumo), str(insumo)) for insumo in data]
-            result = sorted(result, key=lambda x: x.lower())
-            if not result:
-                return "Nenhum insumo cadastrado."
-            return "- " + "<br>- ".join(result)
-        elif isinstance(data, dict):
-            sorted_items = sorted(data.items(), key=lambda x: str(x[0]).lower())
-            lines = []
-            for k, v in sorted_items:
-                lines.append(f"{k}: {v}")
-            return "<br>".join(lines)
-        return str(data)
-    except Exception:
-        return str(json_str)
-
-def process_generic_json(field: str) -> str:
-    """Formata JSON simples (list/dict) em bullet ou key:value (HTML)."""
-    try:
-        data = json.loads(field)
-        if isinstance(data, list):
-            return "- " + "<br>- ".join(map(str, data))
-        elif isinstance(data, dict):
-            lines = []
-            for k, v in data.items():
-                if v is None or v == "":
-                    v = "Não informado"
-                lines.append(f"{k}: {v}")
-            return "<br>".join(lines)
-        return str(data)
-    except Exception:
-        return str(field)
-
-def format_float_br(value_str: str) -> str:
-    """Converte float p/ estilo brasileiro (1.234,56)."""
-    if not value_str:
-        return ""
-    try:
-        val = float(value_str)
-    except ValueError:
-        return value_str
-    val_en = f"{val:,.2f}"  
-    parts = val_en.split(".")
-    integer_part = parts[0].replace(",", ".")
-    decimal_part = parts[1]
-    val_br = integer_part + "," + decimal_part
-    return val_br
-
-def format_distribuicao_ucs(json_str: str) -> str:
-    """Tabela HTML para distribuição por unidade."""
-    try:
-        data = json.loads(json_str)
-        if not data or not isinstance(data, list):
-            return "<p>Nenhuma informação de distribuição.</p>"
-
-        df = pd.DataFrame(data)
-        df_aggregated = df.groupby(["Unidade", "Acao"], as_index=False)["Valor Alocado"].sum()
-
-        table_html = """
-<table>
-<thead>
-<tr><th>Unidade</th><th>Ação de Aplicação</th><th style="text-align:right;">Valor Alocado</th></tr>
-</thead>
-<tbody>
-"""
-        for _, row_ in df_aggregated.iterrows():
-            unidade = html.escape(str(row_["Unidade"]))
-            acao = html.escape(str(row_["Acao"]))
-            valor_formatado = format_float_br(str(row_["Valor Alocado"]))
-            table_html += f"""
-<tr><td>{unidade}</td><td>{acao}</td><td style="text-align:right;">{valor_formatado}</td></tr>
-"""
-        table_html += "</tbody></table>"
-        return table_html
-    except Exception as e:
-        return f"<p>Erro ao formatar distribuição por unidade: {html.escape(str(e))}</p>"
-
-def format_distribuicao_por_eixo(json_str: str) -> str:
-    """Tabela(s) HTML da distribuição por eixo."""
-    try:
-        data = json.loads(json_str)
-        if not data or not isinstance(data, list):
-            return "<p>Nenhuma informação de distribuição.</p>"
-
-        df = pd.DataFrame(data)
-        colunas_base = {"Unidade", "Acao", "Valor Alocado", "Distribuir"}
-        eixos_cols = [col for col in df.columns if col not in colunas_base]
-        if not eixos_cols:
-            return "<p>Nenhum eixo temático identificado.</p>"
-
-        df_aggregated = df.groupby(["Unidade", "Acao"], as_index=False)[eixos_cols + ["Valor Alocado"]].sum()
-
-        html_output = ""
-        soma_por_eixo = {}
-        for eixo in eixos_cols:
-            df_eixo = df_aggregated[df_aggregated[eixo] > 0].copy()
-            if df_eixo.empty:
-                continue
-
-            table_html = f"""
-<h4>Eixo: {html.escape(eixo)}</h4>
-<table>
-<thead>
-<tr><th>Unidade</th><th>Ação</th><th style="text-align:right;">Valor {html.escape(eixo)}</th></tr>
-</thead>
-<tbody>
-"""
-            total_eixo = 0.0
-            for _, row_ in df_eixo.iterrows():
-                unidade = html.escape(str(row_["Unidade"]))
-                acao = html.escape(str(row_["Acao"]))
-                valor_eixo = float(row_[eixo])
-                total_eixo += valor_eixo
-                valor_formatado = format_float_br(str(valor_eixo))
-                table_html += f"""
-<tr><td>{unidade}</td><td>{acao}</td><td style="text-align:right;">{valor_formatado}</td></tr>
-"""
-            table_html += "</tbody></table>"
-            soma_por_eixo[eixo] = total_eixo
-            total_eixo_str = format_float_br(str(total_eixo))
-            html_output += table_html + f"<p><strong>Total do Eixo</strong>: {total_eixo_str}</p><hr>"
-
-        if soma_por_eixo:
-            html_output += "<h4>Resumo por Eixo</h4>"
-            table_resumo = """
-<table>
-<thead>
-<tr><th>Eixo</th><th style="text-align:right;">Valor Total</th></tr>
-</thead>
-<tbody>
-"""
-            for eixo_nome, valor_total in sorted(soma_por_eixo.items(), key=lambda x: x[0]):
-                valor_total_str = format_float_br(str(valor_total))
-                table_resumo += f"<tr><td>{html.escape(eixo_nome)}</td><td style='text-align:right;'>{valor_total_str}</td></tr>"
-            table_resumo += "</tbody></table>"
-            html_output += table_resumo
-
-        return html_output
-    except Exception as e:
-        return f"<p>Erro ao gerar distribuição: {html.escape(str(e))}</p>"
-
-LABEL_MAP = {
-    "diretoria": "Diretoria Responsável",
-    "coordenacao_geral": "Coordenação Geral",
-    "coordenacao": "Coordenação",
-    "demandante": "Setor Demandante"
-}
-
-def format_demais_informacoes(json_str: str) -> str:
-    """Formata 'Demais Informações' para exibir apenas dados do usuário responsável."""
-    try:
-        data = json.loads(json_str)
-    except:
-        return "<p>Erro ao carregar informações.</p>"
-
-    if not data:
-        return "<p>Sem informações adicionais.</p>"
-
-    # Ajuste para exibir apenas Diretoria e Usuário Responsável
-    html_list = "<ul>"
-    html_list += f"<li><strong>📌 Diretoria:</strong> {html.escape(str(data.get('diretoria', 'Não informado')))}</li>"
-    html_list += f"<li><strong>👤 Usuário Responsável:</strong> {html.escape(str(data.get('usuario_nome', 'Não informado')))}</li>"
-    html_list += f"<li><strong>📧 E-mail:</strong> {html.escape(str(data.get('usuario_email', 'Não informado')))}</li>"
-    html_list += f"<li><strong>🔰 Perfil:</strong> {html.escape(str(data.get('perfil', 'Não informado')))}</li>"
-    html_list += "</ul>"
-
-    return html_list
+# Cache de fragmentos (card/PDF) gravados no salvamento de cada regra: cada uso
+# abre a sua conexão com `abrir_cache_fragmentos` e a fecha ao terminar.
 
 ###############################################################################
 #       4. SELEÇÃO DE INICIATIVA E EXIBIÇÃO NA INTERFACE (HTML)              #
@@ -456,14 +167,23 @@ def format_demais_informacoes(json_str: str) -> str:
 perfil_usuario = st.session_state.get("perfil", "")
 setor_usuario  = st.session_state.get("setor", "")
 
-df_iniciativas = load_iniciativas(setor_usuario, perfil_usuario)
-if df_iniciativas.empty:
+df_lista = load_lista_iniciativas(setor_usuario, perfil_usuario)
+if df_lista.empty:
     st.info("ℹ️ Nenhuma iniciativa encontrada para o seu setor.")
     st.stop()
 
-nomes_iniciativas = df_iniciativas['nome_iniciativa'].unique().tolist()
+ids_por_nome = dict(zip(df_lista['nome_iniciativa'], df_lista['id_iniciativa']))
+nomes_iniciativas = df_lista['nome_iniciativa'].unique().tolist()
+if perfil_usuario in ("admin", "cocam") or len(nomes_iniciativas) > 1:
+    nomes_iniciativas = [TODAS_INICIATIVAS] + nomes_iniciativas
 iniciativa_selecionada = st.selectbox("Selecione a iniciativa", nomes_iniciativas)
-df_filtrado = df_iniciativas[df_iniciativas['nome_iniciativa'] == iniciativa_selecionada]
+id_iniciativa_filtro = (
+    None if iniciativa_selecionada == TODAS_INICIATIVAS else ids_por_nome[iniciativa_selecionada]
+)
+
+def carregar_selecao() -> pd.DataFrame:
+    """Linhas completas da seleção atual (usadas só nos downloads)."""
+    return load_iniciativas(setor_usuario, perfil_usuario, id_iniciativa_filtro)
 
 # CSS para layout original no Streamlit
 card_css = """
@@ -528,418 +248,87 @@ th {
 """
 st.markdown(card_css, unsafe_allow_html=True)
 
-# Exibe os cards HTML na interface
-st.markdown("<div class='card-container'>", unsafe_allow_html=True)
-for _, row in df_filtrado.iterrows():
-    nome_iniciativa  = safe_html(row.get('nome_iniciativa', ''))
-    objetivo_geral   = safe_html(row.get('objetivo_geral', ''))
-    introducao       = safe_html(row.get('introducao', ''))
-    justificativa    = safe_html(row.get('justificativa', ''))
-    metodologia      = safe_html(row.get('metodologia', ''))
-    responsavel      = safe_html(row.get('usuario', ''))
-
-    objetivos_especificos = format_objetivos_especificos(row.get('objetivos_especificos', '') or '')
-    eixos_tematicos       = format_eixos_tematicos_table(row.get('eixos_tematicos', '') or '')
-    insumos               = format_insumos(row.get('insumos', '') or '')
-    distribuicao_ucs      = format_distribuicao_ucs(row.get('distribuicao_ucs', '') or '')
-    distribuicao_ucs_eixo = format_distribuicao_por_eixo(row.get('distribuicao_ucs', '') or '')
-    formas_contratacao    = format_formas_contratacao(row.get('formas_contratacao', '') or '')
-    demais_informacoes    = format_demais_informacoes(row.get('demais_informacoes', '') or '')
-
-    data_hora_str = row.get('data_hora')
+# Paginação no SQL: cada página traz só os resumos; o card completo
+# (tabelas de eixos e distribuição) vem do cache ao expandir
+total_cards = 1 if id_iniciativa_filtro is not None else len(df_lista)
+total_paginas = max(1, -(-total_cards // TAMANHO_PAGINA))
+pagina = 1
+if total_paginas > 1:
+    col_pagina, col_info = st.columns([1, 4])
+    with col_pagina:
+        pagina = st.number_input("Página", min_value=1, max_value=total_paginas, value=1, step=1)
+    with col_info:
+        inicio = (pagina - 1) * TAMANHO_PAGINA
+        st.caption(f"Exibindo {inicio + 1}–{min(inicio + TAMANHO_PAGINA, total_cards)} de {total_cards} iniciativas")
+
+df_pagina = load_resumo_iniciativas(
+    setor_usuario, perfil_usuario,
+    limite=TAMANHO_PAGINA, offset=(pagina - 1) * TAMANHO_PAGINA,
+    id_iniciativa=id_iniciativa_filtro
+)
+
+for _, resumo in df_pagina.iterrows():
+    data_hora_str = resumo.get('data_hora')
     if data_hora_str:
         data_hora_fmt = datetime.strptime(data_hora_str, '%Y-%m-%d %H:%M:%S').strftime('%d/%m/%Y %H:%M')
     else:
         data_hora_fmt = "(sem data)"
 
-    card_html = f"""
-    <div class="card">
-        <div class="card-section">
-            <h3>{nome_iniciativa}</h3>
-        </div>
-        <div class="card-section">
-            <div class="card-section-title">Objetivo Geral</div>
-            {objetivo_geral}
-        </div>
-        <div class="card-section">
-            <div class="card-section-title">Objetivos Específicos</div>
-            {objetivos_especificos}
-        </div>
-        <div class="card-section">
-            <div class="card-section-title">Introdução</div>
-            {introducao}
-        </div>
-        <div class="card-section">
-            <div class="card-section-title">Justificativa</div>
-            {justificativa}
-        </div>
-        <div class="card-section">
-            <div class="card-section-title">Metodologia</div>
-            {metodologia}
-        </div>
-        <div class="card-section">
-            <div class="card-section-title">Eixos Temáticos</div>
-            {eixos_tematicos}
-        </div>
-        <div class="card-section">
-            <div class="card-section-title">Lista de Insumos Selecionados</div>
-            {insumos}
-        </div>
-        <div class="card-section">
-            <div class="card-section-title">Distribuição por Unidade</div>
-            {distribuicao_ucs}
-        </div>
-        <div class="card-section">
-            <div class="card-section-title">Distribuição por Unidade / Eixo</div>
-            {distribuicao_ucs_eixo}
-        </div>
-        <div class="card-section">
-            <div class="card-section-title">Formas de Contratação</div>
-            {formas_contratacao}
-        </div>
-        <div class="card-section">
-            <div class="card-section-title">Demais Informações</div>
-            {demais_informacoes}
-        </div>
-        <div style="margin-top: 15px;">
-            <span class="badge">Responsável: {responsavel}</span>
-            <span class="badge">Data/Hora: {data_hora_fmt}</span>
+    expandir = st.toggle(
+        f"📄 {resumo['nome_iniciativa']}",
+        value=id_iniciativa_filtro is not None,
+        key=f"card_detalhes_{resumo['id']}"
+    )
+    if expandir:
+        with abrir_cache_fragmentos() as cache_fragmentos:
+            card_html = cache_fragmentos.obter(load_regra(resumo['id']), FORMATO_CARD)
+    else:
+        card_html = f"""
+        <div class="card">
+            <div class="card-section">
+                <div class="card-section-title">Objetivo Geral</div>
+                {html.escape(str(resumo.get('objetivo_geral_resumo') or ''))}
+            </div>
+            <div>
+                <span class="badge">Responsável: {html.escape(str(resumo.get('usuario', '')))}</span>
+                <span class="badge">Data/Hora: {data_hora_fmt}</span>
+            </div>
         </div>
-    </div>
-    """
+        """
     st.markdown(card_html, unsafe_allow_html=True)
-st.markdown("</div>", unsafe_allow_html=True)
 
 ###############################################################################
 #  5. ABORDAGEM XHTML2PDF COM HTML SIMPLIFICADO (PRETO E BRANCO, SEÇÕES)      #
 ###############################################################################
-def generate_html_for_iniciativas(df: pd.DataFrame) -> str:
-    minimal_css = """
-    <style>
-    body {
-        font-family: Arial, sans-serif;
-        color: #000;
-        font-size: 12px;
-        margin: 20px;
-    }
-    h2, h3, h4 {
-        color: #000;
-        margin-bottom: 8px;
-        margin-top: 20px;
-    }
-    table {
-        border-collapse: collapse;
-        width: 100%;
-        margin-bottom: 15px;
-    }
-    table, th, td {
-        border: 1px solid #000;
-        padding: 5px;
-        vertical-align: top;
-    }
-    th {
-        background-color: #eee;
-    }
-    ul {
-        margin-bottom: 15px;
-        padding-left: 20px;
-    }
-    .section-title {
-        font-weight: bold;
-        margin: 10px 0 5px 0;
-    }
-    .subtitle {
-        font-weight: bold;
-        margin: 5px 0;
-    }
-    hr {
-        margin: 20px 0;
-    }
-    </style>
-    """
-
-    html_out = f"""
-    <html>
-    <head>
-        <meta charset="utf-8"/>
-        {minimal_css}
-    </head>
-    <body>
-    <h2>Relatório de Iniciativas e Regras de Negócio</h2>
-    """
-
-    for _, row in df.iterrows():
-        nome_iniciativa  = safe_html(row.get('nome_iniciativa', ''))
-        objetivo_geral   = safe_html(row.get('objetivo_geral', ''))
-        introducao       = safe_html(row.get('introducao', ''))
-        justificativa    = safe_html(row.get('justificativa', ''))
-        metodologia      = safe_html(row.get('metodologia', ''))
-        responsavel      = safe_html(row.get('usuario', ''))
-
-        objetivos_especificos = format_objetivos_especificos(row.get('objetivos_especificos', '') or '')
-        eixos_tematicos       = format_eixos_tematicos_table(row.get('eixos_tematicos', '') or '')
-        insumos               = format_insumos(row.get('insumos', '') or '')
-        distrib_ucs           = format_distribuicao_ucs(row.get('distribuicao_ucs', '') or '')
-        distrib_ucs_eixo      = format_distribuicao_por_eixo(row.get('distribuicao_ucs', '') or '')
-        formas_contratacao    = format_formas_contratacao(row.get('formas_contratacao', '') or '')
-        demais_informacoes    = format_demais_informacoes(row.get('demais_informacoes', '') or '')
-
-        data_hora_str = row.get('data_hora')
-        if data_hora_str:
-            data_hora_fmt = datetime.strptime(data_hora_str, '%Y-%m-%d %H:%M:%S').strftime('%d/%m/%Y %H:%M')
-        else:
-            data_hora_fmt = "(sem data)"
-
-        html_out += f"""
-        <hr/>
-        <h3>Iniciativa: {nome_iniciativa}</h3>
-
-        <div class="section-title">Objetivo Geral</div>
-        <p>{objetivo_geral}</p>
-
-        <div class="section-title">Objetivos Específicos</div>
-        {objetivos_especificos}
-
-        <div class="section-title">Introdução</div>
-        <p>{introducao}</p>
-
-        <div class="section-title">Justificativa</div>
-        <p>{justificativa}</p>
-
-        <div class="section-title">Metodologia</div>
-        <p>{metodologia}</p>
-
-        <div class="section-title">Eixos Temáticos</div>
-        {eixos_tematicos}
-
-        <div class="section-title">Insumos</div>
-        <p>{insumos}</p>
-
-        <div class="section-title">Distribuição por Unidade</div>
-        {distrib_ucs}
-
-        <div class="section-title">Distribuição por Unidade / Eixo</div>
-        {distrib_ucs_eixo}
-
-        <div class="section-title">Formas de Contratação</div>
-        {formas_contratacao}
-
-        <div class="section-title">Demais Informações</div>
-        {demais_informacoes}
-
-        <p><strong>Responsável:</strong> {responsavel} |
-           <strong>Data/Hora:</strong> {data_hora_fmt}</p>
-        """
-
-    html_out += """
-    </body>
-    </html>
-    """
-    return html_out
-
-def create_pdf_from_html(html_string: str) -> str:
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    pdf_path = temp_file.name
-    temp_file.close()
-
-    pisa_status = pisa.CreatePDF(
-        src=html_string,
-        dest=open(pdf_path, "wb"),
-        encoding='utf-8'
-    )
-    if pisa_status.err:
-        raise ValueError("Erro ao gerar PDF com xhtml2pdf")
-
-    return pdf_path
-
-def create_pdf_bytes(html_string: str) -> bytes:
-    pdf_buffer = BytesIO()
-    pisa_status = pisa.CreatePDF(
-        src=html_string,
-        dest=pdf_buffer,
-        encoding='utf-8'
-    )
-    if pisa_status.err:
-        st.error("Erro ao gerar PDF com xhtml2pdf")
-        st.write(pisa_status.log)
-        raise ValueError("Erro ao gerar PDF com xhtml2pdf")
-
-    pdf_data = pdf_buffer.getvalue()
-    pdf_buffer.close()
-    return pdf_data
-
-###############################################################################
-#  6. GERAR EXCEL COM MÚLTIPLAS ABAS                                          #
-###############################################################################
-def parse_eixos_tematicos(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Converte a coluna 'eixos_tematicos' (JSON) em um DataFrame tabular:
-    id_iniciativa, nome_iniciativa, nome_eixo, acao_id, acao_nome, insumo_id, insumo_nome
-    """
-    rows = []
-    for _, row in df.iterrows():
-        eixos_json = row.get('eixos_tematicos', '')
-        nome_ini = row.get('nome_iniciativa', '')
-        id_ini   = row.get('id_iniciativa', '')
-        try:
-            data = json.loads(eixos_json)
-            for eixo in data:
-                nome_eixo = eixo.get("nome_eixo", "")
-                acoes = eixo.get("acoes_manejo", {})
-                if not acoes:
-                    rows.append({
-                        "id_iniciativa": id_ini,
-                        "nome_iniciativa": nome_ini,
-                        "nome_eixo": nome_eixo,
-                        "acao_id": None,
-                        "acao_nome": None,
-                        "insumo_id": None,
-                        "insumo_nome": None
-                    })
-                else:
-                    for acao_id, detalhes in acoes.items():
-                        nome_acao = acoes_map.get(str(acao_id), f"Ação {acao_id}")
-                        insumos_list = detalhes.get("insumos", [])
-                        if insumos_list:
-                            for ins_id in insumos_list:
-                                rows.append({
-                                    "id_iniciativa": id_ini,
-                                    "nome_iniciativa": nome_ini,
-                                    "nome_eixo": nome_eixo,
-                                    "acao_id": acao_id,
-                                    "acao_nome": nome_acao,
-                                    "insumo_id": ins_id,
-                                    "insumo_nome": insumos_map.get(str(ins_id), str(ins_id))
-                                })
-                        else:
-                            rows.append({
-                                "id_iniciativa": id_ini,
-                                "nome_iniciativa": nome_ini,
-                                "nome_eixo": nome_eixo,
-                                "acao_id": acao_id,
-                                "acao_nome": nome_acao,
-                                "insumo_id": None,
-                                "insumo_nome": None
-                            })
-        except:
-            pass
-
-    if rows:
-        return pd.DataFrame(rows)
-    else:
-        return pd.DataFrame(columns=[
-            "id_iniciativa","nome_iniciativa","nome_eixo","acao_id","acao_nome","insumo_id","insumo_nome"
-        ])
-
-def parse_distribuicao_ucs(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Converte a coluna 'distribuicao_ucs' (JSON) em um DataFrame tabular:
-    id_iniciativa, nome_iniciativa, Unidade, Acao, Valor Alocado
-    """
-    rows = []
-    for _, row in df.iterrows():
-        dist_json = row.get('distribuicao_ucs', '')
-        nome_ini = row.get('nome_iniciativa', '')
-        id_ini   = row.get('id_iniciativa', '')
-        try:
-            data = json.loads(dist_json)
-            if isinstance(data, list):
-                for item in data:
-                    new_row = {
-                        "id_iniciativa": id_ini,
-                        "nome_iniciativa": nome_ini,
-                        "Unidade": item.get("Unidade", ""),
-                        "Acao": item.get("Acao", ""),
-                        "Valor Alocado": item.get("Valor Alocado", 0)
-                    }
-                    rows.append(new_row)
-        except:
-            pass
-
-    if rows:
-        return pd.DataFrame(rows)
-    else:
-        return pd.DataFrame(columns=[
-            "id_iniciativa","nome_iniciativa","Unidade","Acao","Valor Alocado"
-        ])
-
-def parse_formas_contratacao(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Converte a coluna 'formas_contratacao' (JSON) em um DataFrame simples:
-    Uma linha por forma de contratação selecionada, com possíveis detalhes.
-    """
-    rows = []
-    for _, row in df.iterrows():
-        nome_ini = row.get('nome_iniciativa', '')
-        id_ini   = row.get('id_iniciativa', '')
-        formas_json = row.get('formas_contratacao', '')
-        try:
-            data = json.loads(formas_json)
-            tabela_formas = data.get("tabela_formas", [])
-            for item in tabela_formas:
-                forma = item.get("Forma de Contratação", "Sem descrição")
-                selecionado = item.get("Selecionado", False)
-                rows.append({
-                    "id_iniciativa": id_ini,
-                    "nome_iniciativa": nome_ini,
-                    "Forma de Contratação": forma,
-                    "Selecionado": selecionado
-                })
-        except:
-            pass
-
-    if rows:
-        return pd.DataFrame(rows)
-    else:
-        return pd.DataFrame(columns=[
-            "id_iniciativa","nome_iniciativa","Forma de Contratação","Selecionado"
-        ])
-
-def parse_iniciativas_principal(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Retorna um subset de colunas principais do df_filtrado (sem JSON).
+def secoes_pdf_iniciativas(df: pd.DataFrame) -> list[tuple[str, str | bytes]]:
     """
-    cols = [
-        "id_iniciativa","nome_iniciativa","usuario","objetivo_geral",
-        "introducao","justificativa","metodologia","data_hora"
-    ]
-    subset = df[cols].copy()
-    return subset
-
-def gerar_excel_por_abas(df: pd.DataFrame) -> bytes:
+    Uma seção por iniciativa: o PDF arquivado no salvamento, quando existe
+    (só concatenado), ou o documento HTML a renderizar em paralelo.
     """
-    Converte df_filtrado em várias abas:
-      1) Iniciativas (dados principais)
-      2) EixosTematicos
-      3) DistribuicaoUCs
-      4) FormasContratacao
-    Retorna os bytes do arquivo Excel.
-    """
-    df_iniciativas_main = parse_iniciativas_principal(df)
-    df_eixos            = parse_eixos_tematicos(df)
-    df_distrib          = parse_distribuicao_ucs(df)
-    df_formas           = parse_formas_contratacao(df)
-
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df_iniciativas_main.to_excel(writer, index=False, sheet_name="Iniciativas")
-        df_eixos.to_excel(writer, index=False, sheet_name="EixosTematicos")
-        df_distrib.to_excel(writer, index=False, sheet_name="DistribuicaoUCs")
-        df_formas.to_excel(writer, index=False, sheet_name="FormasContratacao")
-    return output.getvalue()
+    secoes = []
+    with abrir_cache_fragmentos() as cache_fragmentos:
+        for _, row in df.iterrows():
+            conteudo = pdf_arquivado(cache_fragmentos, row)
+            if conteudo is None:
+                conteudo = documento_html(cache_fragmentos.obter(row, FORMATO_PDF))
+            secoes.append((str(row.get('nome_iniciativa', '')), conteudo))
+    return secoes
 
 ###############################################################################
-#  7. BOTÕES: GERAR EXCEL E GERAR PDF                                          #
+#  6. BOTÕES: GERAR EXCEL E GERAR PDF                                          #
 ###############################################################################
 if st.button("📥 Gerar Excel "):
     with st.spinner("Gerando arquivo Excel..."):
-        excel_bytes = gerar_excel_por_abas(df_filtrado)
+        df_filtrado = carregar_selecao()
+        excel_bytes = gerar_excel_por_abas(df_filtrado, *load_dimensoes(versao_dimensoes()))
     current_datetime = datetime.now().strftime("%Y%m%d%H%M")
     demandante = st.session_state.get("setor", "")
-    if not df_filtrado.empty:
+    if len(df_filtrado) == 1:
         id_iniciativa = df_filtrado.iloc[0].get("id_iniciativa", "")
         usuario = df_filtrado.iloc[0].get("usuario", "")
         file_name = f"{current_datetime}_{demandante}_{id_iniciativa}_{usuario}.xlsx"
+    elif not df_filtrado.empty:
+        file_name = f"{current_datetime}_{demandante}_todas_iniciativas.xlsx"
     else:
         file_name = "export.xlsx"
 
@@ -950,31 +339,67 @@ if st.button("📥 Gerar Excel "):
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
 
-if st.button("📄 Gerar Extrato Completo em PDF"):
-    with st.spinner("Gerando Extrato em PDF..."):
-        html_content = generate_html_for_iniciativas(df_filtrado)
-        try:
-            pdf_bytes = create_pdf_bytes(html_content)
-        except ValueError as e:
-            st.error(f"Ocorreu um erro ao gerar o PDF: {e}")
-            st.stop()
-
-        current_datetime = datetime.now().strftime("%Y%m%d%H%M")
-        demandante = st.session_state.get("setor", "")
-        if not df_filtrado.empty:
-            id_iniciativa = df_filtrado.iloc[0].get("id_iniciativa", "")
-            usuario = df_filtrado.iloc[0].get("usuario", "")
-            pdf_file_name = f"{current_datetime}_{demandante}_{id_iniciativa}_{usuario}.pdf"
-        else:
-            pdf_file_name = "export.pdf"
-
-        st.download_button(
-            label="⬇️ Download do Extrato (PDF)",
-            data=pdf_bytes,
-            file_name=pdf_file_name,
-            mime="application/pdf"
-        )
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(pdf_bytes)
-            temp_pdf_path = tmp.name
-        pdf_viewer(temp_pdf_path)
\ No newline at end of file
+gerenciador_jobs = obter_gerenciador_jobs()
+usuario_job = st.session_state.get("cpf", "")
+
+col_pdf, col_escopo = st.columns([2, 3])
+with col_escopo:
+    escopo_pdf = st.radio(
+        "Conteúdo do extrato",
+        ["Iniciativa selecionada", "Todas as iniciativas"],
+        horizontal=True,
+        key="escopo_pdf"
+    )
+
+with col_pdf:
+    gerar_pdf = st.button("📄 Gerar Extrato Completo em PDF")
+
+if gerar_pdf:
+    df_pdf = (
+        carregar_selecao() if escopo_pdf == "Iniciativa selecionada"
+        else load_iniciativas(setor_usuario, perfil_usuario)
+    )
+    # seções arquivadas no salvamento entram prontas; as demais são
+    # renderizadas em segundo plano, uma por processo
+    secoes = secoes_pdf_iniciativas(df_pdf)
+
+    current_datetime = datetime.now().strftime("%Y%m%d%H%M")
+    demandante = st.session_state.get("setor", "")
+    if len(df_pdf) == 1:
+        id_iniciativa = df_pdf.iloc[0].get("id_iniciativa", "")
+        usuario = df_pdf.iloc[0].get("usuario", "")
+        pdf_file_name = f"{current_datetime}_{demandante}_{id_iniciativa}_{usuario}.pdf"
+        descricao_job = f"Extrato PDF — {df_pdf.iloc[0].get('nome_iniciativa', '')}"
+    elif not df_pdf.empty:
+        pdf_file_name = f"{current_datetime}_{demandante}_todas_iniciativas.pdf"
+        descricao_job = f"Extrato PDF — {len(df_pdf)} iniciativas"
+    else:
+        pdf_file_name = "export.pdf"
+        descricao_job = "Extrato PDF"
+
+    gerenciador_jobs.submeter(
+        tipo="extrato_pdf",
+        descricao=descricao_job,
+        funcao=lambda progresso, secoes=secoes: montar_relatorio_pdf(secoes, progresso=progresso),
+        nome_arquivo=pdf_file_name,
+        mime="application/pdf",
+        usuario=usuario_job,
+        unidade="seções"
+    )
+    st.toast("Extrato enviado para processamento em segundo plano.", icon="⏳")
+
+with st.expander("📦 Meus extratos em PDF", expanded=True):
+    exibir_jobs(gerenciador_jobs, usuario_job, tipo="extrato_pdf", chave="jobs_pdf")
+
+    # pré-visualização do extrato mais recente já concluído
+    concluidos = [
+        j for j in gerenciador_jobs.listar(usuario=usuario_job, tipo="extrato_pdf")
+        if j["status"] == "concluido"
+    ]
+    if concluidos and st.toggle("Pré-visualizar o extrato mais recente", key="jobs_pdf_preview"):
+        pdf_bytes = gerenciador_jobs.ler_artefato(concluidos[0]["id"])
+        if pdf_bytes:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+                tmp.write(pdf_bytes)
+                temp_pdf_path = tmp.name
+            pdf_viewer(temp_pdf_path)
\ No newline at end of file
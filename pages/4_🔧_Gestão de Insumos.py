@@ -3,6 +3,9 @@ import sqlite3
 import pandas as pd
 import os
 
+from hooks.dinheiro import arredondar_real
+from hooks.grade_paginada import grade_paginada
+
 # ------------------------------------------------------------------------
 #           Configurações de Página e Verificação de Login
 # ------------------------------------------------------------------------
@@ -92,7 +95,7 @@ def insert_insumo(elemento, espec_padrao, nome_insumo, preco, origem, situacao,
         espec_padrao or "",
         nome_insumo or "",
         "",  # especificacao_tecnica pode ficar vazio
-        preco or 0.0,
+        arredondar_real(preco),
         origem,
         situacao,
         registrado_por
@@ -114,7 +117,7 @@ def update_insumo(insumo_id, elemento, espec_padrao, nome_insumo, espec_tecnica,
         espec_padrao,
         nome_insumo,
         espec_tecnica,
-        preco,
+        arredondar_real(preco),
         situacao,
         insumo_id
     ))
@@ -135,10 +138,6 @@ def get_sugestoes_insumos(perfil):
         df = pd.read_sql_query(query, conn, params=[usuario_cpf])
     return df
 
-def get_insumos_ativos():
-    query = "SELECT * FROM td_insumos WHERE situacao = 'ativo' ORDER BY id DESC"
-    return pd.read_sql_query(query, conn)
-
 def get_insumos_desativados():
     query = "SELECT * FROM td_insumos WHERE situacao = 'desativado' ORDER BY id DESC"
     return pd.read_sql_query(query, conn)
@@ -334,12 +333,31 @@ st.markdown("---")
 # =============================================================================
 st.markdown("### Itens Ativos")
 
-df_ativos = get_insumos_ativos()
-df_ativos = filtrar_df(df_ativos, selected_elemento, selected_espec, selected_insumo)
+# paginação, ordenação e filtros feitos no SQLite: só a página atual sai do banco.
+# Perfil comum apenas consulta (grade AgGrid); cocam/admin editam a página no data_editor.
+df_ativos = grade_paginada(
+    "td_insumos",
+    chave="grade_ativos",
+    colunas=[
+        "id", "elemento_despesa", "especificacao_padrao",
+        "descricao_insumo", "preco_referencia", "situacao",
+        "origem", "registrado_por"
+    ],
+    filtros={
+        "situacao": "ativo",
+        "elemento_despesa": selected_elemento,
+        "especificacao_padrao": selected_espec,
+        "descricao_insumo": selected_insumo,
+    },
+    colunas_moeda=["preco_referencia"],
+    ordenacao_padrao="id",
+    decrescente_padrao=True,
+    exibir=usuario_perfil not in ["cocam", "admin"],
+)
 
 if df_ativos.empty:
     st.info("Não há itens ativos no momento (ou não correspondem aos filtros).")
-else:
+elif usuario_perfil in ["cocam", "admin"]:
     if usuario_perfil == "admin":
         # admin pode editar tudo
         col_config_ativos = {
@@ -372,50 +390,29 @@ else:
             "origem": st.column_config.TextColumn("Origem", disabled=True),
             "registrado_por": st.column_config.TextColumn("Registrado Por", disabled=True),
         }
-    else:
-        # perfil comum: não pode editar nada
-        col_config_ativos = {
-            "id": st.column_config.TextColumn("ID", disabled=True),
-            "elemento_despesa": st.column_config.TextColumn("Elemento de Despesa", disabled=True),
-            "especificacao_padrao": st.column_config.TextColumn("Especificação Padrão", disabled=True),
-            "descricao_insumo": st.column_config.TextColumn("Descrição do Insumo", disabled=True),
-            "preco_referencia": st.column_config.NumberColumn(
-                "Preço de Referência", format="localized", disabled=True
-            ),
-            "situacao": st.column_config.TextColumn("Situação", disabled=True),
-            "origem": st.column_config.TextColumn("Origem", disabled=True),
-            "registrado_por": st.column_config.TextColumn("Registrado Por", disabled=True),
-        }
-
-    df_ativos = df_ativos[[
-        "id", "elemento_despesa", "especificacao_padrao",
-        "descricao_insumo", "preco_referencia", "situacao",
-        "origem", "registrado_por"
-    ]]
 
     edited_df_ativos = st.data_editor(
         df_ativos,
         column_config=col_config_ativos,
         use_container_width=True,
         hide_index=True,
-        key="editor_ativos"
+        # a chave acompanha as linhas da página, para que edições não migrem de página
+        key=f"editor_ativos_{hash(tuple(df_ativos['id']))}"
     )
 
-    # só cocam ou admin podem alterar
-    if usuario_perfil in ["cocam", "admin"]:
-        if st.button("Salvar Alterações em Itens Ativos"):
-            for index, row in edited_df_ativos.iterrows():
-                update_insumo(
-                    insumo_id=row["id"],
-                    elemento=row["elemento_despesa"],
-                    espec_padrao=row["especificacao_padrao"],
-                    nome_insumo=row["descricao_insumo"],
-                    espec_tecnica="",
-                    preco=row["preco_referencia"],
-                    situacao=row["situacao"]
-                )
-            st.success("Itens ativos atualizados com sucesso!")
-            st.rerun()
+    if st.button("Salvar Alterações em Itens Ativos"):
+        for index, row in edited_df_ativos.iterrows():
+            update_insumo(
+                insumo_id=row["id"],
+                elemento=row["elemento_despesa"],
+                espec_padrao=row["especificacao_padrao"],
+                nome_insumo=row["descricao_insumo"],
+                espec_tecnica="",
+                preco=row["preco_referencia"],
+                situacao=row["situacao"]
+            )
+        st.success("Itens ativos atualizados com sucesso!")
+        st.rerun()
 
 st.markdown("---")
 
@@ -0,0 +1,95 @@
+import streamlit as st
+import pandas as pd
+import sqlite3
+from io import BytesIO
+
+from hooks.apresentacao import exibir_tabela
+from hooks.dinheiro import formatar_real, somar_reais
+from hooks.indice_uc import listar_ucs, consultar_uc
+
+db_path = "database/app_data.db"
+
+# 📌 Verifica se o usuário está logado antes de permitir acesso à página
+if "usuario_logado" not in st.session_state or not st.session_state["usuario_logado"]:
+    st.warning("🔒 Acesso negado! Faça login na página principal para acessar esta seção.")
+    st.stop()
+
+st.set_page_config(
+    page_title="Iniciativas por UC",
+    page_icon="🗺️",
+    layout="wide"
+)
+
+st.subheader("🗺️ Iniciativas por Unidade de Conservação")
+st.caption(
+    "O que está planejado para cada UC em todas as iniciativas (última versão "
+    "das regras de negócio), a partir do índice atualizado a cada salvamento."
+)
+
+# admin e cocam veem todas as UCs; os demais perfis, apenas as do seu setor
+perfil = st.session_state.get("perfil", "")
+demandante = None if perfil in ("admin", "cocam") else st.session_state.get("setor", "")
+
+conn = sqlite3.connect(db_path)
+df_ucs = listar_ucs(conn, demandante)
+
+if df_ucs.empty:
+    conn.close()
+    st.info("ℹ️ Nenhuma distribuição por UC cadastrada até o momento.")
+    st.stop()
+
+rotulos = {
+    row["cnuc"]: f"{row['unidade']} ({row['cnuc']})"
+    for _, row in df_ucs.iterrows()
+}
+cnucs_selecionados = st.multiselect(
+    "Selecione as Unidades de Conservação",
+    options=list(rotulos),
+    format_func=rotulos.get,
+    placeholder="Escolha uma ou mais UCs"
+)
+
+if not cnucs_selecionados:
+    conn.close()
+    st.info("Selecione ao menos uma UC para ver as iniciativas planejadas.")
+    st.stop()
+
+df_resultado = consultar_uc(conn, cnucs_selecionados, demandante)
+conn.close()
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Unidades", df_resultado["CNUC"].nunique())
+col2.metric("Iniciativas", df_resultado["id_iniciativa"].nunique())
+col3.metric("Valor planejado", formatar_real(somar_reais(df_resultado["Valor"])))
+
+for cnuc, df_uc in df_resultado.groupby("CNUC", sort=False):
+    with st.expander(f"🌳 {rotulos.get(cnuc, cnuc)} — {formatar_real(somar_reais(df_uc['Valor']))}", expanded=len(cnucs_selecionados) == 1):
+        # Iniciativa x Eixo
+        pivo = df_uc.pivot_table(
+            index="Iniciativa", columns="Eixo Temático", values="Valor", aggfunc="sum", fill_value=0
+        )
+        pivo["Total"] = pivo.sum(axis=1)
+        exibir_tabela(pivo.reset_index(), colunas_moeda=list(pivo.columns))
+
+st.markdown("#### Detalhamento")
+df_exibir = df_resultado.drop(columns=["id_iniciativa", "versao"])
+exibir_tabela(df_exibir, colunas_moeda=["Valor"])
+
+col_csv, col_xlsx = st.columns(2)
+with col_csv:
+    st.download_button(
+        "📥 Baixar CSV",
+        data=df_exibir.to_csv(index=False).encode("utf-8"),
+        file_name="iniciativas_por_uc.csv",
+        mime="text/csv"
+    )
+with col_xlsx:
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        df_exibir.to_excel(writer, index=False, sheet_name="IniciativasPorUC")
+    st.download_button(
+        "📥 Baixar Excel",
+        data=output.getvalue(),
+        file_name="iniciativas_por_uc.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
@@ -6,6 +6,7 @@ import time
 # Importe a função de inicialização
 from init_db import init_database
 from init_db import init_samge_database
+from init_db import preparar_banco
 
 # Caminho onde o DB será criado
 db_path = "database/app_data.db"
@@ -15,6 +16,9 @@ if not os.path.exists(db_path):
     init_database()
     init_samge_database()
 
+# Garante WAL, log de alterações e as estruturas derivadas (ver init_db.preparar_banco)
+preparar_banco(db_path)
+
 st.set_page_config(
     page_title="SAMGePlan (v.0)",
     page_icon="♾️",